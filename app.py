@@ -1,11 +1,25 @@
+import hmac
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from io import BytesIO
 from datetime import datetime
 
+import charts
+import inventory
+import paging
+import profiling
+import reachability
+import rf
+import service
+import styling
+import telemetry
+import theme
+
 # --- 1. CONFIGURACIÓN INICIAL ---
+run_started = time.perf_counter()
+
 st.set_page_config(
     page_title="Zaldívar Repetidores Monitor",
     layout="wide",
@@ -15,455 +29,165 @@ st.set_page_config(
 
 # --- 2. CSS MODERNO Y PROFESIONAL ---
 def apply_custom_css(dark_mode=False):
-    if dark_mode:
-        st.markdown("""
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
-
-            html, body, [class*="css"] {
-                font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-                color: #f1f5f9;
-                -webkit-font-smoothing: antialiased;
-            }
-
-            .stApp {
-                background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
-            }
-
-            h1 {
-                color: #f1f5f9 !important;
-                font-weight: 800 !important;
-                font-size: 2.8rem !important;
-                letter-spacing: -1.5px !important;
-            }
-
-            h3, h5 {
-                color: #cbd5e1 !important;
-            }
-
-            div[data-testid="metric-container"] {
-                background: rgba(30, 41, 59, 0.8);
-                backdrop-filter: blur(20px);
-                border: 1px solid rgba(71, 85, 105, 0.5);
-                padding: 28px 24px;
-                border-radius: 20px;
-                box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.3);
-                transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-            }
-
-            div[data-testid="metric-container"]:hover {
-                transform: translateY(-8px) scale(1.02);
-                border-color: rgba(59, 130, 246, 0.5);
-                box-shadow: 0 20px 60px 0 rgba(59, 130, 246, 0.3);
-            }
-
-            div[data-testid="metric-container"] label {
-                color: #94a3b8 !important;
-            }
-
-            div[data-testid="metric-container"] div[data-testid="stMetricValue"] {
-                color: #f1f5f9 !important;
-            }
-
-            .streamlit-expanderHeader {
-                background: rgba(30, 41, 59, 0.8);
-                border: 1px solid rgba(71, 85, 105, 0.5);
-                color: #f1f5f9 !important;
-            }
-
-            .streamlit-expanderContent {
-                background: rgba(30, 41, 59, 0.8);
-                border: 1px solid rgba(71, 85, 105, 0.5);
-            }
-
-            .stTabs [data-baseweb="tab-list"] {
-                background: rgba(30, 41, 59, 0.6);
-            }
-
-            .stTabs [data-baseweb="tab"] {
-                color: #94a3b8;
-            }
-
-            .stTabs [aria-selected="true"] {
-                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%) !important;
-                color: white !important;
-            }
-
-            .stDataFrame thead tr th {
-                background: linear-gradient(135deg, #1e293b 0%, #334155 100%) !important;
-                color: white !important;
-            }
-        </style>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown("""
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
-
-            html, body, [class*="css"] {
-                font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-                color: #1e293b;
-                -webkit-font-smoothing: antialiased;
-                -moz-osx-font-smoothing: grayscale;
-            }
-
-            .stApp {
-                background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-            }
-
-            h1 {
-                color: #0f172a !important;
-                font-weight: 800 !important;
-                font-size: 2.8rem !important;
-                letter-spacing: -1.5px !important;
-                margin-bottom: 0.5rem !important;
-                background: linear-gradient(135deg, #1e293b 0%, #3b82f6 100%);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-            }
-
-            h5 {
-                color: #64748b !important;
-                font-weight: 500 !important;
-                font-size: 1.1rem !important;
-                margin-top: 0 !important;
-            }
-
-            h3 {
-                color: #1e293b !important;
-                font-weight: 700 !important;
-                font-size: 1.5rem !important;
-                letter-spacing: -0.5px !important;
-            }
-
-            div[data-testid="metric-container"] {
-                background: rgba(255, 255, 255, 0.7);
-                backdrop-filter: blur(20px);
-                -webkit-backdrop-filter: blur(20px);
-                border: 1px solid rgba(255, 255, 255, 0.9);
-                padding: 28px 24px;
-                border-radius: 20px;
-                box-shadow: 
-                    0 8px 32px 0 rgba(31, 38, 135, 0.08),
-                    0 2px 8px 0 rgba(0, 0, 0, 0.05);
-                transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-                position: relative;
-                overflow: hidden;
-            }
-
-            div[data-testid="metric-container"]::before {
-                content: '';
-                position: absolute;
-                top: 0;
-                left: 0;
-                right: 0;
-                bottom: 0;
-                background: linear-gradient(135deg, rgba(59, 130, 246, 0.05) 0%, rgba(147, 51, 234, 0.05) 100%);
-                opacity: 0;
-                transition: opacity 0.4s ease;
-                z-index: 0;
-            }
-
-            div[data-testid="metric-container"]:hover::before {
-                opacity: 1;
-            }
-
-            div[data-testid="metric-container"]:hover {
-                transform: translateY(-8px) scale(1.02);
-                box-shadow: 
-                    0 20px 60px 0 rgba(59, 130, 246, 0.15),
-                    0 4px 16px 0 rgba(0, 0, 0, 0.1);
-                border-color: rgba(59, 130, 246, 0.3);
-            }
-
-            div[data-testid="metric-container"] label {
-                color: #64748b !important;
-                font-size: 0.75rem !important;
-                font-weight: 600 !important;
-                text-transform: uppercase !important;
-                letter-spacing: 1.2px !important;
-                position: relative;
-                z-index: 1;
-            }
-
-            div[data-testid="metric-container"] div[data-testid="stMetricValue"] {
-                color: #0f172a !important;
-                font-weight: 800 !important;
-                font-size: 2.2rem !important;
-                letter-spacing: -1px !important;
-                position: relative;
-                z-index: 1;
-            }
-
-            .streamlit-expanderHeader {
-                background: rgba(255, 255, 255, 0.8);
-                backdrop-filter: blur(10px);
-                border: 1px solid rgba(226, 232, 240, 0.8);
-                border-radius: 16px;
-                color: #1e293b !important;
-                font-weight: 600 !important;
-                font-size: 1.05rem !important;
-                padding: 18px 24px !important;
-                transition: all 0.3s ease;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.04);
-            }
-
-            .streamlit-expanderHeader:hover {
-                background: rgba(255, 255, 255, 0.95);
-                border-color: #3b82f6;
-                box-shadow: 0 4px 16px rgba(59, 130, 246, 0.12);
-                transform: translateX(4px);
-            }
-
-            .streamlit-expanderContent {
-                background: rgba(255, 255, 255, 0.8);
-                backdrop-filter: blur(10px);
-                border: 1px solid rgba(226, 232, 240, 0.8);
-                border-top: none;
-                border-bottom-left-radius: 16px;
-                border-bottom-right-radius: 16px;
-                padding: 28px !important;
-                margin-top: -1px;
-            }
-
-            .stTabs [data-baseweb="tab-list"] {
-                gap: 12px;
-                background: rgba(255, 255, 255, 0.6);
-                padding: 8px;
-                border-radius: 16px;
-                backdrop-filter: blur(10px);
-            }
-
-            .stTabs [data-baseweb="tab"] {
-                background: transparent;
-                border-radius: 12px;
-                padding: 12px 28px;
-                font-weight: 600;
-                font-size: 0.95rem;
-                color: #64748b;
-                border: none;
-                transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-                letter-spacing: 0.3px;
-            }
-
-            .stTabs [data-baseweb="tab"]:hover {
-                background: rgba(59, 130, 246, 0.1);
-                color: #3b82f6;
-            }
-
-            .stTabs [aria-selected="true"] {
-                background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%) !important;
-                color: white !important;
-                box-shadow: 
-                    0 4px 12px rgba(59, 130, 246, 0.3),
-                    0 2px 4px rgba(0, 0, 0, 0.1) !important;
-            }
-
-            .stDataFrame {
-                border-radius: 12px !important;
-                overflow: hidden !important;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.04) !important;
-            }
-
-            .stDataFrame thead tr th {
-                background: linear-gradient(135deg, #1e293b 0%, #334155 100%) !important;
-                color: white !important;
-                font-weight: 600 !important;
-                font-size: 0.85rem !important;
-                text-transform: uppercase !important;
-                letter-spacing: 0.5px !important;
-                padding: 16px 12px !important;
-                border: none !important;
-            }
-
-            .stDataFrame tbody tr {
-                transition: all 0.2s ease;
-            }
-
-            .stDataFrame tbody tr:hover {
-                background: rgba(59, 130, 246, 0.08) !important;
-                transform: scale(1.01);
-            }
-
-            .stAlert {
-                background: rgba(255, 255, 255, 0.8) !important;
-                backdrop-filter: blur(10px) !important;
-                border-radius: 12px !important;
-                border-left: 4px solid #3b82f6 !important;
-                padding: 16px 20px !important;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.04) !important;
-            }
-
-            hr {
-                margin: 2rem 0 !important;
-                border: none !important;
-                height: 1px !important;
-                background: linear-gradient(90deg, transparent, #cbd5e1, transparent) !important;
-            }
-
-            .stMarkdown code {
-                background: rgba(59, 130, 246, 0.1);
-                color: #3b82f6;
-                padding: 4px 8px;
-                border-radius: 6px;
-                font-family: 'JetBrains Mono', monospace;
-                font-size: 0.9em;
-            }
-
-            ::-webkit-scrollbar {
-                width: 10px;
-                height: 10px;
-            }
-
-            ::-webkit-scrollbar-track {
-                background: #f1f5f9;
-                border-radius: 10px;
-            }
-
-            ::-webkit-scrollbar-thumb {
-                background: linear-gradient(135deg, #94a3b8, #64748b);
-                border-radius: 10px;
-                transition: background 0.3s;
-            }
-
-            ::-webkit-scrollbar-thumb:hover {
-                background: linear-gradient(135deg, #64748b, #475569);
-            }
-
-            @keyframes fadeIn {
-                from { opacity: 0; transform: translateY(20px); }
-                to { opacity: 1; transform: translateY(0); }
-            }
-
-            .element-container {
-                animation: fadeIn 0.6s ease-out;
-            }
-        </style>
-        """, unsafe_allow_html=True)
-
-# --- 3. FUNCIONES DE CARGA Y PROCESAMIENTO ---
-@st.cache_data
-def load_data():
-    file_path = "Sistema_Radio_Completo.xlsx"
-    try:
-        df = pd.read_excel(file_path, header=3)
-        df = df.dropna(subset=['ID'])
-        df['ID'] = pd.to_numeric(df['ID'], errors='coerce').fillna(0).astype(int)
-        
-        def get_system(id_val):
-            if 100 <= id_val < 200: return "Prevención - Negrillar"
-            elif 200 <= id_val < 300: return "Apilado"
-            elif 400 <= id_val < 500: return "Planta"
-            elif 500 <= id_val < 600: return "Mina"
-            elif 600 <= id_val < 700: return "ZALOTRC"
-            return "Otros"
-            
-        df['Sistema_Logico'] = df['ID'].apply(get_system)
-        df['Rol'] = df['Tipo Vinculo'].apply(lambda x: 'Master' if 'Master' in str(x) else 'Peer')
-        return df
-    except Exception as e:
-        st.error(f"Error al cargar datos: {e}")
-        return pd.DataFrame()
-
-# --- 4. FUNCIÓN DE ESTILOS PARA TABLAS ---
-def premium_style(df_input):
-    def highlight_rows(row):
-        if row['Rol'] == 'Master':
-            return [
-                'background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%); '
-                'color: #1e40af; '
-                'font-weight: 700; '
-                'border-left: 4px solid #3b82f6;'
-            ] * len(row)
-        else:
-            return [
-                'background: white; '
-                'color: #475569; '
-                'font-weight: 500;'
-            ] * len(row)
-            
-    return df_input.style.apply(highlight_rows, axis=1)\
-                        .format(precision=4)\
-                        .set_properties(**{
-                            'text-align': 'left',
-                            'padding': '14px 12px',
-                            'border-bottom': '1px solid #f1f5f9'
-                        })
-
-# --- 5. FUNCIONES DE ANÁLISIS ---
-def check_system_health(dataframe):
-    """Detecta anomalías en la configuración"""
-    issues = []
-    
-    for system in dataframe['Sistema_Logico'].unique():
-        system_df = dataframe[dataframe['Sistema_Logico'] == system]
-        masters = system_df[system_df['Rol'] == 'Master']
-        
-        if len(masters) == 0:
-            issues.append(('error', f"⚠️ **{system}** no tiene Master asignado"))
-        elif len(masters) > 1:
-            issues.append(('warning', f"⚡ **{system}** tiene múltiples Masters ({len(masters)})"))
-    
-    duplicate_ips = dataframe[dataframe.duplicated(subset=['IP Ethernet'], keep=False)]
-    if not duplicate_ips.empty:
-        issues.append(('error', f"🔴 Detectadas {len(duplicate_ips)} IPs duplicadas"))
-    
-    return issues
-
-# --- 6. FUNCIONES DE EXPORTACIÓN ---
-@st.cache_data
-def convert_df_to_csv(dataframe):
-    return dataframe.to_csv(index=False).encode('utf-8')
-
-def to_excel(dataframe):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        dataframe.to_excel(writer, index=False, sheet_name='Repetidores')
-        
-        # Agregar hoja de resumen
-        summary_data = {
-            'Métrica': [
-                'Total Repetidores',
-                'Total Masters',
-                'Total Peers',
-                'Sistemas Lógicos',
-                'Sitios Físicos',
-                'Fecha Reporte'
-            ],
-            'Valor': [
-                len(dataframe),
-                len(dataframe[dataframe['Rol'] == 'Master']),
-                len(dataframe[dataframe['Rol'] == 'Peer']),
-                dataframe['Sistema_Logico'].nunique(),
-                dataframe['Cerro'].nunique(),
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            ]
-        }
-        pd.DataFrame(summary_data).to_excel(writer, index=False, sheet_name='Resumen')
-    
-    return output.getvalue()
+    # Hojas estáticas versionadas (static/): el navegador las descarga una sola vez
+    st.markdown(theme.stylesheet(dark_mode, st.get_option("server.enableStaticServing")),
+                unsafe_allow_html=True)
+
+# --- 3. SERVICIO DE DATOS ---
+# Intervalo por defecto de auto-actualización (s); 0 la deja apagada al abrir
+AUTO_REFRESH_SECONDS = int(os.environ.get("ZALDIVAR_AUTO_REFRESH", "30"))
+
+@st.cache_resource
+def data_service():
+    """Inventario, índices y agregados compartidos por todas las sesiones del proceso"""
+    return service.DataService()
+
+# --- 4. FUNCIONES DE EXPORTACIÓN ---
+# Se pasan como callables a st.download_button: solo se ejecutan al hacer clic
+def convert_df_to_csv(view):
+    return view.csv
+
+def to_excel(view):
+    # Hoja de resumen con los mismos agregados que el dashboard
+    return lambda: view.excel(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+# --- 5. TELEMETRÍA ---
+@st.cache_resource
+def telemetry_service():
+    """Ingesta de telemetría: una sola instancia (e hilos) por proceso"""
+    return telemetry.TelemetryService()
+
+@st.cache_resource
+def reachability_service():
+    """Sondeo de alcanzabilidad: un solo event loop (e hilo) por proceso"""
+    return reachability.ReachabilityService()
+
+# --- 6. INSTRUMENTACIÓN ---
+# Panel de rendimiento: con ZALDIVAR_PROFILE=1, visible solo abriendo la app con ?admin=<token>
+ADMIN_TOKEN = os.environ.get("ZALDIVAR_ADMIN_TOKEN", "")
+
+@st.cache_resource
+def metrics_exporter():
+    """Endpoint /metrics y archivo Prometheus: uno por proceso"""
+    return profiling.MetricsExporter()
+
+def is_admin():
+    token = st.query_params.get("admin", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+# --- 7. TABLAS PAGINADAS ---
+def table_page(view, column, value, shown, key):
+    """Controles de orden y página de una tabla; solo la página visible sale del servidor"""
+    sortable = [label for label, col in paging.SORT_COLUMNS.items() if col in shown]
+    c1, c2, c3 = st.columns([2, 1, 1])
+    with c1:
+        sort = st.selectbox("Ordenar por", [None, *sortable], format_func=lambda s: s or "Inventario",
+                            key=f"{key}_sort")
+    with c2:
+        descending = st.toggle("Descendente", key=f"{key}_desc", disabled=sort is None)
+    page = view.page(column, value, st.session_state.get(f"{key}_page", 1), sort, descending)
+    # Con otros filtros puede haber menos páginas: el control se ajusta antes de dibujarse
+    st.session_state[f"{key}_page"] = page.number
+    with c3:
+        if page.pages > 1:
+            st.number_input(f"Página (de {page.pages})", min_value=1, max_value=page.pages, key=f"{key}_page")
+    return page
+
+def page_caption(page):
+    if page.pages > 1:
+        pinned = f" · 👑 {page.pinned} fijo(s) arriba" if page.pinned else ""
+        st.caption(f"Filas {page.first}–{page.last} de {page.total}{pinned}")
+
+# --- 8. FRAGMENTOS CON DATOS ---
+# KPIs, alertas y tablas de los tabs 1 y 2 son fragmentos que, con la
+# auto-actualización, se re-ejecutan solos y toman el inventario vigente.
+# La página completa solo se re-ejecuta si cambian las opciones de los filtros.
+def latest():
+    """(snapshot, vista) que debe mostrar un fragmento"""
+    if full_run:
+        return state, view
+    if data.changed():
+        try:
+            data.current()
+        except Exception:
+            # El intento queda registrado: no se reintenta hasta que cambien los archivos
+            pass
+    snap = data.snapshot
+    if snap is None or snap is state:
+        return state, view
+    if any(snap.index.options(col) != state.index.options(col) for col in selections):
+        st.rerun(scope="app")
+    if prober.enabled:
+        prober.watch(snap.key, snap.df)
+    if ingest.enabled:
+        ingest.store.accept(snap.key, snap.df['ID'])
+    return snap, data.view(snap, selections, search_term)
+
+def live_reach():
+    return prober.repeater_status() if prober.enabled else None
 
 # ============================================
 # INICIO DE LA APLICACIÓN
 # ============================================
-
-# Cargar datos
-df = load_data()
+# Falso al terminar la corrida completa: los reruns de fragmentos lo ven así
+full_run = True
+
+# Cargar datos (snapshot columnar mientras el libro no cambie)
+data = data_service()
+metrics_exporter()
+try:
+    state = data.current()
+except Exception as e:
+    st.error(f"Error al cargar datos: {e}")
+    state = data.snapshot
+df = state.df if state is not None else pd.DataFrame()
+
+# Resumen de la última recarga incremental vista por esta sesión
+previous_version = st.session_state.get('data_version')
+st.session_state['data_version'] = state.version if state is not None else None
+reload_diff = state.last_diff if previous_version not in (None, state and state.version) else None
+if reload_diff is not None:
+    st.toast(f"🔄 {reload_diff.summary()}")
 
 if df.empty:
     st.error("⚠️ No se encontraron datos. Verifica que el archivo 'Sistema_Radio_Completo.xlsx' esté en el directorio.")
     st.stop()
 
+totals = data.view(state).summary
+
+# Sondeo de alcanzabilidad sobre el inventario vigente (live_reach: estado por ID del último barrido)
+prober = reachability_service()
+if prober.enabled:
+    prober.watch(state.key, df)
+
+# Telemetría: la ingesta corre desde el primer rerun y solo acepta IDs del inventario vigente
+ingest = telemetry_service()
+if ingest.enabled:
+    ingest.store.accept(state.key, df['ID'])
+
 # ============================================
 # SIDEBAR - FILTROS Y CONFIGURACIÓN
 # ============================================
 with st.sidebar:
+    filter_index = state.index
+    
     st.markdown("### ⚙️ Configuración")
     
     # Modo Oscuro
     dark_mode = st.toggle("🌙 Modo Oscuro", value=False)
     
+    # Auto-actualización para pantallas murales: solo los fragmentos con datos (KPIs,
+    # alertas, tablas) se re-ejecutan periódicamente; la página completa solo si
+    # cambian las opciones de los filtros
+    auto_refresh = st.toggle("⏱️ Auto-actualizar", value=AUTO_REFRESH_SECONDS > 0)
+    refresh_every = None
+    if auto_refresh:
+        refresh_every = st.select_slider(
+            "Intervalo (s)",
+            options=sorted({10, 15, 30, 60, 120, 300, AUTO_REFRESH_SECONDS or 30}),
+            value=AUTO_REFRESH_SECONDS or 30
+        )
+    
     st.markdown("---")
     st.markdown("### 🔍 Filtros Avanzados")
     
@@ -473,14 +197,14 @@ with st.sidebar:
     # Filtros multi-select
     selected_systems = st.multiselect(
         "📊 Sistemas Lógicos",
-        options=sorted(df['Sistema_Logico'].unique()),
-        default=sorted(df['Sistema_Logico'].unique())
+        options=filter_index.options('Sistema_Logico'),
+        default=filter_index.options('Sistema_Logico')
     )
     
     selected_sites = st.multiselect(
         "🏔️ Sitios Físicos",
-        options=sorted(df['Cerro'].unique()),
-        default=sorted(df['Cerro'].unique())
+        options=filter_index.options('Cerro'),
+        default=filter_index.options('Cerro')
     )
     
     selected_roles = st.multiselect(
@@ -489,40 +213,42 @@ with st.sidebar:
         default=['Master', 'Peer']
     )
     
-    # Aplicar filtros
-    df_filtered = df[
-        (df['Sistema_Logico'].isin(selected_systems)) &
-        (df['Cerro'].isin(selected_sites)) &
-        (df['Rol'].isin(selected_roles))
-    ]
+    selections = {
+        'Sistema_Logico': selected_systems,
+        'Cerro': selected_sites,
+        'Rol': selected_roles,
+    }
     
-    if search_term:
-        df_filtered = df_filtered[
-            df_filtered['ID'].astype(str).str.contains(search_term, case=False) |
-            df_filtered['Alias'].str.contains(search_term, case=False, na=False) |
-            df_filtered['IP Ethernet'].str.contains(search_term, case=False, na=False)
-        ]
+    # Con varios libros federados se puede filtrar por fuente
+    if len(state.sources) > 1:
+        selections['Fuente'] = st.multiselect(
+            "📁 Fuentes",
+            options=filter_index.options('Fuente'),
+            default=filter_index.options('Fuente')
+        )
+    
+    # Aplicar filtros: la vista se calcula una vez por (versión, filtros) para todas las sesiones
+    view = data.view(state, selections, search_term)
+    summary = view.summary
     
     st.markdown("---")
-    st.metric("🎯 Resultados", len(df_filtered))
+    st.metric("🎯 Resultados", summary['total'])
     
     # Exportación
     st.markdown("---")
     st.markdown("### 📥 Exportar Datos")
     
-    csv = convert_df_to_csv(df_filtered)
     st.download_button(
         label="💾 CSV",
-        data=csv,
+        data=convert_df_to_csv(view),
         file_name=f'repetidores_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
         mime='text/csv',
         use_container_width=True
     )
     
-    excel_data = to_excel(df_filtered)
     st.download_button(
         label="📊 Excel",
-        data=excel_data,
+        data=to_excel(view),
         file_name=f'reporte_repetidores_{datetime.now().strftime("%Y%m%d")}.xlsx',
         mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         use_container_width=True
@@ -532,9 +258,17 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### ⚡ Acciones")
     
-    if st.button("🔄 Refrescar", use_container_width=True):
-        st.cache_data.clear()
-        st.rerun()
+    # La versión del libro se verifica en cada ejecución: refrescar solo
+    # informa el resultado de la recarga incremental
+    if st.button("🔄 Refrescar", use_container_width=True) and reload_diff is None:
+        st.toast("✓ Inventario sin cambios")
+    
+    # Memoria del inventario compartido (una sola copia por proceso)
+    with st.expander("🧠 Memoria del inventario"):
+        memory = state.memory
+        total_kb = memory['KB'].sum()
+        st.metric("Total", f"{total_kb / 1024:.2f} MB" if total_kb >= 1024 else f"{total_kb:.1f} KB")
+        st.dataframe(memory, hide_index=True, use_container_width=True)
 
 # Aplicar tema
 apply_custom_css(dark_mode)
@@ -542,14 +276,7 @@ apply_custom_css(dark_mode)
 # ============================================
 # HEADER
 # ============================================
-st.markdown("""
-<div style='text-align: left; margin-bottom: 1rem;'>
-    <span style='font-size: 3.5rem; background: linear-gradient(135deg, #3b82f6, #8b5cf6); 
-                 -webkit-background-clip: text; -webkit-text-fill-color: transparent;'>
-        📡
-    </span>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(theme.LOGO, unsafe_allow_html=True)
 
 st.title("Minera Zaldívar")
 st.markdown("##### 📊 Monitor de Infraestructura IPSC")
@@ -558,54 +285,80 @@ st.markdown("<br>", unsafe_allow_html=True)
 # ============================================
 # PANEL DE ALERTAS
 # ============================================
-issues = check_system_health(df_filtered)
-if issues:
-    with st.expander("🚨 Alertas del Sistema", expanded=True):
-        for severity, message in issues:
-            if severity == 'error':
-                st.error(message)
-            elif severity == 'warning':
-                st.warning(message)
+def alerts():
+    _, live = latest()
+    issues = live.issues
+    if issues:
+        with st.expander("🚨 Alertas del Sistema", expanded=True):
+            for severity, message in issues:
+                if severity == 'error':
+                    st.error(message)
+                elif severity == 'warning':
+                    st.warning(message)
+
+st.fragment(alerts, run_every=refresh_every)()
 
 # ============================================
 # KPIs PRINCIPALES
 # ============================================
-col1, col2, col3, col4, col5 = st.columns(5)
-
-with col1:
-    st.metric(
-        label="🎯 SISTEMAS",
-        value=df_filtered['Sistema_Logico'].nunique(),
-        delta=f"{df['Sistema_Logico'].nunique()} total"
-    )
-
-with col2:
-    st.metric(
-        label="🏔️ SITIOS",
-        value=df_filtered['Cerro'].nunique(),
-        delta=f"{df['Cerro'].nunique()} total"
-    )
-
-with col3:
-    st.metric(
-        label="📻 REPETIDORES",
-        value=len(df_filtered),
-        delta=f"{len(df)} total"
-    )
-
-with col4:
-    masters_count = len(df_filtered[df_filtered['Rol'] == 'Master'])
-    st.metric(
-        label="👑 MASTERS",
-        value=masters_count,
-        delta=f"{(masters_count/len(df_filtered)*100):.1f}%"
-    )
-
-with col5:
-    st.metric(
-        label="🌐 GATEWAY",
-        value="10.70.140.1"
-    )
+def kpi_row():
+    # Sondeo barato de la versión; el estado de alcanzabilidad se lee en cada tick
+    snap, live = latest()
+    summary, totals = live.summary, data.view(snap).summary
+    reach = live_reach()
+    
+    col1, col2, col3, col4, col5, *col_reach = st.columns(6 if reach is not None else 5)
+
+    with col1:
+        st.metric(
+            label="🎯 SISTEMAS",
+            value=summary['systems'],
+            delta=f"{totals['systems']} total"
+        )
+
+    with col2:
+        st.metric(
+            label="🏔️ SITIOS",
+            value=summary['sites'],
+            delta=f"{totals['sites']} total"
+        )
+
+    with col3:
+        st.metric(
+            label="📻 REPETIDORES",
+            value=summary['total'],
+            delta=f"{totals['total']} total"
+        )
+
+    with col4:
+        st.metric(
+            label="👑 MASTERS",
+            value=summary['masters'],
+            delta=f"{summary['master_pct']:.1f}%"
+        )
+
+    with col5:
+        st.metric(
+            label="🌐 GATEWAY",
+            value="10.70.140.1"
+        )
+
+    if reach is not None:
+        with col_reach[0]:
+            probed = reach.reindex(live.column('ID'))
+            down = int((probed == False).sum())
+            if not probed.notna().any():
+                status_delta = "sondeando…"
+            else:
+                status_delta = f"-{down} caídos" if down else "todos responden"
+            st.metric(
+                label="📡 EN LÍNEA",
+                value=f"{int((probed == True).sum())}/{len(probed)}",
+                delta=status_delta,
+                delta_color="normal" if probed.notna().any() else "off"
+            )
+
+st.fragment(kpi_row, run_every=refresh_every)()
 
 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -618,310 +371,372 @@ col_chart1, col_chart2 = st.columns(2)
 
 with col_chart1:
     # Gráfico de distribución por sistema
-    system_counts = df_filtered.groupby('Sistema_Logico').size().reset_index(name='Total')
-    fig_bar = px.bar(
-        system_counts,
-        x='Sistema_Logico',
-        y='Total',
-        color='Total',
-        color_continuous_scale='Blues',
-        title="Repetidores por Sistema Lógico",
-        labels={'Sistema_Logico': '', 'Total': 'Cantidad'}
-    )
-    fig_bar.update_layout(
-        showlegend=False,
-        height=400,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='Inter', size=12)
-    )
-    st.plotly_chart(fig_bar, use_container_width=True)
+    system_counts = summary['system_counts']
+    st.plotly_chart(charts.system_bar(system_counts, dark_mode), use_container_width=True)
 
 with col_chart2:
     # Gráfico Master vs Peer
-    role_count = df_filtered.groupby(['Sistema_Logico', 'Rol']).size().reset_index(name='count')
-    fig_stack = px.bar(
-        role_count,
-        x='Sistema_Logico',
-        y='count',
-        color='Rol',
-        title="Distribución Master vs Peer",
-        labels={'Sistema_Logico': '', 'count': 'Cantidad'},
-        color_discrete_map={'Master': '#3b82f6', 'Peer': '#94a3b8'},
-        barmode='stack'
-    )
-    fig_stack.update_layout(
-        height=400,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='Inter', size=12)
-    )
-    st.plotly_chart(fig_stack, use_container_width=True)
+    role_count = summary['role_count']
+    st.plotly_chart(charts.role_stack(role_count, dark_mode), use_container_width=True)
 
 # Gráfico de dona
 col_donut, col_stats = st.columns([2, 1])
 
 with col_donut:
-    fig_donut = px.pie(
-        system_counts,
-        values='Total',
-        names='Sistema_Logico',
-        hole=0.6,
-        title="Proporción de Equipos por Sistema",
-        color_discrete_sequence=px.colors.sequential.Blues_r
-    )
-    fig_donut.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
-    fig_donut.update_layout(
-        showlegend=True,
-        height=400,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(family='Inter', size=12),
-        legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.1)
-    )
-    st.plotly_chart(fig_donut, use_container_width=True)
+    st.plotly_chart(charts.system_donut(system_counts, dark_mode), use_container_width=True)
 
 with col_stats:
     st.markdown("#### 📈 Estadísticas")
     
-    st.markdown(f"""
-    <div style='background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%); 
-                padding: 16px; border-radius: 12px; margin-bottom: 12px; border-left: 4px solid #3b82f6;'>
-        <div style='font-size: 0.75rem; color: #64748b; font-weight: 600; text-transform: uppercase; 
-                    letter-spacing: 1px; margin-bottom: 8px;'>
-            COBERTURA
-        </div>
-        <div style='font-size: 2rem; font-weight: 800; color: #1e293b;'>
-            {df_filtered['Cerro'].nunique()}/{df['Cerro'].nunique()}
-        </div>
-        <div style='font-size: 0.85rem; color: #475569;'>
-            Sitios activos
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    ratio_master_peer = len(df_filtered[df_filtered['Rol'] == 'Master']) / len(df_filtered[df_filtered['Rol'] == 'Peer']) if len(df_filtered[df_filtered['Rol'] == 'Peer']) > 0 else 0
-    
-    st.markdown(f"""
-    <div style='background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%); 
-                padding: 16px; border-radius: 12px; margin-bottom: 12px; border-left: 4px solid #f59e0b;'>
-        <div style='font-size: 0.75rem; color: #92400e; font-weight: 600; text-transform: uppercase; 
-                    letter-spacing: 1px; margin-bottom: 8px;'>
-            RATIO M:P
-        </div>
-        <div style='font-size: 2rem; font-weight: 800; color: #78350f;'>
-            1:{ratio_master_peer:.1f}
-        </div>
-        <div style='font-size: 0.85rem; color: #92400e;'>
-            Master por Peer
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    avg_repetidores = len(df_filtered) / df_filtered['Cerro'].nunique() if df_filtered['Cerro'].nunique() > 0 else 0
-    
-    st.markdown(f"""
-    <div style='background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%); 
-                padding: 16px; border-radius: 12px; border-left: 4px solid #3b82f6;'>
-        <div style='font-size: 0.75rem; color: #1e40af; font-weight: 600; text-transform: uppercase; 
-                    letter-spacing: 1px; margin-bottom: 8px;'>
-            PROMEDIO
-        </div>
-        <div style='font-size: 2rem; font-weight: 800; color: #1e3a8a;'>
-            {avg_repetidores:.1f}
-        </div>
-        <div style='font-size: 0.85rem; color: #1e40af;'>
-            Repetidores por sitio
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(theme.stat_card('slate', "Cobertura", f"{summary['sites']}/{totals['sites']}", "Sitios activos"),
+                unsafe_allow_html=True)
+    st.markdown(theme.stat_card('amber', "Ratio M:P", f"1:{summary['ratio_master_peer']:.1f}", "Master por Peer"),
+                unsafe_allow_html=True)
+    st.markdown(theme.stat_card('blue', "Promedio", f"{summary['avg_per_site']:.1f}", "Repetidores por sitio"),
+                unsafe_allow_html=True)
 
 st.markdown("<br>", unsafe_allow_html=True)
 
 # ============================================
 # TABS PRINCIPALES
 # ============================================
-tab1, tab2, tab3 = st.tabs([
+# Con on_change="rerun" cada pestaña y expander reporta si está abierto:
+# las secciones cerradas no construyen ni envían sus tablas
+tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
     "🌐 Sistemas Lógicos", 
     "🏔️ Sitios Físicos", 
-    "📊 Matriz de Distribución"
-])
+    "📊 Matriz de Distribución",
+    "🕸️ Topología",
+    "📡 Frecuencias",
+    "🕰️ Historial",
+    "📶 Telemetría"
+], key="main_tabs", on_change="rerun")
 
 # --- TAB 1: SISTEMAS LÓGICOS ---
-with tab1:
-    st.markdown("""
-    <div style='background: rgba(59, 130, 246, 0.1); padding: 16px 20px; border-radius: 12px; 
-                border-left: 4px solid #3b82f6; margin-bottom: 24px;'>
-        <strong style='color: #1e40af;'>💡 Nota:</strong> 
-        <span style='color: #475569;'>Las filas con gradiente <strong>azul</strong> 
-        indican el equipo <strong>MASTER</strong> que controla el sistema.</span>
-    </div>
-    """, unsafe_allow_html=True)
+def system_tables():
+    snap, live = latest()
+    reach = live_reach()
     
-    systems = sorted(df_filtered['Sistema_Logico'].unique())
+    st.markdown(theme.note(
+        "💡 Nota:",
+        "Las filas con gradiente <strong>azul</strong> indican el equipo <strong>MASTER</strong> "
+        "que controla el sistema."
+    ), unsafe_allow_html=True)
     
-    system_icons = {
-        "Prevención - Negrillar": "🚨",
-        "Apilado": "📦",
-        "Planta": "🏭",
-        "Mina": "⛏️",
-        "ZALOTRC": "🔧",
-        "Otros": "⚙️"
-    }
+    systems = live.summary['system_counts']['Sistema_Logico'].tolist()
+    
+    system_icons = inventory.system_icons(snap.system_table)
     
     cols = st.columns(2)
+    visible = live.visible if reach is not None else None
     
     for i, sys in enumerate(systems):
         with cols[i % 2]:
-            sub_df = df_filtered[df_filtered['Sistema_Logico'] == sys].copy()
-            master_data = sub_df[sub_df['Rol'] == 'Master']
-            master_loc = master_data.iloc[0]['Cerro'] if not master_data.empty else "N/A"
-            
             icon = system_icons.get(sys, "⚙️")
             
-            with st.expander(f"{icon} **{sys}**", expanded=(i < 2)):
-                st.markdown(f"""
-                <div style='background: rgba(255, 255, 255, 0.6); padding: 12px 16px; 
-                            border-radius: 10px; margin-bottom: 16px; 
-                            border-left: 3px solid #3b82f6;'>
-                    <strong style='color: #1e293b;'>📍 Ubicación Master:</strong> 
-                    <code style='background: rgba(59, 130, 246, 0.1); color: #3b82f6; 
-                                 padding: 4px 12px; border-radius: 6px; font-size: 0.95em;'>
-                        {master_loc}
-                    </code>
-                </div>
-                """, unsafe_allow_html=True)
+            label = f"{icon} **{sys}**"
+            if reach is not None:
+                sys_ids = snap.df['ID'].to_numpy()[snap.partition_rows('Sistema_Logico', sys, visible)]
+                sys_down = int((reach.reindex(sys_ids) == False).sum())
+                if sys_down:
+                    label += f" · 🔴 {sys_down}"
+            
+            with st.expander(label, expanded=(i < 2),
+                             key=f"exp_system_{sys}", on_change="rerun") as section:
+                if not section.open:
+                    continue
                 
-                display_df = sub_df[['Cerro', 'Alias', 'ID', 'IP Ethernet', 'Rol']]
+                shown = ['Cerro', 'Alias', 'ID', 'IP Ethernet', 'Rol']
+                page = table_page(live, 'Sistema_Logico', sys, shown, f"tbl_system_{sys}")
+                # Los Master van fijos al inicio de cada página
+                master_loc = page.rows.iloc[0]['Cerro'] if page.pinned else "N/A"
                 
-                st.dataframe(
-                    premium_style(display_df),
-                    use_container_width=True,
-                    hide_index=True,
-                    height=min(400, len(display_df) * 50 + 50)
-                )
+                st.markdown(theme.location("📍 Ubicación Master:", master_loc), unsafe_allow_html=True)
+            
+                display_df = inventory.to_display(page.rows[shown])
+                down = None
+                if reach is not None:
+                    probed = reach.reindex(display_df['ID'].to_numpy())
+                    display_df['Estado'] = probed.map(reachability.STATUS_ICONS).fillna(reachability.STATUS_ICONS[None]).to_numpy()
+                    down = (probed == False).to_numpy()
+            
+                with profiling.stage('styler', rows=len(display_df)):
+                    st.dataframe(
+                        styling.premium_style(display_df, down=down),
+                        use_container_width=True,
+                        hide_index=True,
+                        height=min(400, len(display_df) * 50 + 50)
+                    )
+                page_caption(page)
+
+with tab1:
+    if tab1.open:
+        st.fragment(system_tables, run_every=refresh_every)()
 
 # --- TAB 2: SITIOS FÍSICOS ---
-with tab2:
-    sites = sorted(df_filtered['Cerro'].unique())
+def site_tables():
+    _, live = latest()
+    summary = live.summary
+    sites = sorted(summary['site_counts'])
     
     for site in sites:
-        with st.expander(f"📍 **{site}**", expanded=False):
-            sub_df = df_filtered[df_filtered['Cerro'] == site].copy()
+        with st.expander(f"📍 **{site}**", expanded=False,
+                         key=f"exp_site_{site}", on_change="rerun") as section:
+            if not section.open:
+                continue
             
             c1, c2 = st.columns([1, 3])
-            
+        
             with c1:
-                masters_count = len(sub_df[sub_df['Rol'] == 'Master'])
-                total_count = len(sub_df)
-                
-                st.markdown(f"""
-                <div style='background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%); 
-                            padding: 20px; border-radius: 12px; text-align: center; 
-                            border: 2px solid #cbd5e1;'>
-                    <div style='font-size: 2.5rem; font-weight: 800; color: #1e293b; 
-                                margin-bottom: 8px;'>
-                        {total_count}
-                    </div>
-                    <div style='font-size: 0.85rem; color: #64748b; font-weight: 600; 
-                                text-transform: uppercase; letter-spacing: 1px;'>
-                        Equipos Totales
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
+                masters_count = summary['site_masters'].get(site, 0)
+                total_count = summary['site_counts'][site]
+            
+                st.markdown(theme.total_card(total_count, "Equipos Totales"), unsafe_allow_html=True)
+            
                 st.markdown("<br>", unsafe_allow_html=True)
-                
+            
                 if masters_count > 0:
-                    st.markdown(f"""
-                    <div style='background: rgba(59, 130, 246, 0.1); padding: 12px; 
-                                border-radius: 10px; border-left: 4px solid #3b82f6;'>
-                        <strong style='color: #1e40af;'>👑 {masters_count} Master(s)</strong>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(theme.badge(f"👑 {masters_count} Master(s)"), unsafe_allow_html=True)
                 else:
-                    st.markdown("""
-                    <div style='background: rgba(34, 197, 94, 0.1); padding: 12px; 
-                                border-radius: 10px; border-left: 4px solid #22c55e;'>
-                        <strong style='color: #15803d;'>✓ Solo Peers</strong>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
+                    st.markdown(theme.badge("✓ Solo Peers", ok=True), unsafe_allow_html=True)
+                
             with c2:
-                display_df = sub_df[['Sistema_Logico', 'Alias', 'ID', 'RX (MHz)', 'TX (MHz)']]
+                shown = ['Sistema_Logico', 'Alias', 'ID', 'RX (MHz)', 'TX (MHz)', 'Rol']
+                page = table_page(live, 'Cerro', site, shown, f"tbl_site_{site}")
+                display_df = inventory.to_display(page.rows[shown])
                 st.dataframe(
-                    display_df,
+                    styling.mark_masters(display_df),
                     use_container_width=True,
                     hide_index=True,
                     height=min(400, len(display_df) * 50 + 50)
                 )
+                page_caption(page)
+
+with tab2:
+    if tab2.open:
+        st.fragment(site_tables, run_every=refresh_every)()
 
 # --- TAB 3: MATRIZ ---
 with tab3:
-    st.markdown("### 🗺️ Mapa de Distribución de Equipos")
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    pivot = pd.pivot_table(
-        df_filtered,
-        index='Sistema_Logico',
-        columns='Cerro',
-        values='Rol',
-        aggfunc=lambda x: '👑 MASTER' if 'Master' in list(x) else '🔹 Peer'
-    ).fillna("—")
+    if tab3.open:
+        st.markdown("### 🗺️ Mapa de Distribución de Equipos")
+        st.markdown("<br>", unsafe_allow_html=True)
     
-    def style_matrix(val):
-        if 'MASTER' in str(val):
-            return 'color: #1e40af; font-weight: 700; background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%);'
-        elif 'Peer' in str(val):
-            return 'color: #3b82f6; font-weight: 600; background: white;'
-        return 'color: #cbd5e1; background: #f8fafc;'
-
-    st.dataframe(
-        pivot.style.applymap(style_matrix).set_properties(**{
-            'text-align': 'center',
-            'padding': '14px 10px',
-            'border': '1px solid #f1f5f9'
-        }),
-        use_container_width=True,
-        height=400
-    )
+        matrix = view.matrix
+        large = matrix['total'].size > styling.MATRIX_MAX_CELLS
+        
+        matrix_mode = st.segmented_control(
+            "Vista",
+            ["👑 Roles", "🔢 Conteos", "🌡️ Mapa de calor"],
+            default="🌡️ Mapa de calor" if large else "👑 Roles",
+            required=True,
+            key="matrix_view",
+            label_visibility="collapsed"
+        )
+        
+        if matrix_mode == "🌡️ Mapa de calor" or large:
+            if large and matrix_mode != "🌡️ Mapa de calor":
+                st.info(f"Matriz de {matrix['total'].size} celdas: se muestra como mapa de calor")
+            st.plotly_chart(charts.matrix_heatmap(matrix, dark_mode), use_container_width=True)
+        else:
+            display = styling.role_matrix(matrix) if matrix_mode == "👑 Roles" else matrix['total']
+            with profiling.stage('styler:matriz', rows=len(display)):
+                st.dataframe(
+                    styling.matrix_style(display, matrix),
+                    use_container_width=True,
+                    height=400
+                )
     
-    # Leyenda
-    st.markdown("<br>", unsafe_allow_html=True)
-    col_a, col_b, col_c = st.columns(3)
+        # Leyenda
+        st.markdown("<br>", unsafe_allow_html=True)
+        col_a, col_b, col_c = st.columns(3)
     
-    with col_a:
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%); 
-                    padding: 12px; border-radius: 10px; text-align: center;'>
-            <strong style='color: #1e40af;'>👑 MASTER</strong>
-        </div>
-        """, unsafe_allow_html=True)
+        with col_a:
+            st.markdown(theme.legend('master', "👑 MASTER"), unsafe_allow_html=True)
     
-    with col_b:
-        st.markdown("""
-        <div style='background: white; padding: 12px; border-radius: 10px; 
-                    text-align: center; border: 2px solid #e2e8f0;'>
-            <strong style='color: #3b82f6;'>🔹 PEER</strong>
-        </div>
-        """, unsafe_allow_html=True)
+        with col_b:
+            st.markdown(theme.legend('peer', "🔹 PEER"), unsafe_allow_html=True)
     
-    with col_c:
-        st.markdown("""
-        <div style='background: #f8fafc; padding: 12px; border-radius: 10px; 
-                    text-align: center; border: 2px solid #e2e8f0;'>
-            <strong style='color: #cbd5e1;'>— Sin Equipo</strong>
-        </div>
-        """, unsafe_allow_html=True)
+        with col_c:
+            st.markdown(theme.legend('empty', "— Sin Equipo"), unsafe_allow_html=True)
+
+# --- TAB 4: TOPOLOGÍA ---
+with tab4:
+    if tab4.open:
+        # Grafo y posiciones se calculan una vez por versión para todas las sesiones
+        net = data.topology(state)
+        visible_ids = set(view.column('ID').tolist())
+        
+        st.plotly_chart(view.network_figure(net), use_container_width=True)
+        st.caption("◆ Master · ● Peer · ■ Cerro — línea continua: enlace Peer → Master; punteada: ubicación")
+        
+        orphans = net.orphans[net.orphans['ID'].isin(visible_ids)]
+        fan_out = net.fan_out[net.fan_out['ID'].isin(visible_ids)]
+        spof = net.spof[net.spof['Sistema'].isin(summary['system_counts']['Sistema_Logico'])]
+        
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("#### 📡 Peers por Master")
+            st.dataframe(fan_out, use_container_width=True, hide_index=True)
+        with c2:
+            st.markdown("#### ❓ Peers huérfanos")
+            if orphans.empty:
+                st.success("✓ Todos los Peers apuntan a un Master del inventario")
+            else:
+                st.dataframe(orphans, use_container_width=True, hide_index=True)
+        
+        st.markdown("#### ⚠️ Puntos únicos de falla por sistema")
+        st.dataframe(spof, use_container_width=True, hide_index=True)
+
+# --- TAB 5: FRECUENCIAS ---
+with tab5:
+    if tab5.open:
+        guard_khz = st.select_slider(
+            "Banda de guarda (kHz)",
+            options=sorted({6.25, 12.5, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, rf.GUARD_BAND_KHZ}),
+            value=rf.GUARD_BAND_KHZ
+        )
+        # Una vez por (versión, filtros, banda) para todas las sesiones
+        conflicts = view.frequency_conflicts(guard_khz)
+        
+        counts = conflicts['Tipo'].value_counts()
+        for col, kind in zip(st.columns(len(rf.KINDS)), rf.KINDS):
+            with col:
+                st.metric(kind, int(counts.get(kind, 0)))
+        
+        if conflicts.empty:
+            st.success(f"✓ Sin pares de frecuencias a ≤ {guard_khz:g} kHz en una misma zona")
+        else:
+            st.dataframe(
+                conflicts,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'Frecuencia A': st.column_config.NumberColumn(format="%.4f"),
+                    'Frecuencia B': st.column_config.NumberColumn(format="%.4f"),
+                    'Δ (kHz)': st.column_config.NumberColumn(format="%.2f"),
+                }
+            )
+        st.caption(f"Zonas de cerros cercanos: `{rf.ZONES_FILE}` (columnas cerro,zona); "
+                   "sin zona, cada cerro se compara solo consigo mismo.")
+
+# --- TAB 6: HISTORIAL ---
+with tab6:
+    if tab6.open:
+        versions = data.history.versions()
+        local_tz = datetime.now().astimezone().tzinfo
+        labels = [
+            f"{fecha.astimezone(local_tz):%Y-%m-%d %H:%M} · {version.split('-')[-1][:8]}"
+            for version, fecha in versions.itertuples(index=False)
+        ]
+        
+        if len(versions) < 2:
+            st.info(f"🕰️ El historial guarda cada versión cargada del inventario ({len(versions)} hasta ahora); "
+                    "se necesitan al menos dos para comparar.")
+        else:
+            older, newer = st.select_slider(
+                "Versiones a comparar",
+                options=list(range(len(versions))),
+                value=(len(versions) - 2, len(versions) - 1),
+                format_func=lambda i: labels[i]
+            )
+            old_version, new_version = versions['version'].iloc[older], versions['version'].iloc[newer]
+            
+            if older != newer:
+                # Diff por llaves y hashes de fila: el contenido se lee solo para filas modificadas
+                changes = data.history.diff(old_version, new_version)
+                counts = changes['Cambio'].value_counts()
+                kinds = ['Añadido', 'Eliminado', 'Rol', 'IP', 'Otro']
+                for col, kind in zip(st.columns(len(kinds)), kinds):
+                    with col:
+                        st.metric(kind, int(counts.get(kind, 0)))
+                
+                if changes.empty:
+                    st.success("✓ Sin diferencias entre las versiones seleccionadas")
+                else:
+                    st.dataframe(changes, use_container_width=True, hide_index=True)
+            
+            with st.expander(f"📋 Inventario al {labels[newer]}", expanded=older == newer,
+                             key="exp_history_rows", on_change="rerun") as section:
+                if section.open:
+                    rows = inventory.to_display(data.history.rows(new_version))
+                    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+# --- TAB 7: TELEMETRÍA ---
+with tab7:
+    if tab7.open:
+        if not ingest.enabled:
+            st.info(
+                "📡 Ingesta de telemetría desactivada. Define `ZALDIVAR_TELEMETRY_UDP=127.0.0.1:5140` "
+                "(o `ZALDIVAR_TELEMETRY_HTTP`) y reinicia; para probar sin equipos: "
+                "`python telemetry.py simulate --udp 127.0.0.1:5140`"
+            )
+        else:
+            stats = ingest.store.stats()
+            t1, t2, t3 = st.columns(3)
+            t1.metric("📡 Repetidores reportando", stats['repeaters'])
+            t2.metric("⚡ Muestras/s", f"{stats['rate']:.0f}")
+            t3.metric("📥 Muestras recibidas", f"{stats['received']:,}")
+            st.caption("Endpoints: " + " · ".join(ingest.endpoints()))
+            
+            live = ingest.store.latest().merge(
+                inventory.to_display(view.frame(['ID', 'Alias', 'Cerro', 'Sistema_Logico'])), on='ID'
+            )
+            
+            if live.empty:
+                st.warning("Sin muestras para los repetidores filtrados")
+            else:
+                st.dataframe(
+                    live[['Sistema_Logico', 'Cerro', 'Alias', 'ID', 'RSSI (dBm)', 'Enlace', 'Hora']]
+                        .sort_values(['Sistema_Logico', 'ID']),
+                    use_container_width=True,
+                    hide_index=True,
+                    height=min(400, len(live) * 35 + 40)
+                )
+                
+                c1, c2 = st.columns([2, 1])
+                with c1:
+                    selected_id = st.selectbox(
+                        "Repetidor",
+                        sorted(live['ID']),
+                        format_func=lambda rid: f"{rid} · {live.loc[live['ID'] == rid, 'Alias'].iloc[0]}"
+                    )
+                with c2:
+                    tier = st.radio(
+                        "Resolución",
+                        telemetry.TIERS,
+                        format_func={'raw': 'Cruda', 'minute': '1 min', 'hour': '1 hora'}.get,
+                        horizontal=True
+                    )
+                
+                history = ingest.store.series(selected_id, tier)
+                fig_rssi = charts.rssi_series(history, f"RSSI del repetidor {selected_id}", dark_mode)
+                st.plotly_chart(fig_rssi, use_container_width=True)
+
+# ============================================
+# RENDIMIENTO (ADMIN)
+# ============================================
+profiling.record('rerun', time.perf_counter() - run_started, view.size)
+
+if profiling.PROFILER.enabled and is_admin():
+    with st.expander("🛠️ Rendimiento por etapa", expanded=False,
+                     key="exp_profiling", on_change="rerun") as section:
+        if section.open:
+            timings = profiling.PROFILER.percentiles()
+            if timings.empty:
+                st.info("Aún no hay mediciones")
+            else:
+                st.dataframe(timings, use_container_width=True, hide_index=True)
+            endpoints = metrics_exporter().endpoints()
+            st.caption("Prometheus: " + (", ".join(endpoints) if endpoints else
+                       "define `ZALDIVAR_METRICS_HTTP=127.0.0.1:9464` o `ZALDIVAR_METRICS_FILE`"))
+            if st.button("Reiniciar mediciones"):
+                profiling.PROFILER.reset()
 
 # ============================================
 # FOOTER
 # ============================================
 st.markdown("<br><br>", unsafe_allow_html=True)
-st.markdown("""
-<div style='text-align: center; color: #94a3b8; font-size: 0.85rem; 
-            padding: 20px; border-top: 1px solid #e2e8f0;'>
-    <strong>Minera Zaldívar</strong> • Monitor de Infraestructura IPSC • 2026<br>
-    <small>Última actualización: {}</small>
-</div>
-""".format(datetime.now().strftime('%d/%m/%Y %H:%M:%S')), unsafe_allow_html=True)
+st.markdown(theme.footer(datetime.now().strftime('%d/%m/%Y %H:%M:%S')), unsafe_allow_html=True)
+
+full_run = False
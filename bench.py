@@ -0,0 +1,294 @@
+"""Benchmark sin Streamlit de cada etapa del dashboard sobre flotas sintéticas.
+
+Para cada tamaño se genera (una vez, ver fleet.py) un libro de inventario con
+su tabla de sistemas en BENCH_DIR y se mide, como mejor tiempo de varias
+repeticiones, cada etapa registrada con @stage: parseo del libro, carga del
+servicio de datos, filtros, página de tabla, reglas de salud, agregados,
+matriz del tab 3, Styler, exportes, conflictos RF y topología.
+
+Los resultados se comparan con la línea base guardada (BASELINE_FILE, por
+máquina); una etapa más lenta que la base por sobre la tolerancia se reporta
+como regresión y el proceso termina con código 1.
+
+    python bench.py --sizes 1000,10000,100000          # medir y comparar
+    python bench.py --sizes 1000,10000 --save-baseline  # fijar la base
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(os.environ.get("ZALDIVAR_BENCH_DIR", ".cache/bench"))
+BASELINE_FILE = Path(os.environ.get("ZALDIVAR_BENCH_BASELINE", str(BENCH_DIR / "baseline.json")))
+
+# Una etapa es regresión si tarda más que base × (1 + tolerancia) y al menos NOISE_FLOOR más
+TOLERANCE = float(os.environ.get("ZALDIVAR_BENCH_TOLERANCE", "0.25"))
+NOISE_FLOOR = 0.02
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+REPEAT = 3
+ANOMALIES = 0.01
+
+# Los snapshots y manifiestos del benchmark no se mezclan con los del dashboard
+os.environ.setdefault("ZALDIVAR_CACHE_DIR", str(BENCH_DIR / "cache"))
+
+import exports  # noqa: E402
+import fleet  # noqa: E402
+import health  # noqa: E402
+import history  # noqa: E402
+import inventory  # noqa: E402
+import metrics  # noqa: E402
+import rf  # noqa: E402
+import service  # noqa: E402
+import styling  # noqa: E402
+import topology  # noqa: E402
+
+STAGES = []
+
+
+class Stage:
+    def __init__(self, name, build, max_rows=None, repeat=REPEAT):
+        self.name = name
+        self.build = build
+        self.max_rows = max_rows
+        self.repeat = repeat
+
+
+def stage(name, max_rows=None, repeat=REPEAT):
+    """Registra una etapa: la función prepara el caso y devuelve lo que se cronometra"""
+    def register(build):
+        STAGES.append(Stage(name, build, max_rows, repeat))
+        return build
+    return register
+
+
+class Fleet:
+    """Libro sintético de `n` filas en disco y su servicio de datos"""
+
+    def __init__(self, n, seed=0, root=BENCH_DIR):
+        self.n = n
+        self.dir = Path(root) / f"flota-{n}-{seed}"
+        self.path = self.dir / "inventario.xlsx"
+        self.systems_file = self.dir / "sistemas.csv"
+        if not self.path.exists() or not self.systems_file.exists():
+            self.dir.mkdir(parents=True, exist_ok=True)
+            raw, table = fleet.generate(n, seed, ANOMALIES)
+            fleet.write_workbook(raw, self.path)
+            table.to_csv(self.systems_file, index=False)
+            # Snapshot listo para que 'carga' mida la ruta habitual (sin parsear el libro)
+            target = inventory.snapshot_path(self.path, inventory.dataset_version(self.path))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            inventory.compact_schema(raw).to_parquet(target, index=False)
+        self._snapshot = None
+
+    def service(self):
+        data = service.DataService(patterns=str(self.path), systems_file=str(self.systems_file))
+        store = self.dir / "historia"
+        shutil.rmtree(store, ignore_errors=True)
+        data.history = history.HistoryStore(store)
+        return data
+
+    @property
+    def snapshot(self):
+        if self._snapshot is None:
+            self._snapshot = self.service().current()
+        return self._snapshot
+
+    @property
+    def df(self):
+        return self.snapshot.df
+
+
+# --- ETAPAS ---
+@stage('parseo', max_rows=100_000, repeat=1)
+def _parse(f):
+    return lambda: inventory.parse_workbook(f.path)
+
+
+@stage('carga')
+def _sync(f):
+    data = f.service()
+    return data.current
+
+
+@stage('filtros')
+def _filters(f):
+    snap = f.snapshot
+    cerros = snap.index.options('Cerro')
+    selections = {'Cerro': cerros[: max(1, len(cerros) // 2)], 'Rol': ['Peer']}
+
+    def run():
+        rows = snap.index.query(selections, 'rep-1')
+        return service.View(snap, ('bench', time.perf_counter()), rows, service.SingleFlight())
+    return run
+
+
+@stage('página')
+def _page(f):
+    # Como el tab 1: primera página del sistema más grande ordenada por IP; vista nueva, orden sin memoizar
+    snap = f.snapshot
+    system = max(snap.partitions['Sistema_Logico'].items(), key=lambda item: len(item[1]))[0]
+    view = service.View(snap, ('bench', time.perf_counter()), np.arange(len(snap.df)), service.SingleFlight())
+    return lambda: view.page('Sistema_Logico', system, 1, 'IP')
+
+
+@stage('salud')
+def _health(f):
+    df = f.df
+    return lambda: health.check_system_health(df)
+
+
+@stage('agregados')
+def _metrics(f):
+    df = f.df
+    return lambda: metrics.dashboard_metrics(df)
+
+
+@stage('matriz')
+def _matrix(f):
+    cube = metrics.dashboard_metrics(f.df)['cube']
+    return lambda: metrics.distribution_matrix(cube)
+
+
+@stage('styler')
+def _styler(f):
+    # Como el tab 1: tabla de un sistema hasta STYLE_MAX_ROWS filas, renderizada a HTML
+    display = inventory.to_display(f.df[['Cerro', 'Alias', 'ID', 'IP Ethernet', 'Rol']].iloc[:styling.STYLE_MAX_ROWS])
+    return lambda: styling.premium_style(display).to_html()
+
+
+@stage('csv')
+def _csv(f):
+    df = f.df
+    return lambda: exports.csv_bytes(df)
+
+
+@stage('excel', max_rows=200_000, repeat=1)
+def _excel(f):
+    df = f.df
+    summary = metrics.summary_rows(metrics.dashboard_metrics(df), datetime.now())
+    return lambda: exports.excel_bytes(df, summary)
+
+
+@stage('rf')
+def _rf(f):
+    df = f.df
+    return lambda: rf.find_conflicts(df, zones={})
+
+
+@stage('topología', repeat=1)
+def _topology(f):
+    df = f.df
+    return lambda: topology.Topology(df)
+
+
+# --- MEDICIÓN ---
+def measure(sizes, names=None, repeat=REPEAT, full=False, log=print):
+    """{'etapa@filas': segundos} con el mejor tiempo de cada etapa"""
+    results = {}
+    for n in sizes:
+        log(f"· flota de {n} filas")
+        f = Fleet(n)
+        for item in STAGES:
+            if names and item.name not in names:
+                continue
+            if not full and item.max_rows is not None and n > item.max_rows:
+                continue
+            best = float('inf')
+            try:
+                for _ in range(min(repeat, item.repeat)):
+                    run = item.build(f)
+                    start = time.perf_counter()
+                    run()
+                    best = min(best, time.perf_counter() - start)
+            except ImportError as exc:
+                # Dependencia opcional ausente en esta máquina
+                log(f"  {item.name}: omitida ({exc})")
+                continue
+            results[f"{item.name}@{n}"] = best
+    return results
+
+
+def load_baseline(path=BASELINE_FILE):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh).get('results', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'maquina': platform.platform(),
+        'results': {**load_baseline(path), **results},
+    }
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Líneas del reporte y lista de etapas que empeoraron"""
+    lines = [f"{'etapa':<12}{'filas':>10}{'s':>11}{'base':>11}{'Δ':>9}"]
+    regressions = []
+    for key, seconds in results.items():
+        name, n = key.rsplit('@', 1)
+        base = baseline.get(key)
+        if base is None:
+            delta, flag = '', ''
+        else:
+            delta = f"{(seconds / base - 1) * 100:+.0f}%" if base > 0 else ''
+            flag = ''
+            if seconds > base * (1 + tolerance) and seconds - base > NOISE_FLOOR:
+                flag = '  ⚠ REGRESIÓN'
+                regressions.append(key)
+        base_text = f"{base:.4f}" if base is not None else '—'
+        lines.append(f"{name:<12}{n:>10}{seconds:>11.4f}{base_text:>11}{delta:>9}{flag}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de etapas del dashboard")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="filas por flota, separadas por coma")
+    parser.add_argument('--stages', help=f"etapas a medir ({', '.join(s.name for s in STAGES)})")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--full', action='store_true', help="medir también etapas sobre su tope de filas")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--baseline', default=str(BASELINE_FILE))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', help="escribir también el reporte en este archivo")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    names = set(args.stages.split(',')) if args.stages else None
+    results = measure(sizes, names, args.repeat, args.full, log=lambda m: print(m, file=sys.stderr))
+
+    lines, regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        lines.append(f"línea base guardada en {args.baseline}")
+    elif regressions:
+        lines.append(f"{len(regressions)} etapas con regresión sobre {args.tolerance:.0%}")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    return 1 if regressions and not args.save_baseline else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Figuras plotly del dashboard con caché por agregados y tema.
+
+Los gráficos de distribución se construyen desde agregados pequeños (conteos
+por sistema, rol o cerro). La figura se guarda en un LRU del proceso, con la
+llave (gráfico, huella de los agregados, tema): si los datos no cambian se
+devuelve el mismo objeto, su JSON sale idéntico y Streamlit no vuelve a
+enviarlo (caché de mensajes por hash) ni el navegador a redibujarlo.
+
+Los gráficos de un punto por muestra o repetidor pasan a trazas WebGL sobre
+WEBGL_POINTS y, sobre MAX_POINTS, se reducen en el servidor conservando el
+mínimo y el máximo de cada tramo.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import profiling
+
+# Puntos desde los que se usa Scattergl y tope de puntos enviados por serie
+WEBGL_POINTS = int(os.environ.get("ZALDIVAR_WEBGL_POINTS", "1000"))
+MAX_POINTS = int(os.environ.get("ZALDIVAR_CHART_MAX_POINTS", "2000"))
+
+CACHE_SIZE = 128
+
+# Color de texto por tema (None: el de plotly)
+FONT_COLORS = {False: None, True: '#e2e8f0'}
+
+
+def base_layout(dark_mode=False, **extra):
+    """Layout común: fondo transparente y tipografía del tema"""
+    layout = dict(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Inter', size=12, color=FONT_COLORS[bool(dark_mode)]),
+    )
+    layout.update(extra)
+    return layout
+
+
+# --- CACHÉ ---
+def fingerprint(*frames):
+    """Huella del contenido (valores, índice y columnas) de DataFrames pequeños"""
+    digest = hashlib.sha1()
+    for frame in frames:
+        digest.update(repr(list(frame.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """LRU de figuras compartido por todas las sesiones"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                return self._figures[key]
+        figure = build()
+        with self._lock:
+            self._figures[key] = figure
+            while len(self._figures) > self.size:
+                self._figures.popitem(last=False)
+        return figure
+
+
+_cache = FigureCache()
+
+
+def _cached(name, dark_mode, frames, build):
+    """La figura se construye solo si cambian los agregados o el tema"""
+    with profiling.stage(f"gráfico:{name}") as timing:
+        timing.hit = True
+
+        def miss():
+            timing.hit = False
+            return build()
+        return _cache.get((name, bool(dark_mode), fingerprint(*frames)), miss)
+
+
+# --- DISTRIBUCIÓN ---
+def system_bar(system_counts, dark_mode=False):
+    def build():
+        fig = px.bar(
+            system_counts,
+            x='Sistema_Logico',
+            y='Total',
+            color='Total',
+            color_continuous_scale='Blues',
+            title="Repetidores por Sistema Lógico",
+            labels={'Sistema_Logico': '', 'Total': 'Cantidad'}
+        )
+        fig.update_layout(showlegend=False, height=400, **base_layout(dark_mode))
+        return fig
+    return _cached('system_bar', dark_mode, [system_counts], build)
+
+
+def role_stack(role_count, dark_mode=False):
+    def build():
+        fig = px.bar(
+            role_count,
+            x='Sistema_Logico',
+            y='count',
+            color='Rol',
+            title="Distribución Master vs Peer",
+            labels={'Sistema_Logico': '', 'count': 'Cantidad'},
+            color_discrete_map={'Master': '#3b82f6', 'Peer': '#94a3b8'},
+            barmode='stack'
+        )
+        fig.update_layout(height=400, **base_layout(dark_mode))
+        return fig
+    return _cached('role_stack', dark_mode, [role_count], build)
+
+
+def system_donut(system_counts, dark_mode=False):
+    def build():
+        fig = px.pie(
+            system_counts,
+            values='Total',
+            names='Sistema_Logico',
+            hole=0.6,
+            title="Proporción de Equipos por Sistema",
+            color_discrete_sequence=px.colors.sequential.Blues_r
+        )
+        fig.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
+        fig.update_layout(
+            showlegend=True,
+            height=400,
+            legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.1),
+            **base_layout(dark_mode)
+        )
+        return fig
+    return _cached('system_donut', dark_mode, [system_counts], build)
+
+
+def matrix_heatmap(matrix, dark_mode=False):
+    def build():
+        fig = px.imshow(
+            matrix['total'],
+            color_continuous_scale='Blues',
+            aspect='auto',
+            labels={'x': 'Cerro', 'y': 'Sistema', 'color': 'Equipos'}
+        )
+        fig.update_traces(
+            customdata=matrix['masters'].to_numpy(),
+            hovertemplate="%{y} · %{x}<br>Equipos: %{z}<br>Masters: %{customdata}<extra></extra>"
+        )
+        fig.update_layout(height=max(400, 28 * len(matrix['total'])), **base_layout(dark_mode))
+        return fig
+    return _cached('matrix_heatmap', dark_mode, [matrix['total'], matrix['masters']], build)
+
+
+# --- SERIES DE PUNTOS ---
+def scatter_trace(n_points):
+    """Scattergl (WebGL) para muchos puntos; Scatter (SVG) para pocos"""
+    return go.Scattergl if n_points > WEBGL_POINTS else go.Scatter
+
+
+def downsample(frame, column, max_points=MAX_POINTS):
+    """Filas de `frame` reducidas a ~max_points: mínimo y máximo de `column` por tramo.
+
+    Conserva picos y caídas (lo que importa en RSSI) en vez de promediarlos,
+    y el orden original de las filas.
+    """
+    if len(frame) <= max_points:
+        return frame
+    buckets = max(1, max_points // 2)
+    bucket = np.arange(len(frame)) * buckets // len(frame)
+    values = pd.Series(frame[column].to_numpy(dtype='float64'))
+    grouped = values.groupby(bucket)
+    keep = np.union1d(grouped.idxmin().dropna().to_numpy(dtype='int64'),
+                      grouped.idxmax().dropna().to_numpy(dtype='int64'))
+    return frame.iloc[keep]
+
+
+def rssi_series(history, title, dark_mode=False):
+    """RSSI promedio con banda mínimo–máximo de un repetidor"""
+    history = downsample(history, 'RSSI')
+    trace = scatter_trace(len(history))
+    fig = go.Figure([
+        trace(x=history['Hora'], y=history['Max'], line=dict(width=0),
+              showlegend=False, hoverinfo='skip'),
+        trace(x=history['Hora'], y=history['Min'], line=dict(width=0), fill='tonexty',
+              fillcolor='rgba(59, 130, 246, 0.15)', name='Min–Max'),
+        trace(x=history['Hora'], y=history['RSSI'], line=dict(color='#3b82f6'),
+              name='RSSI (dBm)'),
+    ])
+    fig.update_layout(title=title, height=400, **base_layout(dark_mode))
+    return fig
@@ -0,0 +1,162 @@
+"""Generación de archivos de exportación (CSV y Excel).
+
+Los archivos se generan solo cuando el usuario pulsa el botón de descarga.
+Se escriben por bloques (CSV por trozos, Excel con openpyxl en modo
+write-only) y se guardan en un LRU compartido por el proceso, indexado por
+la llave barata (versión del inventario, filtros) en vez de hashear el
+DataFrame filtrado. Del Excel se guarda el libro sin la hoja 'Resumen': esa
+hoja lleva la fecha del reporte y se agrega en cada descarga.
+"""
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from io import BytesIO, StringIO
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+import inventory
+import profiling
+
+CHUNK_ROWS = 50_000
+
+# Límite del LRU de exportes (en bytes)
+CACHE_MAX_BYTES = int(os.environ.get("ZALDIVAR_EXPORT_CACHE_MB", "64")) * 1024 * 1024
+
+
+def _chunks(dataframe, size=CHUNK_ROWS):
+    for start in range(0, len(dataframe), size):
+        yield inventory.to_display(dataframe.iloc[start:start + size])
+
+
+def csv_bytes(dataframe):
+    """CSV en UTF-8 escrito por bloques; IPs y frecuencias en formato legible"""
+    buffer = StringIO()
+    if dataframe.empty:
+        inventory.to_display(dataframe).to_csv(buffer, index=False)
+    for i, chunk in enumerate(_chunks(dataframe)):
+        chunk.to_csv(buffer, index=False, header=(i == 0))
+    return buffer.getvalue().encode('utf-8')
+
+
+def _header(sheet, columns):
+    bold = Font(bold=True)
+    cells = []
+    for name in columns:
+        cell = WriteOnlyCell(sheet, value=str(name))
+        cell.font = bold
+        cells.append(cell)
+    sheet.append(cells)
+
+
+def _rows(frame):
+    values = frame.astype(object).where(frame.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def excel_bytes(dataframe, summary_rows):
+    """Libro con hojas 'Repetidores' y 'Resumen' en modo write-only (streaming)"""
+    workbook = Workbook(write_only=True)
+
+    sheet = workbook.create_sheet('Repetidores')
+    _header(sheet, dataframe.columns)
+    for chunk in _chunks(dataframe):
+        for row in _rows(chunk):
+            sheet.append(row)
+
+    summary = pd.DataFrame(summary_rows)
+    sheet = workbook.create_sheet('Resumen')
+    _header(sheet, summary.columns)
+    for row in _rows(summary):
+        sheet.append(row)
+
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+# Marca en la hoja 'Resumen' del libro cacheado; se reemplaza por la fecha en cada descarga
+STAMP = '__FECHA_REPORTE__'
+
+
+def excel_template(dataframe, summary_rows):
+    """(libro sin la hoja 'Resumen', nombre y XML de esa hoja con STAMP en lugar de la fecha)"""
+    book = zipfile.ZipFile(BytesIO(excel_bytes(dataframe, summary_rows)))
+    stamp = STAMP.encode('utf-8')
+    entries = [(info, book.read(info.filename)) for info in book.infolist()]
+    name, sheet = next((info.filename, data) for info, data in entries if stamp in data)
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info, data in entries:
+            if info.filename != name:
+                target.writestr(info, data)
+    return output.getvalue(), name, sheet
+
+
+def stamp_excel(template, generated_at):
+    """Libro completo: agrega al libro cacheado su hoja 'Resumen' con la fecha de esta descarga"""
+    book, name, sheet = template
+    output = BytesIO(book)
+    with zipfile.ZipFile(output, 'a', zipfile.ZIP_DEFLATED) as target:
+        target.writestr(name, sheet.replace(STAMP.encode('utf-8'), escape(str(generated_at)).encode('utf-8')))
+    return output.getvalue()
+
+
+def _size(data):
+    return len(data) if isinstance(data, bytes) else sum(len(part) for part in data)
+
+
+class ExportCache:
+    """LRU de exportes acotado por tamaño total, seguro entre hilos"""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+
+        data = build()
+
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = data
+                self._size += _size(data)
+            while self._size > self.max_bytes and len(self._items) > 1:
+                _, old = self._items.popitem(last=False)
+                self._size -= _size(old)
+        return data
+
+
+_cache = ExportCache()
+
+
+def _cached(kind, key, dataframe, build):
+    # Sin build la etapa fue un acierto de caché
+    with profiling.stage(kind, rows=len(dataframe)) as timing:
+        timing.hit = True
+
+        def miss():
+            timing.hit = False
+            return build()
+        return _cache.get_or_build((kind, key), miss)
+
+
+def cached_csv(key, dataframe):
+    return _cached('csv', key, dataframe, lambda: csv_bytes(dataframe))
+
+
+def cached_excel(key, dataframe, summary_rows, generated_at):
+    """`summary_rows` lleva STAMP como fecha: se cachean los datos, la fecha es de cada descarga"""
+    template = _cached('xlsx', key, dataframe, lambda: excel_template(dataframe, summary_rows))
+    return stamp_excel(template, generated_at)
@@ -0,0 +1,173 @@
+"""Índice invertido para los filtros del sidebar.
+
+Se construye una vez por versión del inventario. Cada filtro multiselect se
+resuelve con listas de filas precalculadas por valor y la búsqueda libre con
+un índice de trigramas sobre ID, Alias e IP Ethernet; filtrar pasa a ser
+intersectar conjuntos de posiciones en lugar de recorrer el DataFrame.
+"""
+import numpy as np
+import pandas as pd
+
+import inventory
+
+FACETS = ('Sistema_Logico', 'Cerro', 'Rol', 'Fuente')
+SEARCH_COLUMNS = ('ID', 'Alias', 'IP Ethernet')
+
+# Separador entre campos: nunca aparece en un término de búsqueda
+_FIELD_SEP = '\x01'
+_CHUNK_ROWS = 65536
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _search_text(df):
+    """Texto en minúsculas por fila que concatena los campos buscables"""
+    parts = []
+    for col in SEARCH_COLUMNS:
+        if col not in df:
+            continue
+        if col in inventory.IP_COLUMNS:
+            text = inventory.ip_text(df[col])
+        else:
+            text = df[col].astype('string')
+        parts.append(text.fillna('').str.lower())
+
+    haystack = parts[0]
+    for text in parts[1:]:
+        haystack = haystack + _FIELD_SEP + text
+    return haystack.reset_index(drop=True).astype('string[pyarrow]')
+
+
+def _trigrams(data):
+    data = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    return np.unique((data[:-2] << 16) | (data[1:-1] << 8) | data[2:])
+
+
+def _build_trigram_postings(texts):
+    """Trigramas de bytes UTF-8 -> filas, en formato CSR (grams, starts, rows).
+
+    Se procesa por bloques para acotar la memoria temporal; cada llave
+    combina trigrama (32 bits altos) y fila (32 bits bajos), de modo que al
+    ordenarlas las filas de cada trigrama quedan ordenadas.
+    """
+    keys = []
+    for start in range(0, len(texts), _CHUNK_ROWS):
+        block = np.array([t.encode('utf-8') for t in texts[start:start + _CHUNK_ROWS]])
+        width = block.dtype.itemsize
+        if width < 3:
+            continue
+
+        m = block.view(np.uint8).reshape(len(block), width).astype(np.uint64)
+        grams = (m[:, :-2] << 16) | (m[:, 1:-1] << 8) | m[:, 2:]
+        rows = np.arange(start, start + len(block), dtype=np.uint64)[:, None]
+        # Los bytes 0 son relleno del ancho fijo del bloque
+        valid = m[:, 2:] != 0
+        keys.append(np.unique(((grams << 32) | rows)[valid]))
+
+    if not keys:
+        return np.empty(0, np.uint32), np.zeros(1, np.int64), _EMPTY
+
+    keys = np.concatenate(keys)
+    keys.sort()
+    grams = (keys >> 32).astype(np.uint32)
+    rows = (keys & 0xFFFFFFFF).astype(np.int32)
+    uniq, starts = np.unique(grams, return_index=True)
+    return uniq, np.append(starts, len(rows)), rows
+
+
+class FilterIndex:
+    """Listas de filas por valor de cada filtro y por trigrama de búsqueda"""
+
+    def __init__(self, df):
+        self.size = len(df)
+        self._postings = {}
+        for col in FACETS:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, labels = pd.factorize(values)
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            self._postings[col] = {
+                label: order[bounds[i]:bounds[i + 1]]
+                for i, label in enumerate(labels)
+                if bounds[i + 1] > bounds[i]
+            }
+
+        self._haystack = _search_text(df)
+        self._grams, self._starts, self._rows = _build_trigram_postings(
+            self._haystack.tolist()
+        )
+
+    def options(self, column):
+        """Valores presentes en el inventario, ordenados"""
+        return sorted(self._postings[column])
+
+    def facet_rows(self, column, selected):
+        """Filas que cumplen un filtro multiselect; None si no restringe nada.
+
+        Con todas las opciones elegidas no se filtra: las columnas de filtro no
+        tienen nulos (ver inventory.classify), así que son todas las filas,
+        las mismas que cuentan los agregados.
+        """
+        postings = self._postings[column]
+        selected = set(selected)
+        if selected >= postings.keys():
+            return None
+
+        chosen = [postings[v] for v in selected if v in postings]
+        if not chosen:
+            return _EMPTY
+        return np.sort(np.concatenate(chosen))
+
+    def _gram_rows(self, gram):
+        i = np.searchsorted(self._grams, gram)
+        if i == len(self._grams) or self._grams[i] != gram:
+            return _EMPTY
+        return self._rows[self._starts[i]:self._starts[i + 1]]
+
+    def search(self, term, candidates=None):
+        """Filas cuyo ID, Alias o IP contienen `term` (sin distinguir mayúsculas)"""
+        term = term.lower()
+        data = term.encode('utf-8')
+
+        if len(data) < 3:
+            # Término corto: no hay trigramas, se recorre el texto precalculado
+            pool = self._haystack if candidates is None else self._haystack.iloc[candidates]
+            hits = pool.str.contains(term, regex=False).to_numpy(dtype=bool)
+            rows = np.flatnonzero(hits).astype(np.int32)
+            return rows if candidates is None else candidates[rows]
+
+        lists = sorted((self._gram_rows(g) for g in _trigrams(data)), key=len)
+        if candidates is not None:
+            lists.insert(0, candidates)
+        rows = lists[0]
+        for other in lists[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+
+        # Los trigramas solo acotan candidatos: se verifica la subcadena completa
+        if len(rows):
+            hits = self._haystack.iloc[rows].str.contains(term, regex=False).to_numpy(dtype=bool)
+            rows = rows[hits]
+        return rows
+
+    def query(self, selections, term=""):
+        """Posiciones (ordenadas) que cumplen todos los filtros y la búsqueda"""
+        rows = None
+        restrictive = [
+            r for r in (self.facet_rows(col, values) for col, values in selections.items())
+            if r is not None
+        ]
+        for other in sorted(restrictive, key=len):
+            rows = other if rows is None else np.intersect1d(rows, other, assume_unique=True)
+
+        if term:
+            return self.search(term, rows)
+        return np.arange(self.size, dtype=np.int32) if rows is None else rows
+
+    def mask(self, rows):
+        out = np.zeros(self.size, dtype=bool)
+        out[rows] = True
+        return out
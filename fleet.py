@@ -0,0 +1,135 @@
+"""Generador de flotas sintéticas de repetidores (1k – 1M filas).
+
+Produce un inventario con las mismas columnas y tipos que el libro real:
+sistemas lógicos de un Master y sus Peers repartidos en cerros, IPs únicas
+por /24 con su Gateway, enlaces IP Master -> Master, frecuencias en una
+grilla de 12,5 kHz y RSSI realista. Junto con las filas entrega la tabla de
+rangos de ID -> sistema que las clasifica (mismo formato que
+config/sistemas.csv). Con `anomalies` > 0 se inyectan errores (IPs
+duplicadas, Peers huérfanos, RSSI bajo) para que las reglas de salud trabajen.
+
+    python fleet.py 100000 --xlsx flota.xlsx --systems sistemas_flota.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import inventory
+
+COLUMNS = ['Cerro', 'Canal', 'Alias', 'ID', 'IP Ethernet', 'Gateway', 'Mascara', 'Tipo Vinculo',
+           'IP Master', 'Puerto UDP', 'Nombre Canal', 'RSSI (dBm)', 'RX (MHz)', 'TX (MHz)']
+
+MASTER_LINK = 'Principal (Master)'
+PEER_LINK = 'Compañero (Peer)'
+ROWS_PER_SYSTEM = 200
+IDS_PER_SYSTEM = 1000
+IP_BASE = 10 << 24  # 10.0.0.0
+
+
+def _ip_text(values):
+    return inventory.ip_text(pd.Series(values, dtype='UInt32')).astype(object)
+
+
+def generate(n, seed=0, anomalies=0.0):
+    """(inventario crudo de `n` filas, tabla de sistemas que lo clasifica)"""
+    rng = np.random.default_rng(seed)
+    n_systems = max(1, n // ROWS_PER_SYSTEM)
+    n_sites = max(4, int(np.sqrt(n)))
+
+    # Tamaño de cada sistema: al menos el Master, el resto repartido al azar
+    sizes = np.ones(n_systems, dtype='int64')
+    sizes += np.bincount(rng.integers(0, n_systems, n - n_systems), minlength=n_systems)
+    system = np.repeat(np.arange(n_systems), sizes)
+    starts = np.cumsum(sizes) - sizes
+    position = np.arange(n) - np.repeat(starts, sizes)
+    is_master = position == 0
+
+    ids = (system + 1) * IDS_PER_SYSTEM + position
+    # Una /24 cada 250 equipos: .1 es el Gateway
+    ip = IP_BASE + (np.arange(n) // 250) * 256 + np.arange(n) % 250 + 2
+    gateway = IP_BASE + (np.arange(n) // 250) * 256 + 1
+    master_ip = ip[np.repeat(starts, sizes)]
+
+    rx_channel = rng.integers(0, 1920, n)
+    rx = 150.0 + rx_channel * 0.0125
+    tx = rx - rng.choice([2.1, 4.6, 5.0], n)
+    names = np.array([f"Sistema {k + 1:05d}" for k in range(n_systems)], dtype=object)
+
+    raw = pd.DataFrame({
+        'Cerro': np.array([f"Cerro {k + 1:04d}" for k in range(n_sites)], dtype=object)[rng.integers(0, n_sites, n)],
+        'Canal': rng.integers(1, 17, n),
+        'Alias': np.char.add(np.where(is_master, 'MST-', 'REP-'), ids.astype(str)).astype(object),
+        'ID': ids,
+        'IP Ethernet': _ip_text(ip),
+        'Gateway': _ip_text(gateway),
+        'Mascara': '255.255.255.0',
+        'Tipo Vinculo': np.where(is_master, MASTER_LINK, PEER_LINK).astype(object),
+        'IP Master': _ip_text(master_ip),
+        'Puerto UDP': 50000 + system % 100,
+        'Nombre Canal': names[system],
+        'RSSI (dBm)': np.clip(rng.normal(-85, 8, n), -120, -45).round().astype('int64'),
+        'RX (MHz)': rx.round(4),
+        'TX (MHz)': tx.round(4),
+    }, columns=COLUMNS)
+
+    if anomalies > 0:
+        _inject(raw, rng, anomalies)
+
+    table = pd.DataFrame({
+        'desde': (np.arange(n_systems) + 1) * IDS_PER_SYSTEM,
+        'hasta': (np.arange(n_systems) + 2) * IDS_PER_SYSTEM,
+        'sistema': names,
+        'icono': inventory.DEFAULT_ICON,
+    })
+    return raw, table
+
+
+def _inject(raw, rng, rate):
+    n = len(raw)
+    k = max(1, int(n * rate / 3))
+    peers = np.flatnonzero(raw['Tipo Vinculo'].to_numpy() == PEER_LINK)
+    if len(peers) < 2 * k:
+        return
+    picked = rng.choice(peers, 2 * k, replace=False)
+    raw.loc[raw.index[picked[:k]], 'IP Master'] = '172.16.0.1'
+    raw.loc[raw.index[picked[k:]], 'IP Ethernet'] = raw['IP Ethernet'].iloc[0]
+    raw.loc[raw.index[rng.choice(n, k, replace=False)], 'RSSI (dBm)'] = -118
+
+
+def write_workbook(raw, path):
+    """Libro con el mismo formato que el real (encabezado en la fila HEADER_ROW + 1)"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Repetidores')
+    for _ in range(inventory.HEADER_ROW):
+        sheet.append([])
+    sheet.append(list(raw.columns))
+    for row in raw.astype(object).itertuples(index=False, name=None):
+        sheet.append(row)
+    workbook.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventario sintético de repetidores")
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--anomalies', type=float, default=0.0, help="fracción de filas con errores")
+    parser.add_argument('--xlsx', help="escribir como libro Excel")
+    parser.add_argument('--parquet', help="escribir como Parquet (esquema compacto)")
+    parser.add_argument('--systems', help="escribir la tabla de sistemas (CSV)")
+    args = parser.parse_args()
+
+    raw, table = generate(args.rows, args.seed, args.anomalies)
+    if args.xlsx:
+        write_workbook(raw, args.xlsx)
+    if args.parquet:
+        inventory.compact_schema(raw.copy()).to_parquet(args.parquet, index=False)
+    if args.systems:
+        table.to_csv(args.systems, index=False)
+    print(f"{len(raw)} filas, {len(table)} sistemas, {raw['Cerro'].nunique()} cerros")
+
+
+if __name__ == '__main__':
+    main()
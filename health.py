@@ -0,0 +1,217 @@
+"""Motor de reglas de salud de la configuración.
+
+Cada regla es una función vectorizada que recibe un HealthContext y
+devuelve una lista de (severidad, mensaje). El contexto calcula una sola vez
+las columnas que comparten las reglas (máscara de Masters, IPs como enteros),
+de modo que todas las reglas trabajan sobre la misma pasada de los datos.
+Para agregar una regla basta decorarla con @rule.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import inventory
+import rf
+
+# Umbral de RSSI bajo el cual se alerta (dBm)
+RSSI_MIN_DBM = float(os.environ.get("ZALDIVAR_RSSI_MIN", "-110"))
+
+# IDs que se listan como ejemplo en cada alerta
+MAX_IDS_IN_MESSAGE = 6
+
+RULES = []
+
+
+def rule(func):
+    """Registra una regla en el motor"""
+    RULES.append(func)
+    return func
+
+
+def _ids(values):
+    values = sorted(set(int(v) for v in values))
+    shown = ", ".join(str(v) for v in values[:MAX_IDS_IN_MESSAGE])
+    if len(values) > MAX_IDS_IN_MESSAGE:
+        shown += f" … (+{len(values) - MAX_IDS_IN_MESSAGE})"
+    return shown
+
+
+class HealthContext:
+    """Columnas derivadas compartidas por todas las reglas"""
+
+    def __init__(self, dataframe):
+        self.df = dataframe
+        self.is_master = (dataframe['Rol'] == 'Master').to_numpy()
+        self._ips = {}
+
+    def ip(self, column):
+        """IPs de `column` como int64 (-1 si falta); None si no son IPv4 válidas"""
+        if column not in self._ips:
+            values = self.df[column]
+            packed = values if values.dtype == 'UInt32' else inventory.pack_ips(values)
+            self._ips[column] = (
+                None if packed is None else packed.astype('Int64').fillna(-1).to_numpy(dtype='int64')
+            )
+        return self._ips[column]
+
+
+# --- REGLAS ---
+@rule
+def master_count(ctx):
+    counts = pd.Series(ctx.is_master, index=ctx.df.index).groupby(
+        ctx.df['Sistema_Logico'], observed=True, sort=False
+    ).sum()
+
+    issues = []
+    for system, masters in counts.items():
+        if masters == 0:
+            issues.append(('error', f"⚠️ **{system}** no tiene Master asignado"))
+        elif masters > 1:
+            issues.append(('warning', f"⚡ **{system}** tiene múltiples Masters ({masters})"))
+    return issues
+
+
+@rule
+def duplicate_ips(ctx):
+    duplicated = ctx.df.duplicated(subset=['IP Ethernet'], keep=False)
+    if duplicated.any():
+        return [('error', f"🔴 Detectadas {int(duplicated.sum())} IPs duplicadas")]
+    return []
+
+
+@rule
+def master_ip_targets(ctx):
+    """Cada Peer debe apuntar con IP Master a la IP Ethernet de un Master"""
+    ip_eth, ip_master = ctx.ip('IP Ethernet'), ctx.ip('IP Master')
+    if ip_eth is None or ip_master is None:
+        return []
+
+    peers = ~ctx.is_master & (ip_master >= 0)
+    orphan = peers & ~np.isin(ip_master, ip_eth[ctx.is_master])
+    if not orphan.any():
+        return []
+
+    # Distinguir IPs que existen (pero son Peers) de IPs desconocidas
+    to_peer = orphan & np.isin(ip_master, ip_eth)
+    ids = ctx.df['ID'].to_numpy()
+    issues = []
+    if to_peer.any():
+        issues.append(('error', f"🔗 {int(to_peer.sum())} Peers apuntan a un equipo que no es Master "
+                                f"(ID {_ids(ids[to_peer])})"))
+    unknown = orphan & ~to_peer
+    if unknown.any():
+        issues.append(('warning', f"❓ {int(unknown.sum())} Peers apuntan a una IP Master inexistente "
+                                  f"(ID {_ids(ids[unknown])})"))
+    return issues
+
+
+@rule
+def udp_endpoint_collisions(ctx):
+    """Un mismo endpoint (IP Master, Puerto UDP) compartido por varios sistemas"""
+    df = ctx.df
+    if 'Puerto UDP' not in df:
+        return []
+
+    systems = df.groupby(['IP Master', 'Puerto UDP'], observed=True)['Sistema_Logico'].nunique()
+    clashes = systems[systems > 1]
+    if clashes.empty:
+        return []
+
+    endpoints = ", ".join(
+        f"{ip}:{port}" for ip, port in inventory.to_display(
+            clashes.reset_index()[['IP Master', 'Puerto UDP']]
+        ).itertuples(index=False)
+    )
+    return [('error', f"🔌 Colisión de Puerto UDP: {len(clashes)} endpoints Master compartidos "
+                      f"entre sistemas ({endpoints})")]
+
+
+@rule
+def frequency_conflicts(ctx):
+    """Pares de repetidores con frecuencias dentro de la banda de guarda (ver rf.py)"""
+    conflicts = rf.find_conflicts(ctx.df)
+    if conflicts.empty:
+        return []
+
+    issues = []
+    severe = (rf.DUPLICATE, rf.INVERSION, rf.TX_RX)
+    for kind, group in conflicts.groupby('Tipo', observed=True, sort=True):
+        pairs = [f"{a}↔{b}" for a, b in zip(group['ID A'], group['ID B'])]
+        shown = ", ".join(pairs[:MAX_IDS_IN_MESSAGE])
+        if len(pairs) > MAX_IDS_IN_MESSAGE:
+            shown += f" … (+{len(pairs) - MAX_IDS_IN_MESSAGE})"
+        issues.append(('error' if kind in severe else 'warning',
+                       f"📶 {len(pairs)} pares {kind} a ≤ {rf.GUARD_BAND_KHZ:g} kHz en la misma zona "
+                       f"(ID {shown})"))
+    return issues
+
+
+@rule
+def gateway_mask_consistency(ctx):
+    """El Gateway debe estar en la subred de la IP; un Gateway, una sola máscara"""
+    ip_eth, gateway, mask = ctx.ip('IP Ethernet'), ctx.ip('Gateway'), ctx.ip('Mascara')
+    if ip_eth is None or gateway is None or mask is None:
+        return []
+
+    issues = []
+    known = (ip_eth >= 0) & (gateway >= 0) & (mask >= 0)
+    outside = known & ((ip_eth & mask) != (gateway & mask))
+    if outside.any():
+        issues.append(('error', f"🌐 {int(outside.sum())} equipos con Gateway fuera de su subred "
+                                f"(ID {_ids(ctx.df['ID'].to_numpy()[outside])})"))
+
+    masks_per_gateway = pd.Series(mask[known]).groupby(gateway[known]).nunique()
+    if (masks_per_gateway > 1).any():
+        issues.append(('warning', f"🌐 {int((masks_per_gateway > 1).sum())} Gateways con máscaras "
+                                  f"distintas entre sus equipos"))
+    return issues
+
+
+@rule
+def cross_source_conflicts(ctx):
+    """IDs o IPs Ethernet repetidos entre libros (fuentes) distintos"""
+    df = ctx.df
+    if 'Fuente' not in df or df['Fuente'].nunique() < 2:
+        return []
+
+    issues = []
+    ids = df.groupby('ID', observed=True)['Fuente'].nunique()
+    shared_ids = ids.index[ids > 1]
+    if len(shared_ids):
+        issues.append(('error', f"📁 {len(shared_ids)} IDs repetidos entre fuentes "
+                                f"(ID {_ids(shared_ids)})"))
+
+    ips = df.groupby('IP Ethernet', observed=True)['Fuente'].nunique()
+    shared_ips = inventory.ip_text(pd.Series(ips.index[ips > 1])).dropna()
+    if len(shared_ips):
+        shown = ", ".join(shared_ips.iloc[:MAX_IDS_IN_MESSAGE])
+        if len(shared_ips) > MAX_IDS_IN_MESSAGE:
+            shown += f" … (+{len(shared_ips) - MAX_IDS_IN_MESSAGE})"
+        issues.append(('error', f"📁 {len(shared_ips)} IPs Ethernet repetidas entre fuentes ({shown})"))
+    return issues
+
+
+@rule
+def low_rssi(ctx):
+    df = ctx.df
+    if 'RSSI (dBm)' not in df:
+        return []
+
+    low = (pd.to_numeric(df['RSSI (dBm)'], errors='coerce') < RSSI_MIN_DBM).to_numpy()
+    if not low.any():
+        return []
+    return [('warning', f"📉 {int(low.sum())} repetidores con RSSI bajo {RSSI_MIN_DBM:g} dBm "
+                        f"(ID {_ids(df['ID'].to_numpy()[low])})")]
+
+
+def check_system_health(dataframe, rules=None):
+    """Detecta anomalías en la configuración"""
+    if dataframe.empty:
+        return []
+
+    ctx = HealthContext(dataframe)
+    issues = []
+    for check in (RULES if rules is None else rules):
+        issues.extend(check(ctx))
+    return issues
@@ -0,0 +1,212 @@
+"""Historial de versiones del inventario (solo se agrega, nunca se reescribe).
+
+Cada versión cargada se guarda como:
+
+- un manifiesto `versiones/<secuencia>-<fecha>-<versión>.parquet` con
+  (llave de fila, hash de contenido, bloque) de cada fila;
+- un bloque `filas/<secuencia>-<fecha>-<versión>.parquet` solo con las filas
+  cuyo hash no estaba ya en el historial. Una fila sin cambios no vuelve a
+  escribirse.
+
+La línea de tiempo se ordena por la secuencia (dos versiones en el mismo
+instante no se ordenan por su hash); los manifiestos anteriores a ella,
+`<fecha>-<versión>`, se leen igual y van primero.
+
+Volver a una versión ya guardada agrega otra entrada a la línea de tiempo
+(copia de su manifiesto, sin filas nuevas); recargar la versión más reciente
+no agrega nada.
+
+Comparar dos versiones usa solo los manifiestos (llaves y hashes, ver
+inventory.diff_inventories); el contenido se lee únicamente para las filas
+modificadas, para detallar qué campo cambió.
+"""
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+import inventory
+
+HISTORY_DIR = Path(os.environ.get("ZALDIVAR_HISTORY_DIR", str(inventory.CACHE_DIR / "historia")))
+
+# Columnas calculadas al clasificar: no se guardan, se derivan al leer
+DERIVED_COLUMNS = ['Sistema_Logico', 'Rol']
+_HASH = '_hash'
+
+# Tipo de cambio según la columna modificada
+CHANGE_KINDS = {'Tipo Vinculo': 'Rol', 'IP Ethernet': 'IP', 'IP Master': 'IP',
+                'Gateway': 'IP', 'Mascara': 'IP'}
+ADDED, REMOVED, OTHER = 'Añadido', 'Eliminado', 'Otro'
+
+# Fecha en los nombres (UTC, con microsegundos); sin microsegundos en los anteriores a la secuencia
+STAMP_FORMAT = '%Y%m%dT%H%M%S%fZ'
+LEGACY_STAMP_FORMAT = '%Y%m%dT%H%M%SZ'
+
+
+def _parse_name(stem):
+    """(secuencia o None, fecha, versión) del nombre de un manifiesto"""
+    head, rest = stem.split('-', 1)
+    if head.isdigit():
+        stamp, version = rest.split('-', 1)
+        return int(head), datetime.strptime(stamp, STAMP_FORMAT).replace(tzinfo=timezone.utc), version
+    return None, datetime.strptime(head, LEGACY_STAMP_FORMAT).replace(tzinfo=timezone.utc), rest
+
+
+def _write(frame, target):
+    tmp = target.with_suffix(".parquet.tmp")
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+
+
+class HistoryStore:
+    """Manifiestos por versión y bloques de filas deduplicados por hash"""
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = Path(root)
+        self.versions_dir = self.root / "versiones"
+        self.rows_dir = self.root / "filas"
+        self._lock = threading.Lock()
+        self._blocks = None
+        self._diffs = {}
+
+    # --- ESCRITURA ---
+    def _block_index(self):
+        """hash -> bloque donde está guardada la fila (se arma una vez por proceso)"""
+        if self._blocks is None:
+            parts = [
+                pd.Series(path.stem, index=pd.read_parquet(path, columns=[_HASH])[_HASH].to_numpy())
+                for path in sorted(self.rows_dir.glob("*.parquet"))
+            ]
+            blocks = pd.concat(parts) if parts else pd.Series(dtype=object)
+            self._blocks = blocks[~blocks.index.duplicated()]
+        return self._blocks
+
+    def _entries(self):
+        """[(secuencia, fecha, versión, ruta)] de la línea de tiempo, de la más antigua a la más reciente"""
+        entries = [(*_parse_name(path.stem), path) for path in self.versions_dir.glob("*.parquet")]
+        return sorted(entries, key=lambda e: (e[0] is not None, e[0] or 0, e[1], e[3].name))
+
+    def _manifest_path(self, version):
+        return next((path for _, _, v, path in self._entries() if v == version), None)
+
+    def _latest_version(self):
+        entries = self._entries()
+        return entries[-1][2] if entries else None
+
+    def _next_name(self, version):
+        entries = self._entries()
+        sequence = (entries[-1][0] or 0) + 1 if entries else 1
+        return f"{sequence:08d}-{datetime.now(timezone.utc).strftime(STAMP_FORMAT)}-{version}"
+
+    def record(self, version, df, hashes):
+        """Agrega `version` a la línea de tiempo si no es la última; solo escribe filas nuevas"""
+        with self._lock:
+            existing = self._manifest_path(version)
+            if existing is not None:
+                if self._latest_version() == version:
+                    return False
+                # Vuelta a una versión ya guardada (A→B→A): nueva entrada con el mismo manifiesto
+                name = self._next_name(version)
+                tmp = self.versions_dir / f"{name}.parquet.tmp"
+                shutil.copyfile(existing, tmp)
+                os.replace(tmp, self.versions_dir / f"{name}.parquet")
+                return True
+            self.versions_dir.mkdir(parents=True, exist_ok=True)
+            self.rows_dir.mkdir(parents=True, exist_ok=True)
+
+            name = self._next_name(version)
+            known = self._block_index()
+            values = hashes.to_numpy()
+            fresh = ~pd.Index(values).isin(known.index)
+
+            if fresh.any():
+                rows = df.drop(columns=DERIVED_COLUMNS, errors='ignore').loc[hashes.index[fresh]]
+                rows = rows.assign(**{_HASH: values[fresh]}).drop_duplicates(_HASH)
+                _write(rows.reset_index(drop=True), self.rows_dir / f"{name}.parquet")
+                added = pd.Series(name, index=rows[_HASH].to_numpy())
+                self._blocks = pd.concat([known, added]) if len(known) else added
+
+            manifest = pd.DataFrame({
+                'row_key': hashes.index.to_numpy(dtype='int64'),
+                _HASH: values,
+                'bloque': pd.Categorical(self._blocks.reindex(values).to_numpy()),
+            })
+            _write(manifest, self.versions_dir / f"{name}.parquet")
+            self._diffs.clear()
+            return True
+
+    # --- LECTURA ---
+    def versions(self):
+        """Versiones guardadas, de la más antigua a la más reciente"""
+        rows = [{'version': version, 'fecha': stamp} for _, stamp, version, _ in self._entries()]
+        return pd.DataFrame(rows, columns=['version', 'fecha'])
+
+    def manifest(self, version):
+        path = self._manifest_path(version)
+        if path is None:
+            raise KeyError(version)
+        return pd.read_parquet(path).set_index('row_key')
+
+    def hashes(self, version):
+        return self.manifest(version)[_HASH]
+
+    def rows(self, version, keys=None):
+        """Contenido de una versión (o de las llaves `keys`), indexado por llave de fila"""
+        manifest = self.manifest(version)
+        if keys is not None:
+            manifest = manifest.loc[manifest.index.intersection(keys)]
+
+        parts = []
+        for block, group in manifest.groupby('bloque', observed=True):
+            stored = pd.read_parquet(self.rows_dir / f"{block}.parquet")
+            stored = stored.drop_duplicates(_HASH).set_index(_HASH)
+            parts.append(stored.loc[group[_HASH].to_numpy()].set_axis(group.index))
+        if not parts:
+            return pd.DataFrame(index=pd.Index([], name='row_key'))
+
+        frame = pd.concat(parts).loc[manifest.index]
+        return inventory.compact_schema(frame)
+
+    def diff(self, old_version, new_version):
+        """Cambios de `old_version` a `new_version`: una fila por repetidor y campo"""
+        key = (old_version, new_version)
+        if key not in self._diffs:
+            self._diffs[key] = self._diff(old_version, new_version)
+        return self._diffs[key]
+
+    def _diff(self, old_version, new_version):
+        diff = inventory.diff_inventories(self.hashes(old_version), self.hashes(new_version))
+        columns = ['Cambio', 'ID', 'Alias', 'Campo', 'Antes', 'Después']
+        parts = []
+
+        for keys, version, kind in ((diff.added, new_version, ADDED), (diff.removed, old_version, REMOVED)):
+            if len(keys):
+                rows = self.rows(version, keys)
+                parts.append(pd.DataFrame({'Cambio': kind, 'ID': rows['ID'].to_numpy(),
+                                           'Alias': rows['Alias'].astype(str).to_numpy()}))
+
+        if len(diff.modified):
+            # Cada manifiesto trae sus filas en su propio orden: se alinean por llave
+            before = inventory.to_display(self.rows(old_version, diff.modified).loc[diff.modified])
+            after = inventory.to_display(self.rows(new_version, diff.modified).loc[diff.modified])
+            for col in before.columns.intersection(after.columns):
+                old_text = before[col].astype(str).where(before[col].notna(), '')
+                new_text = after[col].astype(str).where(after[col].notna(), '')
+                changed = (old_text != new_text).to_numpy()
+                if changed.any():
+                    parts.append(pd.DataFrame({
+                        'Cambio': CHANGE_KINDS.get(col, OTHER),
+                        'ID': after['ID'].to_numpy()[changed],
+                        'Alias': after['Alias'].astype(str).to_numpy()[changed],
+                        'Campo': col,
+                        'Antes': old_text.to_numpy()[changed],
+                        'Después': new_text.to_numpy()[changed],
+                    }))
+
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts, ignore_index=True).reindex(columns=columns).sort_values(
+            ['Cambio', 'ID'], ignore_index=True)
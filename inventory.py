@@ -0,0 +1,373 @@
+"""Carga del inventario de repetidores.
+
+El libro Excel se parsea con openpyxl una sola vez por versión del archivo y
+el resultado se guarda como snapshot columnar (Parquet). Mientras el libro no
+cambie, las cargas leen directamente las columnas ya tipadas del snapshot.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SOURCE_FILE = "Sistema_Radio_Completo.xlsx"
+HEADER_ROW = 3
+
+# Tabla de rangos de ID -> sistema lógico (editable sin tocar código)
+SYSTEMS_FILE = "config/sistemas.csv"
+DEFAULT_SYSTEM = "Otros"
+DEFAULT_ICON = "⚙️"
+ROLES = ['Master', 'Peer']
+# Cerro vacío en el libro: categoría propia, para que filtros, tablas y agregados lo cuenten igual
+MISSING_SITE = "Sin cerro"
+
+# Directorio de snapshots; se puede mover con ZALDIVAR_CACHE_DIR
+CACHE_DIR = Path(os.environ.get("ZALDIVAR_CACHE_DIR", ".cache/inventario"))
+
+# Subir este número cuando cambie la forma en que se construye el snapshot
+SNAPSHOT_SCHEMA = 2
+
+# Esquema compacto del inventario
+CATEGORY_COLUMNS = ['Cerro', 'Tipo Vinculo', 'Gateway', 'Mascara', 'Nombre Canal']
+IP_COLUMNS = ['IP Ethernet', 'IP Master']
+FREQUENCY_COLUMNS = ['RX (MHz)', 'TX (MHz)']
+
+_MANIFEST = "manifest.json"
+
+
+# --- HUELLA DEL ARCHIVO ---
+def _read_manifest():
+    try:
+        with open(CACHE_DIR / _MANIFEST, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest):
+    tmp = CACHE_DIR / f"{_MANIFEST}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, CACHE_DIR / _MANIFEST)
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_versions(paths):
+    """Tokens de varios libros leyendo y escribiendo el manifiesto una sola vez.
+
+    El hash SHA-256 de cada libro se recalcula únicamente si cambian mtime o
+    tamaño; en otro caso se reutiliza el registrado en el manifiesto.
+    """
+    manifest = _read_manifest()
+    dirty = False
+    versions = []
+
+    for path in paths:
+        path = Path(path)
+        stat = path.stat()
+        key = str(path.resolve())
+        entry = manifest.get(key)
+
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            sha = entry["sha256"]
+        else:
+            sha = _hash_file(path)
+            manifest[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha}
+            dirty = True
+        versions.append(f"{SNAPSHOT_SCHEMA}-{sha[:16]}")
+
+    if dirty:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _write_manifest(manifest)
+        except OSError:
+            pass
+    return versions
+
+
+def dataset_version(path=SOURCE_FILE):
+    """Devuelve un token que cambia solo cuando cambia el contenido del libro"""
+    return dataset_versions([path])[0]
+
+
+# --- PARSEO DEL LIBRO ---
+def parse_workbook(path=SOURCE_FILE):
+    """Lee el libro con openpyxl y normaliza los tipos de columna"""
+    df = pd.read_excel(path, header=HEADER_ROW)
+    df = df.dropna(subset=['ID'])
+    df['ID'] = pd.to_numeric(df['ID'], errors='coerce').fillna(0).astype('int32')
+
+    # Columnas vacías sin encabezado (márgenes del libro)
+    empty = [c for c in df.columns if str(c).startswith('Unnamed') and df[c].isna().all()]
+    df = df.drop(columns=empty)
+
+    # Parquet exige columnas homogéneas: celdas mixtas se guardan como texto
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return compact_schema(df.reset_index(drop=True))
+
+
+# --- ESQUEMA COMPACTO ---
+_IP_PATTERN = r'^\s*(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})\s*$'
+
+
+def pack_ips(series):
+    """Convierte IPs 'a.b.c.d' a enteros de 32 bits (UInt32).
+
+    Devuelve None si alguna celda no vacía no es una IPv4 válida, para no
+    perder datos: en ese caso la columna se conserva como texto.
+    """
+    octets = series.astype('string').str.extract(_IP_PATTERN).astype('Int64')
+    invalid = (octets.isna().any(axis=1) & series.notna()) | (octets > 255).any(axis=1)
+    if invalid.any():
+        return None
+
+    packed = octets[0] * 2**24 + octets[1] * 2**16 + octets[2] * 2**8 + octets[3]
+    return packed.astype('UInt32')
+
+
+def ip_text(series):
+    """Vista 'a.b.c.d' de una columna de IPs empaquetadas (o texto tal cual)"""
+    if series.dtype != 'UInt32':
+        return series.astype('string')
+
+    values = series.to_numpy(dtype='int64', na_value=0)
+    text = pd.Series((values >> 24) & 255, index=series.index).astype(str)
+    for shift in (16, 8, 0):
+        text = text + '.' + pd.Series((values >> shift) & 255, index=series.index).astype(str)
+    return text.astype('string').mask(series.isna())
+
+
+def compact_schema(df):
+    """Categóricos para columnas repetitivas, IPs de 32 bits y frecuencias float32"""
+    for col in CATEGORY_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('category')
+
+    for col in IP_COLUMNS:
+        if col in df and df[col].dtype != 'UInt32':
+            packed = pack_ips(df[col])
+            df[col] = packed if packed is not None else df[col].astype('category')
+
+    for col in FREQUENCY_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+
+    for col in df.columns[df.dtypes == 'int64']:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    return df
+
+
+def to_display(df):
+    """Copia con IPs en texto y frecuencias en float64, para tablas y exportes"""
+    out = df.copy()
+    for col in IP_COLUMNS:
+        if col in out:
+            out[col] = ip_text(out[col])
+    for col in FREQUENCY_COLUMNS:
+        if col in out:
+            out[col] = out[col].astype('float64').round(4)
+    return out
+
+
+def memory_report(df):
+    """Memoria por columna del inventario (incluye el contenido de los objetos)"""
+    usage = df.memory_usage(deep=True)
+    return pd.DataFrame({
+        'Columna': usage.index,
+        'Tipo': ['índice' if col == 'Index' else str(df[col].dtype) for col in usage.index],
+        'KB': (usage.to_numpy() / 1024).round(1),
+    })
+
+
+# --- CLASIFICACIÓN DE SISTEMAS ---
+def load_system_table(path=SYSTEMS_FILE):
+    """Lee la tabla de rangos [desde, hasta) y valida que no se solapen"""
+    table = pd.read_csv(path, dtype={'desde': 'int64', 'hasta': 'int64', 'sistema': str, 'icono': str})
+    table = table.sort_values('desde', ignore_index=True)
+
+    if (table['hasta'] <= table['desde']).any():
+        raise ValueError(f"{path}: hay rangos con 'hasta' menor o igual a 'desde'")
+    if (table['desde'].iloc[1:].to_numpy() < table['hasta'].iloc[:-1].to_numpy()).any():
+        raise ValueError(f"{path}: hay rangos de ID solapados")
+
+    return table
+
+
+def system_icons(table):
+    icons = dict(zip(table['sistema'], table['icono'].fillna(DEFAULT_ICON)))
+    icons.setdefault(DEFAULT_SYSTEM, DEFAULT_ICON)
+    return icons
+
+
+def classify(df, table):
+    """Agrega Sistema_Logico y Rol como categóricos, sin recorrer filas en Python.
+
+    Cada ID se ubica con una búsqueda binaria sobre los inicios de rango; los
+    IDs que caen en un hueco de la tabla quedan como DEFAULT_SYSTEM. Un Cerro
+    vacío pasa a MISSING_SITE: ninguna columna de filtro queda con nulos.
+    """
+    ids = df['ID'].to_numpy()
+    starts = table['desde'].to_numpy()
+    ends = table['hasta'].to_numpy()
+
+    pos = np.searchsorted(starts, ids, side='right') - 1
+    inside = (pos >= 0) & (ids < ends[pos.clip(0)])
+    codes = np.where(inside, pos, len(table))
+
+    categories = list(dict.fromkeys([*table['sistema'], DEFAULT_SYSTEM]))
+    names = np.array([*table['sistema'], DEFAULT_SYSTEM], dtype=object)
+    df['Sistema_Logico'] = pd.Categorical(names[codes], categories=categories)
+
+    is_master = df['Tipo Vinculo'].astype(str).str.contains('Master', regex=False).to_numpy()
+    df['Rol'] = pd.Categorical.from_codes(np.where(is_master, 0, 1), categories=ROLES)
+
+    if df['Cerro'].isna().any():
+        cerro = df['Cerro'].astype('category')
+        if MISSING_SITE not in cerro.cat.categories:
+            cerro = cerro.cat.add_categories([MISSING_SITE])
+        df['Cerro'] = cerro.fillna(MISSING_SITE)
+    return df
+
+
+# --- SNAPSHOT COLUMNAR ---
+def _path_tag(path):
+    # Libros homónimos en carpetas distintas no comparten snapshots
+    resolved = str(Path(path).resolve()).encode("utf-8")
+    return f"{Path(path).stem}-{hashlib.sha256(resolved).hexdigest()[:8]}"
+
+
+def snapshot_path(path, version):
+    return CACHE_DIR / f"{_path_tag(path)}-{version}.parquet"
+
+
+def _prune_snapshots(path, keep):
+    for old in CACHE_DIR.glob(f"{_path_tag(path)}-*.parquet"):
+        if old != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def load_inventory(path=SOURCE_FILE, version=None):
+    """Carga el inventario desde el snapshot Parquet o, si no existe, desde el Excel.
+
+    Tras un parseo completo se escribe el snapshot de forma atómica y se
+    eliminan los snapshots de versiones anteriores del mismo libro.
+    """
+    version = version or dataset_version(path)
+    target = snapshot_path(path, version)
+
+    if target.exists():
+        try:
+            return pd.read_parquet(target)
+        except Exception:
+            # Snapshot corrupto o incompatible: se reconstruye
+            pass
+
+    df = parse_workbook(path)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+        _prune_snapshots(path, keep=target)
+    except Exception:
+        # Sin pyarrow o sin permisos de escritura se trabaja sin snapshot
+        pass
+
+    return df
+
+
+# --- RECARGA INCREMENTAL ---
+def row_keys(df):
+    """Llave estable por fila: ID desplazado 16 bits + número de ocurrencia.
+
+    El número de ocurrencia distingue IDs repetidos sin dejar de ser un
+    entero compacto que sobrevive entre versiones del inventario.
+    """
+    occurrence = df.groupby('ID', sort=False).cumcount().to_numpy(dtype='int64')
+    return pd.Index((df['ID'].to_numpy(dtype='int64') << 16) + occurrence, name='row_key')
+
+
+def row_hashes(df):
+    """Hash de contenido por fila, indexado por llave de fila"""
+    hashes = pd.util.hash_pandas_object(df, index=False)
+    return pd.Series(hashes.to_numpy(), index=row_keys(df))
+
+
+class InventoryDiff:
+    """Filas añadidas, eliminadas y modificadas entre dos versiones"""
+
+    def __init__(self, added, removed, modified):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+
+    @property
+    def changed(self):
+        return len(self.added) + len(self.removed) + len(self.modified)
+
+    def summary(self):
+        return (f"{self.changed} filas cambiaron "
+                f"({len(self.added)} añadidas, {len(self.removed)} eliminadas, "
+                f"{len(self.modified)} modificadas)")
+
+
+def diff_inventories(old_hashes, new_hashes):
+    """Compara los hashes por fila de dos versiones usando la llave de fila"""
+    old_keys = old_hashes.index
+    new_keys = new_hashes.index
+
+    common = old_keys.intersection(new_keys)
+    modified = common[old_hashes.loc[common].to_numpy() != new_hashes.loc[common].to_numpy()]
+
+    return InventoryDiff(
+        added=new_keys.difference(old_keys),
+        removed=old_keys.difference(new_keys),
+        modified=modified,
+    )
+
+
+def patch_inventory(old, new, diff, derive):
+    """Construye la nueva versión reutilizando las filas sin cambios de `old`.
+
+    `old` debe estar indexado por llave de fila y ya contener las columnas
+    derivadas; `derive` solo se aplica a las filas añadidas o modificadas.
+    """
+    new = new.set_axis(row_keys(new))
+    touched = diff.added.append(diff.modified)
+
+    fresh = derive(new.loc[new.index.isin(touched)].copy())
+    kept = old.loc[new.index[~new.index.isin(touched)]]
+
+    # Categóricos con categorías distintas se convertirían a object al concatenar
+    unified = {}
+    for col in fresh.columns:
+        a, b = kept[col].dtype, fresh[col].dtype
+        if isinstance(a, pd.CategoricalDtype) and isinstance(b, pd.CategoricalDtype) and a != b:
+            unified[col] = pd.CategoricalDtype(a.categories.union(b.categories, sort=False))
+    if unified:
+        kept, fresh = kept.astype(unified), fresh.astype(unified)
+
+    return pd.concat([kept, fresh]).loc[new.index]
+
+
+def affected_values(old, new, diff, column):
+    """Valores de `column` (sistemas, cerros...) tocados por el diff"""
+    values = set(old.loc[old.index.intersection(diff.removed.append(diff.modified)), column])
+    values |= set(new.loc[new.index.intersection(diff.added.append(diff.modified)), column])
+    return values
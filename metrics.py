@@ -0,0 +1,103 @@
+"""Agregados del dashboard calculados en una sola pasada.
+
+Un único groupby por (Sistema_Logico, Cerro, Rol) produce el "cubo" de
+conteos; KPIs, tarjetas, gráficos, resumen por sitio y hoja de resumen del
+Excel se derivan de ese cubo, que tiene a lo más sistemas × sitios × 2 filas.
+"""
+import pandas as pd
+
+CUBE_LEVELS = ['Sistema_Logico', 'Cerro', 'Rol']
+
+
+def _as_text_frame(series, name):
+    """Serie agregada -> DataFrame ordenado alfabéticamente con etiquetas de texto"""
+    frame = series.reset_index(name=name)
+    for col in frame.columns[:-1]:
+        frame[col] = frame[col].astype(str)
+    return frame.sort_values(list(frame.columns[:-1]), ignore_index=True)
+
+
+def cube_counts(dataframe):
+    """Conteos por (Sistema_Logico, Cerro, Rol), solo combinaciones presentes"""
+    cube = dataframe.groupby(CUBE_LEVELS, observed=True).size()
+    return cube[cube > 0]
+
+
+def dashboard_metrics(dataframe):
+    """Todos los agregados que consume el dashboard para un DataFrame filtrado"""
+    return summary_from_cube(cube_counts(dataframe))
+
+
+def summary_from_cube(cube):
+    """Agregados del dashboard a partir del cubo de conteos"""
+    by_role = cube.groupby(level='Rol', observed=True).sum()
+    by_system = cube.groupby(level='Sistema_Logico', observed=True).sum()
+    by_site = cube.groupby(level='Cerro', observed=True).sum()
+    site_masters = (
+        cube.xs('Master', level='Rol').groupby(level='Cerro', observed=True).sum()
+        if 'Master' in by_role.index else pd.Series(dtype='int64')
+    )
+
+    total = int(cube.sum())
+    masters = int(by_role.get('Master', 0))
+    peers = int(by_role.get('Peer', 0))
+
+    return {
+        'total': total,
+        'masters': masters,
+        'peers': peers,
+        'systems': len(by_system),
+        'sites': len(by_site),
+        'master_pct': masters / total * 100 if total else 0.0,
+        'ratio_master_peer': masters / peers if peers > 0 else 0,
+        'avg_per_site': total / len(by_site) if len(by_site) > 0 else 0,
+        'system_counts': _as_text_frame(by_system, 'Total'),
+        'role_count': _as_text_frame(
+            cube.groupby(level=['Sistema_Logico', 'Rol'], observed=True).sum(), 'count'
+        ),
+        'site_counts': {str(k): int(v) for k, v in by_site.items()},
+        'site_masters': {str(k): int(v) for k, v in site_masters.items()},
+        'cube': cube,
+    }
+
+
+def distribution_matrix(cube):
+    """Matrices Sistema × Cerro de equipos totales, Masters y Peers.
+
+    Se construyen desde el cubo ya agregado con un pivot de suma, sin
+    funciones de agregación en Python por celda.
+    """
+    flat = cube.rename('n').reset_index()
+    for col in CUBE_LEVELS:
+        flat[col] = flat[col].astype(str)
+
+    def _pivot(frame):
+        return frame.pivot_table(index='Sistema_Logico', columns='Cerro', values='n',
+                                 aggfunc='sum', fill_value=0)
+
+    total = _pivot(flat).sort_index().sort_index(axis=1)
+    masters = _pivot(flat[flat['Rol'] == 'Master']).reindex_like(total).fillna(0).astype('int64')
+    total.columns.name = masters.columns.name = None
+    return {'total': total, 'masters': masters, 'peers': total - masters}
+
+
+def summary_rows(summary, generated_at):
+    """Filas de la hoja 'Resumen' del reporte Excel"""
+    return {
+        'Métrica': [
+            'Total Repetidores',
+            'Total Masters',
+            'Total Peers',
+            'Sistemas Lógicos',
+            'Sitios Físicos',
+            'Fecha Reporte'
+        ],
+        'Valor': [
+            summary['total'],
+            summary['masters'],
+            summary['peers'],
+            summary['systems'],
+            summary['sites'],
+            generated_at
+        ]
+    }
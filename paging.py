@@ -0,0 +1,72 @@
+"""Tablas de repetidores paginadas: orden y página se resuelven en el servidor.
+
+Las tablas por sistema (tab 1) y por cerro (tab 2) ya no envían todas sus
+filas al navegador: el orden (ID, Alias, IP, RX o TX, ascendente o
+descendente) se calcula una vez por vista y solo se envía la página visible,
+de PAGE_SIZE filas. Las filas Master (hasta MAX_PINNED) quedan fijas al
+inicio de cada página, fuera del orden y del conteo de páginas: lo enviado
+por tabla no crece con el tamaño de la flota.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Filas por página (sin contar los Master fijos)
+PAGE_SIZE = int(os.environ.get("ZALDIVAR_PAGE_SIZE", "50"))
+# Masters fijos por página como máximo; los demás encabezan las filas paginadas
+MAX_PINNED = int(os.environ.get("ZALDIVAR_MAX_PINNED", "10"))
+
+# Etiqueta del control de orden -> columna del inventario
+SORT_COLUMNS = {
+    'ID': 'ID',
+    'Alias': 'Alias',
+    'IP': 'IP Ethernet',
+    'RX': 'RX (MHz)',
+    'TX': 'TX (MHz)',
+}
+
+
+class Page:
+    """Filas de una página y su posición en la tabla completa"""
+
+    def __init__(self, rows, number, pages, total, pinned, start):
+        self.rows = rows
+        self.number = number
+        self.pages = pages
+        # Filas paginadas (sin los Master fijos) y tramo 1-based de esta página
+        self.total = total
+        self.pinned = pinned
+        self.first = start + 1 if total else 0
+        self.last = start + len(rows) - pinned
+
+
+def _sort_values(values):
+    # Categóricos por texto, no por el orden de sus categorías; las IPs empaquetadas ya ordenan como número
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(object)
+    return values
+
+
+def order(part, sort=None, descending=False):
+    """(posiciones de `part` en orden, cantidad de Masters): Masters primero, luego por `sort`"""
+    master = (part['Rol'] == 'Master').to_numpy()
+    keys = pd.DataFrame({'fijo': ~master})
+    ascending = [True]
+    if sort is not None:
+        keys['valor'] = _sort_values(part[SORT_COLUMNS[sort]]).reset_index(drop=True)
+        ascending.append(not descending)
+    # Orden estable: a igual valor se conserva el orden del inventario
+    ordered = keys.sort_values(list(keys.columns), ascending=ascending, kind='mergesort', na_position='last')
+    return ordered.index.to_numpy(dtype='int64'), int(master.sum())
+
+
+def paginate(part, positions, pinned, number=1, size=PAGE_SIZE):
+    """Página `number` (1-based, acotada al rango válido) con los Masters al inicio"""
+    pinned = min(pinned, MAX_PINNED)
+    rest = len(positions) - pinned
+    pages = max(1, -(-rest // size))
+    number = min(max(int(number), 1), pages)
+    start = (number - 1) * size
+    take = np.concatenate([positions[:pinned], positions[pinned + start:pinned + start + size]])
+    return Page(part.iloc[take], number, pages, rest, pinned, start)
@@ -0,0 +1,267 @@
+"""Tiempos por etapa del dashboard: registro, percentiles y métricas Prometheus.
+
+Cada etapa con nombre (carga, filtros, salud, matriz, exportes, gráficos,
+Styler...) se mide con
+
+    with profiling.stage('filtros') as s:
+        ...
+        s.rows = len(resultado)
+        s.hit = True       # si vino de una caché
+
+y se acumula por proceso: últimas SAMPLES duraciones (para percentiles),
+contadores de llamadas, filas, aciertos / fallos de caché y un histograma.
+
+Apagado (ZALDIVAR_PROFILE distinto de 1) `stage` devuelve siempre el mismo
+objeto vacío: no se lee el reloj ni se toma ningún lock.
+
+Las métricas se exponen en formato de texto Prometheus en
+ZALDIVAR_METRICS_HTTP ("host:puerto", GET /metrics, solo interfaz local por
+defecto) y/o en el archivo ZALDIVAR_METRICS_FILE (para el textfile collector
+de node_exporter), reescrito cada METRICS_FILE_INTERVAL segundos.
+"""
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+ENABLED = os.environ.get("ZALDIVAR_PROFILE", "0") == "1"
+METRICS_HTTP = os.environ.get("ZALDIVAR_METRICS_HTTP", "")
+METRICS_FILE = os.environ.get("ZALDIVAR_METRICS_FILE", "")
+METRICS_FILE_INTERVAL = 15
+
+# Duraciones guardadas por etapa para los percentiles
+SAMPLES = 1000
+# Límites (s) del histograma Prometheus
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Stats:
+    def __init__(self):
+        self.samples = deque(maxlen=SAMPLES)
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds, rows, hit):
+        self.samples.append(seconds)
+        self.count += 1
+        self.seconds += seconds
+        if rows is not None:
+            self.rows += int(rows)
+        if hit is True:
+            self.hits += 1
+        elif hit is False:
+            self.misses += 1
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'rows', 'hit', '_start')
+
+    def __init__(self, profiler, name, rows=None):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+        self.hit = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self._start, self.rows, self.hit)
+        return False
+
+
+class _Disabled:
+    """Etapa que no mide nada; sus atributos se pueden asignar sin efecto"""
+
+    rows = hit = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_DISABLED = _Disabled()
+
+
+class Profiler:
+    """Acumulador de tiempos por etapa, seguro entre hilos"""
+
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            return _DISABLED
+        return _Stage(self, name, rows)
+
+    def record(self, name, seconds, rows=None, hit=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _Stats()
+            stats.add(seconds, rows, hit)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def percentiles(self):
+        """Tabla por etapa: llamadas, p50/p90/p99/máx (ms), filas y aciertos de caché"""
+        with self._lock:
+            items = [(name, stats, np.array(stats.samples)) for name, stats in self._stats.items()]
+        rows = []
+        for name, stats, samples in sorted(items, key=lambda item: -item[1].seconds):
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99]) * 1000
+            cached = stats.hits + stats.misses
+            rows.append({
+                'Etapa': name,
+                'Llamadas': stats.count,
+                'p50 (ms)': round(p50, 2),
+                'p90 (ms)': round(p90, 2),
+                'p99 (ms)': round(p99, 2),
+                'Máx (ms)': round(samples.max() * 1000, 2),
+                'Total (s)': round(stats.seconds, 3),
+                'Filas/llamada': round(stats.rows / stats.count) if stats.rows else None,
+                'Caché (% aciertos)': round(stats.hits / cached * 100, 1) if cached else None,
+            })
+        return pd.DataFrame(rows, columns=['Etapa', 'Llamadas', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)',
+                                           'Máx (ms)', 'Total (s)', 'Filas/llamada', 'Caché (% aciertos)'])
+
+    def prometheus(self):
+        """Métricas en formato de texto Prometheus (versión 0.0.4)"""
+        with self._lock:
+            snapshot = [(name, stats.count, stats.seconds, stats.rows, stats.hits, stats.misses,
+                         list(stats.buckets)) for name, stats in sorted(self._stats.items())]
+
+        lines = [
+            "# HELP zaldivar_stage_seconds Tiempo de pared por etapa del dashboard.",
+            "# TYPE zaldivar_stage_seconds histogram",
+        ]
+        for name, count, seconds, _, _, _, buckets in snapshot:
+            label = _label(name)
+            for bound, n in zip(BUCKETS, buckets):
+                lines.append(f'zaldivar_stage_seconds_bucket{{stage="{label}",le="{bound:g}"}} {n}')
+            lines.append(f'zaldivar_stage_seconds_bucket{{stage="{label}",le="+Inf"}} {count}')
+            lines.append(f'zaldivar_stage_seconds_sum{{stage="{label}"}} {seconds:.6f}')
+            lines.append(f'zaldivar_stage_seconds_count{{stage="{label}"}} {count}')
+
+        lines += [
+            "# HELP zaldivar_stage_rows_total Filas procesadas por etapa.",
+            "# TYPE zaldivar_stage_rows_total counter",
+        ]
+        lines += [f'zaldivar_stage_rows_total{{stage="{_label(name)}"}} {rows}'
+                  for name, _, _, rows, _, _, _ in snapshot]
+
+        lines += [
+            "# HELP zaldivar_stage_cache_total Resultados de caché por etapa.",
+            "# TYPE zaldivar_stage_cache_total counter",
+        ]
+        for name, _, _, _, hits, misses, _ in snapshot:
+            if hits or misses:
+                lines.append(f'zaldivar_stage_cache_total{{stage="{_label(name)}",result="hit"}} {hits}')
+                lines.append(f'zaldivar_stage_cache_total{{stage="{_label(name)}",result="miss"}} {misses}')
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+PROFILER = Profiler()
+
+
+def stage(name, rows=None):
+    """Contexto que mide una etapa en el perfilador del proceso"""
+    return PROFILER.stage(name, rows)
+
+
+def record(name, seconds, rows=None, hit=None):
+    PROFILER.record(name, seconds, rows, hit)
+
+
+# --- EXPORTACIÓN ---
+def _split_endpoint(endpoint):
+    host, _, port = endpoint.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _metrics_handler(profiler):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = profiler.prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def write_metrics_file(path, profiler=PROFILER):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(profiler.prometheus())
+    os.replace(tmp, path)
+
+
+class MetricsExporter:
+    """Endpoint HTTP /metrics y/o archivo de texto, si están configurados"""
+
+    def __init__(self, http=METRICS_HTTP, path=METRICS_FILE, profiler=PROFILER):
+        self.profiler = profiler
+        self.path = path
+        self.http = None
+        if not profiler.enabled:
+            return
+
+        if http:
+            self.http = ThreadingHTTPServer(_split_endpoint(http), _metrics_handler(profiler))
+            self.http.daemon_threads = True
+            threading.Thread(target=self.http.serve_forever, name='metrics-http', daemon=True).start()
+        if path:
+            threading.Thread(target=self._write_loop, name='metrics-file', daemon=True).start()
+
+    def _write_loop(self):
+        while True:
+            try:
+                write_metrics_file(self.path, self.profiler)
+            except OSError:
+                # Carpeta inexistente o sin permisos: se reintenta en el próximo ciclo
+                pass
+            time.sleep(METRICS_FILE_INTERVAL)
+
+    def endpoints(self):
+        out = []
+        if self.http:
+            out.append("http://%s:%d/metrics" % self.http.server_address[:2])
+        if self.path:
+            out.append(self.path)
+        return out
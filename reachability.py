@@ -0,0 +1,334 @@
+"""Sondeo de alcanzabilidad de repetidores con asyncio.
+
+Un hilo propio corre un event loop que cada PROBE_INTERVAL segundos revisa:
+
+- la IP Ethernet y el Gateway de cada repetidor: conexión TCP a
+  PROBE_TCP_PORT. Que el equipo acepte o rechace (RST) la conexión cuenta
+  como alcanzable; sin respuesta dentro del timeout, caído.
+- el enlace de cada Peer con su Master: un datagrama UDP a
+  (IP Master, Puerto UDP). Un Master IPSC no contesta datagramas
+  arbitrarios, así que sin respuesta el estado queda desconocido; el enlace
+  está arriba si hay respuesta y caído solo si llega un ICMP de destino
+  inalcanzable (puerto o host).
+
+El estado de un repetidor (repeater_status) sale de su IP y su enlace; un
+Gateway que no responde se informa en la tabla de sondas pero no marca
+caído al repetidor.
+
+Los destinos se deduplican (un Gateway compartido se sondea una sola vez),
+la concurrencia se acota con un semáforo, cada sonda tiene su propio
+timeout y los inicios se reparten con jitter para no generar ráfagas. Un
+barrido de miles de destinos dura del orden del timeout, no la suma de
+los tiempos de cada sonda.
+
+Para probar sin equipos reales (responder UDP local con pérdidas):
+
+    python reachability.py bench --endpoints 3000
+"""
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+
+import pandas as pd
+
+import inventory
+import service
+
+# Segundos entre barridos; 0 deja el sondeo apagado
+PROBE_INTERVAL = float(os.environ.get("ZALDIVAR_PROBE_INTERVAL", "0"))
+PROBE_TIMEOUT = float(os.environ.get("ZALDIVAR_PROBE_TIMEOUT", "1.0"))
+PROBE_CONCURRENCY = int(os.environ.get("ZALDIVAR_PROBE_CONCURRENCY", "256"))
+# Ventana (s) en que se reparten los inicios de las sondas de un barrido
+PROBE_JITTER = float(os.environ.get("ZALDIVAR_PROBE_JITTER", "0.5"))
+# Puerto TCP de administración de los repetidores
+PROBE_TCP_PORT = int(os.environ.get("ZALDIVAR_PROBE_TCP_PORT", "80"))
+PROBE_PAYLOAD = b'ZALDIVAR-PROBE'
+
+STATUS_ICONS = {True: '🟢', False: '🔴', None: '⚪'}
+
+# Tipos de sonda que deciden si un repetidor está caído
+REPEATER_PROBES = ('IP', 'Enlace')
+
+
+# --- DESTINOS ---
+def probe_targets(df, tcp_port=PROBE_TCP_PORT):
+    """Una fila por (repetidor, tipo de sonda) con su destino (proto, ip, puerto)"""
+    shown = inventory.to_display(df[['ID', 'Rol', 'IP Ethernet', 'Gateway', 'IP Master', 'Puerto UDP']])
+    ids = shown['ID'].astype('int64')
+    peers = (shown['Rol'].astype(str) != 'Master') & shown['Puerto UDP'].notna()
+
+    parts = [
+        pd.DataFrame({'ID': ids, 'Tipo': 'IP', 'proto': 'tcp',
+                      'ip': shown['IP Ethernet'], 'port': tcp_port}),
+        pd.DataFrame({'ID': ids, 'Tipo': 'Gateway', 'proto': 'tcp',
+                      'ip': shown['Gateway'].astype(object), 'port': tcp_port}),
+        pd.DataFrame({'ID': ids[peers], 'Tipo': 'Enlace', 'proto': 'udp',
+                      'ip': shown.loc[peers, 'IP Master'],
+                      'port': shown.loc[peers, 'Puerto UDP'].astype('int64')}),
+    ]
+    targets = pd.concat(parts, ignore_index=True)
+    targets = targets[targets['ip'].notna() & (targets['ip'].astype(str) != '')]
+    targets['ip'] = targets['ip'].astype(str)
+    return targets.reset_index(drop=True)
+
+
+def endpoints(targets):
+    """Destinos únicos (proto, ip, puerto) a sondear"""
+    unique = targets[['proto', 'ip', 'port']].drop_duplicates()
+    return [(proto, ip, int(port)) for proto, ip, port in unique.itertuples(index=False)]
+
+
+# --- SONDAS ---
+class _Reply(asyncio.DatagramProtocol):
+    def __init__(self, future):
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        # ICMP "port unreachable" llega como ConnectionRefusedError
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def probe_tcp(ip, port, timeout):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+        writer.close()
+        return True, None
+    except ConnectionRefusedError:
+        return True, None
+    except asyncio.TimeoutError:
+        return False, 'sin respuesta'
+    except OSError as e:
+        return False, e.strerror or type(e).__name__
+
+
+async def probe_udp(ip, port, timeout, payload=PROBE_PAYLOAD):
+    """(True, None) si hay respuesta, (False, motivo) con ICMP inalcanzable, (None, ...) si no contesta"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    try:
+        transport, _ = await loop.create_datagram_endpoint(lambda: _Reply(future), remote_addr=(ip, port))
+    except OSError as e:
+        return False, e.strerror or type(e).__name__
+    try:
+        transport.sendto(payload)
+        await asyncio.wait_for(future, timeout)
+        return True, None
+    except asyncio.TimeoutError:
+        # Silencio no es caída: el Master puede descartar lo que no es IPSC
+        return None, 'sin respuesta'
+    except ConnectionRefusedError:
+        return False, 'puerto cerrado'
+    except OSError as e:
+        return False, e.strerror or type(e).__name__
+    finally:
+        transport.close()
+
+
+async def sweep(targets, timeout=PROBE_TIMEOUT, concurrency=PROBE_CONCURRENCY, jitter=PROBE_JITTER):
+    """Sondea todos los destinos; {(proto, ip, puerto): (ok, latencia_ms, detalle, ts)}"""
+    semaphore = asyncio.Semaphore(concurrency)
+    probes = {'tcp': probe_tcp, 'udp': probe_udp}
+
+    async def one(endpoint):
+        proto, ip, port = endpoint
+        await asyncio.sleep(random.uniform(0, jitter))
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok, detail = await probes[proto](ip, port, timeout)
+            except Exception as e:
+                # p. ej. UnicodeError de una IP mal escrita: esa sonda queda sin estado
+                ok, detail = None, type(e).__name__
+            latency = (time.perf_counter() - started) * 1000 if ok else None
+            return endpoint, (ok, latency, detail, time.time())
+
+    results = await asyncio.gather(*(one(endpoint) for endpoint in targets))
+    return dict(results)
+
+
+# --- SERVICIO ---
+class ReachabilityService:
+    """Barridos periódicos en un hilo propio y tabla de estado del último barrido"""
+
+    def __init__(self, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT,
+                 concurrency=PROBE_CONCURRENCY, jitter=PROBE_JITTER, tcp_port=PROBE_TCP_PORT):
+        self.interval = interval
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.tcp_port = tcp_port
+        self.sweeps = 0
+        self.last_duration = None
+        self.last_error = None
+        self._key = None
+        self._targets = pd.DataFrame(columns=['ID', 'Tipo', 'proto', 'ip', 'port'])
+        self._results = {}
+        self._status = (None, None)
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._thread = None
+
+        if self.enabled:
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._run()),
+                                            name='reachability', daemon=True)
+            self._thread.start()
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def watch(self, key, df):
+        """Actualiza los destinos cuando cambia el inventario (`key` = versión)"""
+        if key == self._key:
+            return
+        targets = probe_targets(df, self.tcp_port)
+        with self._lock:
+            self._key, self._targets = key, targets
+        self._changed.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                with self._lock:
+                    pending = endpoints(self._targets)
+                if pending:
+                    started = time.perf_counter()
+                    results = await sweep(pending, self.timeout, self.concurrency, self.jitter)
+                    with self._lock:
+                        self._results = results
+                        self.sweeps += 1
+                        self.last_duration = time.perf_counter() - started
+                        self.last_error = None
+            except Exception as e:
+                # Un barrido fallido no detiene el hilo: se reintenta en el siguiente
+                with self._lock:
+                    self.last_error = f"{type(e).__name__}: {e}"
+            # Jitter también entre barridos: varios procesos no quedan sincronizados.
+            # Un cambio de inventario adelanta el siguiente barrido
+            wait = self.interval * random.uniform(0.9, 1.1)
+            await loop.run_in_executor(None, self._changed.wait, wait)
+            self._changed.clear()
+
+    def status(self):
+        """Estado por (repetidor, tipo) del último barrido; se recalcula solo si hubo otro"""
+        with self._lock:
+            token = (self._key, self.sweeps)
+            if self._status[0] == token:
+                return self._status[1]
+            targets, results = self._targets, self._results
+
+        probed = [results.get((proto, ip, int(port)), (None, None, None, None))
+                  for proto, ip, port in targets[['proto', 'ip', 'port']].itertuples(index=False)]
+        table = targets[['ID', 'Tipo']].assign(
+            Destino=targets['ip'] + ':' + targets['port'].astype(str),
+            Estado=[ok for ok, _, _, _ in probed],
+            **{'Latencia (ms)': [latency for _, latency, _, _ in probed]},
+            Detalle=[detail for _, _, detail, _ in probed],
+        )
+        with self._lock:
+            self._status = (token, table)
+        return table
+
+    def repeater_status(self):
+        """Por repetidor: True (IP y enlace responden), False (alguno caído), None (sin dato)"""
+        table = self.status()
+        if table.empty:
+            return pd.Series(dtype=object)
+        known = table[table['Estado'].notna() & table['Tipo'].isin(REPEATER_PROBES)]
+        down = (known['Estado'] == False).groupby(known['ID']).any()
+        status = (~down).astype(object).reindex(table['ID'].unique())
+        return status.where(status.notna(), None)
+
+
+# --- RESPONDER DE PRUEBA ---
+class _Echo(asyncio.DatagramProtocol):
+    def __init__(self, drop, delay):
+        self.drop = drop
+        self.delay = delay
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if random.random() < self.drop:
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later(random.uniform(0, self.delay), self.transport.sendto, data, addr)
+
+
+async def fake_responder(ports, host='127.0.0.1', drop=0.0, delay=0.01):
+    """Masters falsos: eco UDP en cada puerto, perdiendo una fracción `drop`"""
+    loop = asyncio.get_running_loop()
+    transports = []
+    for port in ports:
+        transport, _ = await loop.create_datagram_endpoint(lambda: _Echo(drop, delay), local_addr=(host, port))
+        transports.append(transport)
+    return transports
+
+
+async def bench(n_endpoints, base_port, drop, timeout, concurrency, jitter):
+    # Mitad enlaces UDP contra el responder, mitad hosts TCP en 127.0.0.0/8
+    n_udp = n_endpoints // 2
+    transports = await fake_responder(range(base_port, base_port + n_udp), drop=drop)
+    targets = [('udp', '127.0.0.1', base_port + i) for i in range(n_udp)]
+    targets += [('tcp', f'127.0.{i // 250}.{i % 250 + 1}', PROBE_TCP_PORT)
+                for i in range(n_endpoints - n_udp)]
+
+    started = time.perf_counter()
+    results = await sweep(targets, timeout, concurrency, jitter)
+    elapsed = time.perf_counter() - started
+    for transport in transports:
+        transport.close()
+
+    states = [ok for ok, _, _, _ in results.values()]
+    print(f"{len(results)} destinos en {elapsed:.2f} s: {states.count(True)} responden, "
+          f"{states.count(False)} caídos, {states.count(None)} sin respuesta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sondeo de alcanzabilidad de repetidores")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    b = sub.add_parser('bench', help="barrido contra un responder local")
+    b.add_argument('--endpoints', type=int, default=3000)
+    b.add_argument('--base-port', type=int, default=40000)
+    b.add_argument('--drop', type=float, default=0.05, help="fracción de datagramas perdidos")
+    b.add_argument('--timeout', type=float, default=PROBE_TIMEOUT)
+    b.add_argument('--concurrency', type=int, default=PROBE_CONCURRENCY)
+    b.add_argument('--jitter', type=float, default=PROBE_JITTER)
+
+    once = sub.add_parser('sweep', help="un barrido sobre el inventario actual")
+    once.add_argument('--tcp-port', type=int, default=PROBE_TCP_PORT)
+    once.add_argument('--timeout', type=float, default=PROBE_TIMEOUT)
+
+    args = parser.parse_args()
+    if args.command == 'bench':
+        # El responder abre un socket por puerto
+        try:
+            import resource
+            _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ImportError, ValueError, OSError):
+            pass
+        asyncio.run(bench(args.endpoints, args.base_port, args.drop,
+                          args.timeout, args.concurrency, args.jitter))
+    else:
+        df = service.DataService().current().df
+        targets = probe_targets(df, args.tcp_port)
+        results = asyncio.run(sweep(endpoints(targets), args.timeout))
+        for (proto, ip, port), (ok, latency, detail, _) in sorted(results.items()):
+            state = f"{latency:.1f} ms" if ok else detail
+            print(f"{STATUS_ICONS[ok]} {proto}://{ip}:{port}  {state}")
+
+
+if __name__ == '__main__':
+    main()
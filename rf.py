@@ -0,0 +1,127 @@
+"""Conflictos de frecuencia RF por barrido de intervalos ordenados.
+
+Cada repetidor aporta dos eventos (su RX y su TX). Los eventos se ordenan una
+vez por (zona, frecuencia) y, para cada uno, una búsqueda binaria ubica el
+último evento dentro de la banda de guarda: todos los pares cercanos salen en
+O(n log n + k), con k el número de pares encontrados, sin comparar todos
+contra todos.
+
+La zona agrupa cerros cercanos entre sí (config/zonas.csv, columnas
+`cerro,zona`); un cerro sin zona forma la suya propia. Los pares de una misma
+fila se clasifican en:
+
+- Par duplicado: mismo par RX/TX (dentro de la banda) que otro repetidor.
+- Inversión TX/RX: el TX de uno es el RX del otro y viceversa.
+- TX–RX: un transmisor cae sobre la recepción de otro equipo (desensibilización).
+- TX–TX / RX–RX: canales demasiado próximos en la misma zona.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Banda de guarda (kHz): frecuencias a esta distancia o menos entran en conflicto
+GUARD_BAND_KHZ = float(os.environ.get("ZALDIVAR_GUARD_BAND_KHZ", "12.5"))
+ZONES_FILE = os.environ.get("ZALDIVAR_ZONES_FILE", "config/zonas.csv")
+
+DUPLICATE = 'Par duplicado'
+INVERSION = 'Inversión TX/RX'
+TX_RX = 'TX–RX'
+TX_TX = 'TX–TX'
+RX_RX = 'RX–RX'
+# Orden de gravedad: una pareja de repetidores se reporta con el tipo más grave
+KINDS = [DUPLICATE, INVERSION, TX_RX, TX_TX, RX_RX]
+
+_RX, _TX = 0, 1
+# Separación entre zonas al codificar (zona, frecuencia) como un solo entero (Hz)
+_ZONE_STRIDE = 10**12
+
+COLUMNS = ['Tipo', 'Ámbito', 'ID A', 'ID B', 'Alias A', 'Alias B', 'Frecuencia A', 'Frecuencia B', 'Δ (kHz)']
+
+
+def load_zones(path=ZONES_FILE):
+    """cerro -> zona; vacío si no hay archivo de zonas"""
+    if not Path(path).exists():
+        return {}
+    table = pd.read_csv(path, dtype=str).dropna()
+    return dict(zip(table['cerro'], table['zona']))
+
+
+def close_pairs(keys, guard):
+    """Pares (i, j), i < j, de `keys` ordenadas con keys[j] - keys[i] <= guard"""
+    ends = np.searchsorted(keys, keys + guard, side='right')
+    counts = ends - np.arange(len(keys)) - 1
+    first = np.repeat(np.arange(len(keys)), counts)
+    # Para cada i, los j = i+1 .. ends[i]-1 sin un bucle de Python
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return first, first + 1 + offsets
+
+
+def find_conflicts(df, guard_khz=GUARD_BAND_KHZ, zones=None):
+    """Pares de repetidores con frecuencias a `guard_khz` o menos en la misma zona"""
+    if df.empty or 'RX (MHz)' not in df or 'TX (MHz)' not in df:
+        return pd.DataFrame(columns=COLUMNS)
+
+    zones = load_zones() if zones is None else zones
+    cerros = df['Cerro'].astype(str).to_numpy()
+    zone_codes, _ = pd.factorize(pd.Series(cerros).map(zones).fillna(pd.Series(cerros)))
+
+    n = len(df)
+    hz = np.concatenate([df['RX (MHz)'].to_numpy(dtype='float64'), df['TX (MHz)'].to_numpy(dtype='float64')])
+    row = np.tile(np.arange(n), 2)
+    side = np.repeat([_RX, _TX], n)
+    known = ~np.isnan(hz)
+    # Columnas float32 (error de ~8 Hz en VHF): se redondea a 50 Hz, divisor de todo paso
+    # de canalización (2,5 / 6,25 / 12,5 kHz), para no inventar deltas
+    hz, row, side = np.rint(hz[known] * 2e4).astype('int64') * 50, row[known], side[known]
+
+    keys = zone_codes[row].astype('int64') * _ZONE_STRIDE + hz
+    order = np.argsort(keys, kind='stable')
+    i, j = close_pairs(keys[order], int(round(guard_khz * 1000)))
+    i, j = order[i], order[j]
+
+    # Eventos de la misma fila (el RX y TX propios) no son conflicto
+    other = row[i] != row[j]
+    i, j = i[other], j[other]
+    if not len(i):
+        return pd.DataFrame(columns=COLUMNS)
+
+    # Normalizar: A es la fila menor
+    swap = row[i] > row[j]
+    i, j = np.where(swap, j, i), np.where(swap, i, j)
+    events = pd.DataFrame({
+        'a': row[i], 'b': row[j], 'side_a': side[i], 'side_b': side[j],
+        'freq_a': hz[i], 'freq_b': hz[j], 'delta': np.abs(hz[i] - hz[j]),
+    })
+
+    # Tipo por pareja de repetidores a partir de los pares de lados encontrados
+    combo = events['side_a'] * 2 + events['side_b']
+    flags = pd.crosstab([events['a'], events['b']], combo).reindex(columns=range(4), fill_value=0) > 0
+    rr, rt, tr, tt = (flags[c].to_numpy() for c in range(4))
+    kind = np.select(
+        [rr & tt, rt & tr, rt | tr, tt],
+        [DUPLICATE, INVERSION, TX_RX, TX_TX],
+        default=RX_RX,
+    )
+    pairs = pd.DataFrame({'Tipo': kind}, index=flags.index)
+
+    # Frecuencias del par más cercano de cada pareja
+    nearest = events.sort_values('delta').drop_duplicates(['a', 'b']).set_index(['a', 'b'])
+    pairs = pairs.join(nearest[['freq_a', 'freq_b', 'delta']]).reset_index()
+
+    a, b = pairs['a'].to_numpy(), pairs['b'].to_numpy()
+    ids, aliases = df['ID'].to_numpy(), df['Alias'].astype(str).to_numpy()
+    out = pd.DataFrame({
+        'Tipo': pd.Categorical(pairs['Tipo'], categories=KINDS),
+        'Ámbito': np.where(cerros[a] == cerros[b], cerros[a], np.char.add(np.char.add(
+            cerros[a].astype(str), ' ↔ '), cerros[b].astype(str))),
+        'ID A': ids[a],
+        'ID B': ids[b],
+        'Alias A': aliases[a],
+        'Alias B': aliases[b],
+        'Frecuencia A': pairs['freq_a'].to_numpy() / 1e6,
+        'Frecuencia B': pairs['freq_b'].to_numpy() / 1e6,
+        'Δ (kHz)': pairs['delta'].to_numpy() / 1000,
+    })
+    return out.sort_values(['Tipo', 'Ámbito', 'Δ (kHz)'], ignore_index=True)
@@ -0,0 +1,396 @@
+"""Servicio de datos compartido por todas las sesiones del proceso.
+
+Cada sesión del navegador ejecuta app.py completo; sin este servicio cada
+operador recalculaba filtros, alertas, agregados y exportes por su cuenta.
+DataService es dueño del inventario vigente (Snapshot: DataFrame, índices,
+particiones) y de los resultados derivados por (versión, filtros) (View).
+Cada resultado se calcula una sola vez: las peticiones concurrentes con la
+misma llave esperan al primer cálculo (single-flight) en vez de repetirlo.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import exports
+import filters
+import health
+import history
+import inventory
+import metrics
+import paging
+import profiling
+import rf
+import sources
+import topology
+
+PARTITION_COLUMNS = ('Sistema_Logico', 'Cerro')
+
+# Memoria (MB) de las vistas filtradas que se mantienen en el LRU: posiciones y resultados
+MAX_VIEWS_MB = float(os.environ.get("ZALDIVAR_MAX_VIEWS_MB", "256"))
+
+# Segundos durante los que se reutiliza la última lectura de versiones
+TOKEN_MAX_AGE = 1.0
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Una sola ejecución concurrente por llave; el resto espera su resultado"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+
+def build_partitions(df, column, values=None):
+    subset = df if values is None else df[df[column].isin(values)]
+    return {value: group for value, group in subset.groupby(column, sort=False, observed=True)}
+
+
+class Snapshot:
+    """Inventario vigente (inmutable): se reemplaza completo en cada recarga"""
+
+    def __init__(self, version, systems_version, df, hashes, system_table, partitions, diff,
+                 sources=(), raw_columns=None, previous_key=None):
+        self.version = version
+        self.systems_version = systems_version
+        self.df = df
+        self.hashes = hashes
+        self.system_table = system_table
+        self.partitions = partitions
+        self.last_diff = diff
+        # Versión respecto de la que se calculó `last_diff`
+        self.previous_key = previous_key
+        self.sources = list(sources)
+        # Columnas del libro (sin las derivadas), para saber si se puede parchar
+        self.raw_columns = list(raw_columns) if raw_columns is not None else None
+        self.index = filters.FilterIndex(df)
+        self.memory = inventory.memory_report(df)
+
+    @property
+    def key(self):
+        return (self.version, self.systems_version)
+
+    def partition_rows(self, column, value, visible):
+        """Posiciones en `df` de las filas visibles (máscara booleana) de un sistema o cerro"""
+        positions = self.df.index.get_indexer(self.partitions[column][value].index)
+        return positions[visible[positions]]
+
+    def partition(self, column, value, visible):
+        """Filas visibles de un sistema o cerro sin recorrer el inventario completo"""
+        return self.df.iloc[self.partition_rows(column, value, visible)]
+
+
+def _nbytes(value):
+    """Memoria aproximada de un resultado cacheado (DataFrames, arreglos y sus contenedores)"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, 'to_plotly_json'):
+        # Figura plotly: coordenadas y textos de sus trazas (estimado)
+        return sum(16 * len(trace.x or ()) + sum(map(len, trace.hovertext or ())) for trace in value.data)
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+class View:
+    """Resultados derivados de un Snapshot para una combinación de filtros.
+
+    Filas y agregados se calculan al crear la vista; alertas, matriz y
+    exportes solo cuando alguna sesión los pide, y una sola vez. La vista
+    solo guarda las posiciones de sus filas: máscara y DataFrame se arman
+    al pedirlos, para que el LRU no retenga copias del inventario.
+    """
+
+    def __init__(self, snapshot, filter_key, rows, flight):
+        self.snapshot = snapshot
+        self.filter_key = filter_key
+        self.key = (snapshot.key, filter_key)
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.size = len(self.rows)
+        self.summary = metrics.dashboard_metrics(self.df)
+        self._flight = flight
+        self._results = {}
+        self.nbytes = self.rows.nbytes + _nbytes(self.summary)
+
+    @property
+    def visible(self):
+        """Máscara booleana (por posición) de las filas de la vista"""
+        return self.snapshot.index.mask(self.rows)
+
+    def frame(self, columns=None):
+        """Filas de la vista (solo `columns` si se indican); sin filtros efectivos, sin copiar"""
+        df = self.snapshot.df if columns is None else self.snapshot.df[columns]
+        return df if self.size == len(df) else df.iloc[self.rows]
+
+    @property
+    def df(self):
+        return self.frame()
+
+    def column(self, name):
+        """Valores de una columna en las filas de la vista"""
+        return self.snapshot.df[name].to_numpy()[self.rows]
+
+    def _memo(self, name, build):
+        stage = name[0] if isinstance(name, tuple) else name
+        with profiling.stage(stage, rows=self.size) as timing:
+            timing.hit = name in self._results
+            if name not in self._results:
+                def compute():
+                    if name not in self._results:
+                        self._results[name] = build()
+                        self.nbytes += _nbytes(self._results[name])
+                    return self._results[name]
+                return self._flight.do((self.key, name), compute)
+            return self._results[name]
+
+    @property
+    def issues(self):
+        return self._memo('salud', lambda: health.check_system_health(self.df))
+
+    @property
+    def matrix(self):
+        return self._memo('matriz', lambda: metrics.distribution_matrix(self.summary['cube']))
+
+    def page(self, column, value, number=1, sort=None, descending=False, size=paging.PAGE_SIZE):
+        """Página de las filas visibles de un sistema o cerro; el orden se calcula una vez por vista"""
+        def build():
+            rows = self.snapshot.partition_rows(column, value, self.visible)
+            positions, pinned = paging.order(self.snapshot.df.iloc[rows], sort, descending)
+            # Se guardan posiciones en el inventario, no la copia de la partición
+            return rows[positions].astype(np.int32), pinned
+        positions, pinned = self._memo(('orden', column, value, sort, descending), build)
+        return paging.paginate(self.snapshot.df, positions, pinned, number, size)
+
+    def network_figure(self, net):
+        """Red de la vista (`net` es la topología de su snapshot); una vez por versión y filtros"""
+        def build():
+            visible = None if self.size == len(self.snapshot.df) else set(self.snapshot.df.index[self.rows])
+            return topology.network_figure(net, visible)
+        return self._memo('red', build)
+
+    def frequency_conflicts(self, guard_khz=rf.GUARD_BAND_KHZ):
+        return self._memo(('rf', guard_khz), lambda: rf.find_conflicts(self.df, guard_khz))
+
+    def csv(self):
+        return exports.cached_csv(self.key, self.df)
+
+    def excel(self, generated_at):
+        summary_data = metrics.summary_rows(self.summary, exports.STAMP)
+        return exports.cached_excel(self.key, self.df, summary_data, generated_at)
+
+
+class DataService:
+    """Inventario canónico, índices y vistas filtradas, seguros entre hilos"""
+
+    def __init__(self, registry=sources.REGISTRY_FILE, patterns=sources.SOURCE_PATTERNS,
+                 systems_file=inventory.SYSTEMS_FILE, max_views_mb=MAX_VIEWS_MB):
+        self.registry = registry
+        self.patterns = patterns
+        self.systems_file = systems_file
+        self.max_view_bytes = int(max_views_mb * 1024 * 1024)
+        self.snapshot = None
+        self._flight = SingleFlight()
+        self._views = OrderedDict()
+        self._views_lock = threading.Lock()
+        self._token = (float('-inf'), None)
+        # Última versión que se intentó cargar y, si falló, (versión, error)
+        self.attempted = None
+        self._failure = None
+        self._topology = None
+        self.history = history.HistoryStore()
+
+    def versions(self):
+        """(versión de las fuentes, versión de la tabla de sistemas); None si faltan archivos"""
+        try:
+            found = sources.discover(self.registry, self.patterns)
+            if not found:
+                return None
+            return (sources.combined_version(sources.versions(found)),
+                    inventory.dataset_version(self.systems_file))
+        except OSError:
+            return None
+
+    def token(self):
+        """Versiones vigentes, leídas a lo más una vez por TOKEN_MAX_AGE para todas las sesiones"""
+        checked, key = self._token
+        now = time.monotonic()
+        if now - checked > TOKEN_MAX_AGE:
+            key = self.versions()
+            self._token = (now, key)
+        return key
+
+    def changed(self):
+        """True si los archivos cambiaron desde el último intento de carga (exitoso o no)"""
+        key = self.token()
+        return key is not None and key != self.attempted and (
+            self.snapshot is None or key != self.snapshot.key)
+
+    def current(self):
+        """Snapshot sincronizado con los archivos; el anterior si no hay archivos.
+
+        Si la carga de una versión falla (libro dañado, rangos traslapados) el
+        error se guarda y se vuelve a lanzar sin re-parsear mientras los
+        archivos no cambien.
+        """
+        with profiling.stage('carga') as timing:
+            key = self.token()
+            if key is None or (self.snapshot is not None and self.snapshot.key == key):
+                timing.hit = True
+                snapshot = self.snapshot
+            elif self._failure is not None and self._failure[0] == key:
+                raise self._failure[1]
+            else:
+                timing.hit = False
+                self.attempted = key
+                try:
+                    snapshot = self._flight.do(('sync', key), lambda: self._sync(*key))
+                except Exception as e:
+                    self._failure = (key, e)
+                    raise
+                self._failure = None
+            timing.rows = len(snapshot.df) if snapshot is not None else 0
+            return snapshot
+
+    def _sync(self, version, systems_version):
+        """Parcha solo las filas que cambiaron respecto del snapshot vigente"""
+        old = self.snapshot
+        if old is not None and old.key == (version, systems_version):
+            return old
+
+        table = inventory.load_system_table(self.systems_file)
+        derive_columns = lambda frame: inventory.classify(frame, table)
+        found = sources.discover(self.registry, self.patterns)
+        source_versions = sources.versions(found)
+        version = sources.combined_version(source_versions)
+        raw = sources.load_sources(found, source_versions)
+        hashes = inventory.row_hashes(raw)
+
+        # Si cambió la tabla de rangos hay que reclasificar todo el inventario; si cambiaron
+        # las columnas del libro, las filas sin cambios de `old` no tienen la forma nueva
+        if old is None or old.systems_version != systems_version or old.raw_columns != list(raw.columns):
+            df = derive_columns(raw.set_axis(hashes.index))
+            partitions = {col: build_partitions(df, col) for col in PARTITION_COLUMNS}
+            diff = None
+        else:
+            diff = inventory.diff_inventories(old.hashes, hashes)
+            df = inventory.patch_inventory(old.df, raw, diff, derive_columns)
+            partitions = {}
+            for col in PARTITION_COLUMNS:
+                affected = inventory.affected_values(old.df, df, diff, col)
+                partitions[col] = {
+                    value: group for value, group in old.partitions[col].items()
+                    if value not in affected
+                }
+                if affected:
+                    partitions[col].update(build_partitions(df, col, affected))
+
+        self.snapshot = Snapshot(version, systems_version, df, hashes, table, partitions, diff, found,
+                                 raw.columns, old.key if diff is not None else None)
+        try:
+            self.history.record(version, df, hashes)
+        except Exception:
+            # Sin pyarrow o sin permisos de escritura se trabaja sin historial
+            pass
+        return self.snapshot
+
+    def topology(self, snapshot):
+        """Grafo y posiciones de `snapshot`, partiendo de las posiciones del último calculado"""
+        def build():
+            previous = self._topology
+            if previous is not None and previous[0] == snapshot.key:
+                return previous[1]
+            # El diff del snapshot solo sirve si se calculó contra la topología anterior;
+            # si en medio hubo versiones sin topología, Topology compara los grafos
+            adjacent = previous is not None and snapshot.previous_key == previous[0]
+            with profiling.stage('topología', rows=len(snapshot.df)):
+                result = topology.Topology(
+                    snapshot.df,
+                    previous=previous[1] if previous is not None else None,
+                    diff=snapshot.last_diff if adjacent else None,
+                )
+            self._topology = (snapshot.key, result)
+            return result
+
+        return self._flight.do(('topology', snapshot.key), build)
+
+    def _evict(self):
+        # Con el lock tomado; los resultados que se agregan a una vista cuentan desde ese momento.
+        # La vista recién usada se conserva aunque sola exceda el límite
+        used = sum(view.nbytes for view in self._views.values())
+        while used > self.max_view_bytes and len(self._views) > 1:
+            _, oldest = self._views.popitem(last=False)
+            used -= oldest.nbytes
+
+    def view(self, snapshot, selections=None, search_term=''):
+        """Vista filtrada compartida; `selections` es {columna: valores} como en FilterIndex"""
+        selections = selections or {}
+        filter_key = None if not selections and not search_term else (
+            tuple(tuple(sorted(map(str, selections[col]))) if col in selections else None
+                  for col in filters.FACETS),
+            search_term,
+        )
+        key = (snapshot.key, filter_key)
+
+        with self._views_lock:
+            cached = self._views.get(key)
+            if cached is not None:
+                self._views.move_to_end(key)
+                self._evict()
+        if cached is not None:
+            profiling.record('filtros', 0.0, cached.size, hit=True)
+            return cached
+
+        def build():
+            with self._views_lock:
+                if key in self._views:
+                    return self._views[key]
+            with profiling.stage('filtros') as timing:
+                timing.hit = False
+                rows = snapshot.index.query(selections, search_term)
+                view = View(snapshot, filter_key, rows, self._flight)
+                timing.rows = len(rows)
+            with self._views_lock:
+                self._views[key] = view
+                self._evict()
+            return view
+
+        return self._flight.do(('view', key), build)
@@ -0,0 +1,116 @@
+"""Registro de libros de inventario y carga federada.
+
+Cada área de la mina mantiene su propio libro (más versiones históricas).
+Las fuentes se declaran en config/fuentes.csv (columnas `fuente,ruta`, donde
+`ruta` admite comodines glob) o, para una prueba rápida, con la variable
+ZALDIVAR_SOURCES (patrones glob separados por coma). Sin registro se usa el
+libro único de siempre.
+
+Cada libro conserva su propio snapshot Parquet por versión (ver
+inventory.load_inventory). Al cargar, solo los libros sin snapshot vigente se
+parsean, y en paralelo en un pool de procesos: openpyxl es puro Python y no
+escala con hilos. El resultado es un solo inventario con columna `Fuente`.
+"""
+import glob
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import inventory
+
+REGISTRY_FILE = os.environ.get("ZALDIVAR_SOURCES_FILE", "config/fuentes.csv")
+SOURCE_PATTERNS = os.environ.get("ZALDIVAR_SOURCES", "")
+
+# Procesos para parsear libros en frío (por defecto, uno por CPU)
+PARSE_WORKERS = int(os.environ.get("ZALDIVAR_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+
+# Levantar un proceso cuesta ~1 s (importar pandas): bajo este volumen en frío se parsea en serie
+PARALLEL_MIN_BYTES = int(float(os.environ.get("ZALDIVAR_PARALLEL_MIN_MB", "2")) * 1024 * 1024)
+
+SOURCE_COLUMN = 'Fuente'
+
+
+def discover(registry=REGISTRY_FILE, patterns=SOURCE_PATTERNS):
+    """Lista ordenada de (fuente, ruta) de los libros existentes"""
+    if patterns:
+        entries = [(None, p.strip()) for p in patterns.split(',') if p.strip()]
+    elif Path(registry).exists():
+        table = pd.read_csv(registry, dtype=str).fillna('')
+        entries = list(zip(table['fuente'], table['ruta']))
+    else:
+        entries = [(None, inventory.SOURCE_FILE)]
+
+    found = {}
+    for name, pattern in entries:
+        paths = sorted(glob.glob(pattern))
+        for path in paths:
+            # Un patrón que abarca varios libros los distingue por nombre de archivo
+            label = name if name and len(paths) == 1 else (
+                f"{name} · {Path(path).stem}" if name else Path(path).stem
+            )
+            found.setdefault(str(Path(path)), label)
+    return sorted(((label, path) for path, label in found.items()), key=lambda s: s[1])
+
+
+def versions(sources):
+    """Token combinado que cambia si se agrega, quita o modifica cualquier libro"""
+    tokens = inventory.dataset_versions([path for _, path in sources])
+    return tuple(zip((name for name, _ in sources), tokens))
+
+
+def combined_version(source_versions):
+    digest = hashlib.sha256(repr(source_versions).encode('utf-8')).hexdigest()
+    return f"{inventory.SNAPSHOT_SCHEMA}-{digest[:16]}"
+
+
+def _load_one(args):
+    path, version = args
+    return inventory.load_inventory(path, version)
+
+
+def load_frames(sources, source_versions, workers=PARSE_WORKERS):
+    """DataFrame por libro; los que no tienen snapshot se parsean en paralelo"""
+    jobs = [(path, version) for (_, path), (_, version) in zip(sources, source_versions)]
+    cold = [job for job in jobs if not inventory.snapshot_path(*job).exists()]
+
+    parsed = {}
+    cold_bytes = sum(os.path.getsize(path) for path, _ in cold)
+    if len(cold) > 1 and workers > 1 and cold_bytes >= PARALLEL_MIN_BYTES:
+        try:
+            # spawn: el proceso de Streamlit tiene hilos vivos y fork no es seguro
+            with ProcessPoolExecutor(min(workers, len(cold)), mp_context=get_context('spawn')) as pool:
+                parsed = dict(zip(cold, pool.map(_load_one, cold)))
+        except (OSError, RuntimeError):
+            # Sin permisos para crear procesos: se parsea en serie
+            parsed = {}
+
+    return [parsed[job] if job in parsed else _load_one(job) for job in jobs]
+
+
+def combine(frames, names):
+    """Concatena los inventarios de cada fuente y agrega la columna Fuente"""
+    frames = list(frames)
+    for col in inventory.IP_COLUMNS:
+        # Una fuente con IPs no válidas trae la columna como texto: se unifica
+        dtypes = {str(frame[col].dtype) for frame in frames if col in frame}
+        if len(dtypes) > 1:
+            frames = [frame.assign(**{col: inventory.ip_text(frame[col])}) if col in frame else frame
+                      for frame in frames]
+
+    df = pd.concat(frames, ignore_index=True)
+    lengths = [len(frame) for frame in frames]
+    df[SOURCE_COLUMN] = pd.Categorical(
+        np.repeat(np.array(names, dtype=object), lengths), categories=list(dict.fromkeys(names))
+    )
+    return inventory.compact_schema(df)
+
+
+def load_sources(sources, source_versions):
+    """Inventario federado de todas las fuentes"""
+    frames = load_frames(sources, source_versions)
+    return combine(frames, [name for name, _ in sources])
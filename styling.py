@@ -0,0 +1,104 @@
+"""Estilos de las tablas del dashboard.
+
+Los estilos se calculan como una matriz de CSS en una sola operación
+vectorizada (máscara Master/Peer por fila, o por celda en la matriz) en
+lugar de un callback de Python por fila o por celda. Sobre STYLE_MAX_ROWS
+filas el Styler se omite y la tabla se envía sin estilos, marcando los
+Masters en la propia columna Rol.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Tamaño máximo (filas) para el que se usa pandas Styler
+STYLE_MAX_ROWS = int(os.environ.get("ZALDIVAR_STYLE_MAX_ROWS", "1000"))
+
+_CELL_CSS = 'text-align: left; padding: 14px 12px; border-bottom: 1px solid #f1f5f9;'
+
+MASTER_ROW_CSS = (
+    'background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%); '
+    'color: #1e40af; '
+    'font-weight: 700; '
+    'border-left: 4px solid #3b82f6; '
+    + _CELL_CSS
+)
+
+PEER_ROW_CSS = (
+    'background: white; '
+    'color: #475569; '
+    'font-weight: 500; '
+    + _CELL_CSS
+)
+
+# Filas de repetidores que no responden al sondeo de alcanzabilidad
+DOWN_ROW_CSS = (
+    'background: #fee2e2; '
+    'color: #b91c1c; '
+    'font-weight: 700; '
+    'border-left: 4px solid #ef4444; '
+    + _CELL_CSS
+)
+
+MATRIX_MASTER = '👑 MASTER'
+MATRIX_PEER = '🔹 Peer'
+
+_MATRIX_CELL_CSS = 'text-align: center; padding: 14px 10px; border: 1px solid #f1f5f9;'
+MATRIX_CSS = {
+    'master': 'color: #1e40af; font-weight: 700; '
+              'background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%); ' + _MATRIX_CELL_CSS,
+    'peer': 'color: #3b82f6; font-weight: 600; background: white; ' + _MATRIX_CELL_CSS,
+    'empty': 'color: #cbd5e1; background: #f8fafc; ' + _MATRIX_CELL_CSS,
+}
+
+
+def _broadcast(css, frame):
+    return pd.DataFrame(css, index=frame.index, columns=frame.columns)
+
+
+def mark_masters(df_input):
+    """Alternativa sin Styler: el Master se distingue con 👑 en la columna Rol"""
+    is_master = (df_input['Rol'] == 'Master').to_numpy()
+    return df_input.assign(Rol=np.where(is_master, '👑 Master', df_input['Rol'].astype(str)))
+
+
+def premium_style(df_input, max_rows=STYLE_MAX_ROWS, down=None):
+    """Resalta las filas Master (y en rojo las de `down`); tablas grandes van sin Styler"""
+    if len(df_input) > max_rows:
+        return mark_masters(df_input)
+
+    is_master = (df_input['Rol'] == 'Master').to_numpy()
+    row_css = np.where(is_master, MASTER_ROW_CSS, PEER_ROW_CSS)
+    if down is not None:
+        row_css = np.where(down, DOWN_ROW_CSS, row_css)
+    styles = _broadcast(np.repeat(row_css[:, None], df_input.shape[1], axis=1), df_input)
+
+    return df_input.style.apply(lambda _: styles, axis=None).format(precision=4)
+
+
+# Celdas de la matriz sobre las que se cambia a mapa de calor
+MATRIX_MAX_CELLS = int(os.environ.get("ZALDIVAR_MATRIX_MAX_CELLS", "2000"))
+
+
+def role_matrix(matrix):
+    """Etiqueta de rol por celda a partir de los conteos Master/Peer"""
+    labels = np.select(
+        [matrix['masters'].to_numpy() > 0, matrix['peers'].to_numpy() > 0],
+        [MATRIX_MASTER, MATRIX_PEER],
+        default='—',
+    )
+    return _broadcast(labels, matrix['total'])
+
+
+def matrix_style(display, matrix, max_cells=MATRIX_MAX_CELLS):
+    """Colorea la matriz Sistema × Cerro según el rol presente en cada celda"""
+    if display.size > max_cells:
+        return display
+
+    css = np.select(
+        [matrix['masters'].to_numpy() > 0, matrix['peers'].to_numpy() > 0],
+        [MATRIX_CSS['master'], MATRIX_CSS['peer']],
+        default=MATRIX_CSS['empty'],
+    )
+    styles = _broadcast(css, display)
+    return display.style.apply(lambda _: styles, axis=None)
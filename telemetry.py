@@ -0,0 +1,487 @@
+"""Telemetría en vivo de RSSI / estado de enlace por repetidor.
+
+Las muestras llegan por UDP o HTTP (solo en la interfaz local por defecto)
+a hilos de ingesta propios, de modo que el hilo del script de Streamlit
+nunca se bloquea. Se guardan en un almacén de memoria fija: por repetidor,
+un buffer circular sobre arreglos numpy para cada nivel (muestras crudas,
+promedios de 1 minuto y de 1 hora). Solo se aceptan IDs del inventario
+vigente y a lo más MAX_REPEATERS (unos 140 KB cada uno); el resto de las
+muestras se cuenta como rechazada. Los IDs que salen del inventario liberan
+su fila, que reutiliza el próximo repetidor nuevo.
+
+Formato de muestra (una por línea, UDP o cuerpo text/plain):
+
+    ID,RSSI[,ENLACE[,TIMESTAMP]]      p. ej. "101,-87.5,1,1760000000.0"
+
+ENLACE es 1/0 (por defecto 1) y TIMESTAMP en segundos Unix (por defecto la
+hora de recepción). Por HTTP también se acepta JSON en POST /samples:
+{"id": 101, "rssi": -87.5, "link": 1, "ts": ...} o una lista de ellos.
+
+Para probar sin equipos reales:
+
+    python telemetry.py simulate --udp 127.0.0.1:5140 --rate 2000
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# Endpoints de ingesta ("host:puerto"); sin definir, la ingesta queda apagada
+UDP_ENDPOINT = os.environ.get("ZALDIVAR_TELEMETRY_UDP", "")
+HTTP_ENDPOINT = os.environ.get("ZALDIVAR_TELEMETRY_HTTP", "")
+
+# Capacidad de cada nivel por repetidor
+RAW_CAPACITY = 3600      # última hora a 1 muestra/s
+MINUTE_CAPACITY = 1440   # 24 horas
+HOUR_CAPACITY = 720      # 30 días
+
+# Repetidores con series en memoria como máximo
+MAX_REPEATERS = int(os.environ.get("ZALDIVAR_TELEMETRY_MAX_REPEATERS", "4096"))
+
+TIERS = ('raw', 'minute', 'hour')
+_BUCKET_SECONDS = {'minute': 60, 'hour': 3600}
+
+
+# --- ALMACÉN DE SERIES DE TIEMPO ---
+class _Tier:
+    """Buffers circulares de un nivel: una fila por repetidor, capacidad fija"""
+
+    def __init__(self, capacity, rows=64):
+        self.capacity = capacity
+        self.ts = np.zeros((rows, capacity), dtype=np.float64)
+        self.mean = np.zeros((rows, capacity), dtype=np.float32)
+        self.low = np.zeros((rows, capacity), dtype=np.float32)
+        self.high = np.zeros((rows, capacity), dtype=np.float32)
+        self.up = np.zeros((rows, capacity), dtype=np.float32)
+        self.head = np.zeros(rows, dtype=np.int64)
+        self.count = np.zeros(rows, dtype=np.int64)
+
+    def grow(self, rows):
+        for name in ('ts', 'mean', 'low', 'high', 'up'):
+            old = getattr(self, name)
+            new = np.zeros((rows, self.capacity), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        for name in ('head', 'count'):
+            old = getattr(self, name)
+            new = np.zeros(rows, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def push(self, slot, ts, mean, low, high, up):
+        i = self.head[slot]
+        self.ts[slot, i] = ts
+        self.mean[slot, i] = mean
+        self.low[slot, i] = low
+        self.high[slot, i] = high
+        self.up[slot, i] = up
+        self.head[slot] = (i + 1) % self.capacity
+        self.count[slot] = min(self.count[slot] + 1, self.capacity)
+
+    def clear(self, slot):
+        self.head[slot] = self.count[slot] = 0
+
+    def read(self, slot):
+        n, h = self.count[slot], self.head[slot]
+        order = np.arange(h - n, h) % self.capacity
+        return {
+            'ts': self.ts[slot, order],
+            'mean': self.mean[slot, order],
+            'low': self.low[slot, order],
+            'high': self.high[slot, order],
+            'up': self.up[slot, order],
+        }
+
+
+class _Accumulator:
+    """Balde abierto (aún no cerrado) de un nivel agregado, por repetidor"""
+
+    def __init__(self, rows=64):
+        self.bucket = np.full(rows, -1.0)
+        self.total = np.zeros(rows)
+        self.n = np.zeros(rows)
+        self.low = np.full(rows, np.inf)
+        self.high = np.full(rows, -np.inf)
+        self.up = np.zeros(rows)
+
+    def grow(self, rows):
+        for name, fill in (('bucket', -1.0), ('total', 0.0), ('n', 0.0),
+                           ('low', np.inf), ('high', -np.inf), ('up', 0.0)):
+            old = getattr(self, name)
+            new = np.full(rows, fill)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, slot, total, n, low, high, up):
+        self.total[slot] += total
+        self.n[slot] += n
+        self.low[slot] = min(self.low[slot], low)
+        self.high[slot] = max(self.high[slot], high)
+        self.up[slot] += up
+
+    def clear(self, slot):
+        self.take(slot)
+        self.bucket[slot] = -1.0
+
+    def take(self, slot):
+        """Cierra el balde y devuelve (ts, suma, n, min, max, suma_enlace)"""
+        out = (self.bucket[slot], self.total[slot], self.n[slot],
+               self.low[slot], self.high[slot], self.up[slot])
+        self.total[slot] = self.n[slot] = self.up[slot] = 0.0
+        self.low[slot], self.high[slot] = np.inf, -np.inf
+        return out
+
+
+class TelemetryStore:
+    """Series de RSSI por ID de repetidor con memoria acotada.
+
+    Cada muestra cruda entra al nivel 'raw' y a un balde abierto de 1 minuto;
+    al cambiar de minuto el balde se cierra en el nivel 'minute' y alimenta
+    el balde de 1 hora, que a su vez se cierra en el nivel 'hour'.
+    """
+
+    def __init__(self, raw_capacity=RAW_CAPACITY, minute_capacity=MINUTE_CAPACITY,
+                 hour_capacity=HOUR_CAPACITY, max_repeaters=MAX_REPEATERS):
+        self._lock = threading.Lock()
+        self._slots = {}
+        # Filas ya asignadas alguna vez y las liberadas por IDs que salieron del inventario
+        self._used = 0
+        self._free = []
+        self.max_repeaters = max_repeaters
+        self._rows = min(64, max_repeaters)
+        # IDs aceptados (None: cualquiera, hasta max_repeaters) y versión del inventario que los dio
+        self._allowed = None
+        self._allowed_key = None
+        self._tiers = {
+            'raw': _Tier(raw_capacity, self._rows),
+            'minute': _Tier(minute_capacity, self._rows),
+            'hour': _Tier(hour_capacity, self._rows),
+        }
+        self._open = {'minute': _Accumulator(self._rows), 'hour': _Accumulator(self._rows)}
+        self._last = {}
+        self.received = 0
+        self.rejected = 0
+        self._per_second = deque(maxlen=60)
+
+    def accept(self, key, ids):
+        """Limita la ingesta a los IDs del inventario `key` y libera las filas de los que salieron.
+
+        No hace nada si la versión no cambió.
+        """
+        if key == self._allowed_key:
+            return
+        allowed = set(pd.unique(pd.Series(ids, dtype='int64')).tolist())
+        with self._lock:
+            self._allowed, self._allowed_key = allowed, key
+            for repeater_id in [rid for rid in self._slots if rid not in allowed]:
+                self._release(repeater_id)
+
+    def _release(self, repeater_id):
+        slot = self._slots.pop(repeater_id)
+        for tier in self._tiers.values():
+            tier.clear(slot)
+        for acc in self._open.values():
+            acc.clear(slot)
+        self._last.pop(repeater_id, None)
+        self._free.append(slot)
+
+    def reject(self, n=1):
+        """Cuenta muestras descartadas antes de llegar al almacén (mal formadas)"""
+        with self._lock:
+            self.rejected += n
+
+    def _slot(self, repeater_id):
+        """Fila del repetidor; None si no está en el inventario o ya no hay cupo"""
+        slot = self._slots.get(repeater_id)
+        if slot is None:
+            if self._allowed is not None and repeater_id not in self._allowed:
+                return None
+            if self._free:
+                slot = self._free.pop()
+                self._slots[repeater_id] = slot
+                return slot
+            slot = self._used
+            if slot >= self.max_repeaters:
+                return None
+            self._used += 1
+            if slot == self._rows:
+                self._rows = min(self._rows * 2, self.max_repeaters)
+                for tier in self._tiers.values():
+                    tier.grow(self._rows)
+                for acc in self._open.values():
+                    acc.grow(self._rows)
+            self._slots[repeater_id] = slot
+        return slot
+
+    def _roll(self, level, slot, ts, total, n, low, high, up):
+        """Agrega al balde abierto de `level`, cerrándolo si cambió el periodo"""
+        acc = self._open[level]
+        bucket = ts - ts % _BUCKET_SECONDS[level]
+        if acc.bucket[slot] < 0:
+            acc.bucket[slot] = bucket
+        elif bucket > acc.bucket[slot]:
+            start, b_total, b_n, b_low, b_high, b_up = acc.take(slot)
+            if b_n:
+                self._tiers[level].push(slot, start, b_total / b_n, b_low, b_high, b_up / b_n)
+                if level == 'minute':
+                    self._roll('hour', slot, start, b_total, b_n, b_low, b_high, b_up)
+            acc.bucket[slot] = bucket
+        # Muestras atrasadas se suman al balde abierto
+        acc.add(slot, total, n, low, high, up)
+
+    def add_many(self, samples):
+        """Agrega muestras (id, rssi, enlace, ts) bajo un solo lock"""
+        now = int(time.time())
+        with self._lock:
+            accepted = 0
+            for repeater_id, rssi, link, ts in samples:
+                slot = self._slot(repeater_id)
+                if slot is None:
+                    self.rejected += 1
+                    continue
+                up = 1.0 if link else 0.0
+                self._tiers['raw'].push(slot, ts, rssi, rssi, rssi, up)
+                self._roll('minute', slot, ts, rssi, 1, rssi, rssi, up)
+                self._last[repeater_id] = (ts, rssi, bool(link))
+                accepted += 1
+            self.received += accepted
+
+            if self._per_second and self._per_second[-1][0] == now:
+                self._per_second[-1][1] += accepted
+            else:
+                self._per_second.append([now, accepted])
+
+    def add(self, repeater_id, rssi, link=True, ts=None):
+        self.add_many([(repeater_id, rssi, link, time.time() if ts is None else ts)])
+
+    def latest(self):
+        """Última muestra por repetidor"""
+        with self._lock:
+            rows = [(rid, ts, rssi, link) for rid, (ts, rssi, link) in self._last.items()]
+        frame = pd.DataFrame(rows, columns=['ID', 'ts', 'RSSI (dBm)', 'Enlace'])
+        frame['Hora'] = pd.to_datetime(frame['ts'], unit='s', utc=True)
+        return frame.drop(columns='ts')
+
+    def series(self, repeater_id, tier='raw'):
+        """Serie temporal de un repetidor en el nivel pedido (incluye el balde abierto)"""
+        with self._lock:
+            slot = self._slots.get(repeater_id)
+            if slot is None:
+                return pd.DataFrame(columns=['Hora', 'RSSI', 'Min', 'Max', 'Enlace'])
+            data = self._tiers[tier].read(slot)
+            if tier in self._open and self._open[tier].n[slot]:
+                acc = self._open[tier]
+                n = acc.n[slot]
+                pending = {'ts': acc.bucket[slot], 'mean': acc.total[slot] / n,
+                           'low': acc.low[slot], 'high': acc.high[slot], 'up': acc.up[slot] / n}
+                data = {k: np.append(v, pending[k]) for k, v in data.items()}
+
+        return pd.DataFrame({
+            'Hora': pd.to_datetime(data['ts'], unit='s', utc=True),
+            'RSSI': data['mean'],
+            'Min': data['low'],
+            'Max': data['high'],
+            'Enlace': data['up'],
+        })
+
+    def stats(self, window=10):
+        with self._lock:
+            now = int(time.time())
+            recent = sum(n for second, n in self._per_second if now - second < window)
+            return {
+                'repeaters': len(self._slots),
+                'received': self.received,
+                'rejected': self.rejected,
+                'rate': recent / window,
+            }
+
+
+# --- INGESTA ---
+def parse_line(line, now):
+    """'ID,RSSI[,ENLACE[,TS]]' -> (id, rssi, enlace, ts); ValueError si es inválida"""
+    parts = [p.strip() for p in line.split(',')]
+    if len(parts) < 2:
+        raise ValueError(line)
+    link = parts[2] not in ('0', 'down', 'false') if len(parts) > 2 and parts[2] else True
+    ts = float(parts[3]) if len(parts) > 3 and parts[3] else now
+    return int(parts[0]), float(parts[1]), link, ts
+
+
+def parse_json(payload, now):
+    items = payload if isinstance(payload, list) else [payload]
+    return [
+        (int(item['id']), float(item['rssi']), bool(item.get('link', True)), float(item.get('ts', now)))
+        for item in items
+    ]
+
+
+def _parse_text(store, text):
+    now = time.time()
+    samples = []
+    invalid = 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            samples.append(parse_line(line, now))
+        except ValueError:
+            invalid += 1
+    if invalid:
+        store.reject(invalid)
+    return samples
+
+
+def _split_endpoint(endpoint):
+    host, _, port = endpoint.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class UdpIngest(threading.Thread):
+    """Hilo que recibe datagramas (una o varias muestras por datagrama)"""
+
+    def __init__(self, store, endpoint):
+        super().__init__(name='telemetry-udp', daemon=True)
+        self.store = store
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sock.bind(_split_endpoint(endpoint))
+        self.address = self.sock.getsockname()
+
+    def run(self):
+        while True:
+            data, _ = self.sock.recvfrom(65535)
+            try:
+                samples = _parse_text(self.store, data.decode('utf-8', errors='replace'))
+                if samples:
+                    self.store.add_many(samples)
+            except Exception:
+                # Un datagrama malformado se descarta; la ingesta sigue
+                self.store.reject()
+
+
+def _http_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/samples':
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+            try:
+                if 'json' in self.headers.get('Content-Type', ''):
+                    samples = parse_json(json.loads(body), time.time())
+                else:
+                    samples = _parse_text(store, body)
+            except (ValueError, KeyError, TypeError):
+                store.reject()
+                self.send_error(400)
+                return
+            store.add_many(samples)
+            self.send_response(204)
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path != '/stats':
+                self.send_error(404)
+                return
+            body = json.dumps(store.stats()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class TelemetryService:
+    """Almacén más los hilos de ingesta UDP/HTTP configurados"""
+
+    def __init__(self, udp=UDP_ENDPOINT, http=HTTP_ENDPOINT, store=None):
+        self.store = store or TelemetryStore()
+        self.udp = self.http = None
+
+        if udp:
+            self.udp = UdpIngest(self.store, udp)
+            self.udp.start()
+        if http:
+            self.http = ThreadingHTTPServer(_split_endpoint(http), _http_handler(self.store))
+            self.http.daemon_threads = True
+            threading.Thread(target=self.http.serve_forever, name='telemetry-http', daemon=True).start()
+
+    @property
+    def enabled(self):
+        return self.udp is not None or self.http is not None
+
+    def endpoints(self):
+        out = []
+        if self.udp:
+            out.append("udp://%s:%d" % self.udp.address)
+        if self.http:
+            out.append("http://%s:%d/samples" % self.http.server_address[:2])
+        return out
+
+
+# --- SIMULADOR ---
+def simulate(endpoint, ids, rate, duration=None, batch=50):
+    """Envía muestras con RSSI en caminata aleatoria a un endpoint UDP"""
+    target = _split_endpoint(endpoint)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rssi = {rid: random.uniform(-100, -60) for rid in ids}
+    interval = batch / rate
+    sent = 0
+    started = time.time()
+
+    while duration is None or time.time() - started < duration:
+        lines = []
+        now = time.time()
+        for _ in range(batch):
+            rid = random.choice(ids)
+            rssi[rid] = min(-40.0, max(-120.0, rssi[rid] + random.gauss(0, 1.5)))
+            link = 0 if rssi[rid] < -115 else 1
+            lines.append(f"{rid},{rssi[rid]:.1f},{link},{now:.3f}")
+        sock.sendto("\n".join(lines).encode('utf-8'), target)
+        sent += batch
+        time.sleep(max(0.0, started + sent / rate - time.time()))
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetría RSSI de repetidores")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sim = sub.add_parser('simulate', help="enviar muestras sintéticas por UDP")
+    sim.add_argument('--udp', default=UDP_ENDPOINT or '127.0.0.1:5140')
+    sim.add_argument('--ids', default='101,102,103,105,200,201,202,400,401,402,500,501,504,600,601,602,604')
+    sim.add_argument('--rate', type=float, default=1000, help="muestras por segundo")
+    sim.add_argument('--duration', type=float, default=None, help="segundos (sin límite por defecto)")
+
+    serve = sub.add_parser('serve', help="ingesta sin dashboard, imprime estadísticas")
+    serve.add_argument('--udp', default=UDP_ENDPOINT or '127.0.0.1:5140')
+    serve.add_argument('--http', default=HTTP_ENDPOINT)
+
+    args = parser.parse_args()
+    if args.command == 'simulate':
+        ids = [int(x) for x in args.ids.split(',')]
+        sent = simulate(args.udp, ids, args.rate, args.duration)
+        print(f"{sent} muestras enviadas")
+    else:
+        service = TelemetryService(udp=args.udp, http=args.http)
+        print("Escuchando en", ", ".join(service.endpoints()))
+        while True:
+            time.sleep(5)
+            print(service.store.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Fixtures comunes: flota sintética pequeña y cachés en un directorio temporal"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Antes de importar los módulos: sus rutas de caché se leen al importar
+os.environ.setdefault("ZALDIVAR_CACHE_DIR", tempfile.mkdtemp(prefix="zaldivar-tests-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+import fleet
+import history
+import service
+
+FLEET_ROWS = 400
+
+
+@pytest.fixture(scope="session")
+def fleet_files(tmp_path_factory):
+    """(libro, tabla de sistemas) de una flota sintética de FLEET_ROWS filas"""
+    root = tmp_path_factory.mktemp("flota")
+    raw, table = fleet.generate(FLEET_ROWS, seed=1)
+    path = root / "inventario.xlsx"
+    systems_file = root / "sistemas.csv"
+    fleet.write_workbook(raw, path)
+    table.to_csv(systems_file, index=False)
+    return path, systems_file
+
+
+@pytest.fixture
+def data_service(fleet_files, tmp_path):
+    """DataService sobre la flota sintética con historial propio"""
+    path, systems_file = fleet_files
+    data = service.DataService(registry=str(tmp_path / "fuentes.csv"), patterns=str(path),
+                               systems_file=str(systems_file))
+    data.history = history.HistoryStore(tmp_path / "historia")
+    return data
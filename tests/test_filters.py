@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import filters
+import fleet
+import inventory
+
+
+@pytest.fixture(scope="module")
+def inventory_df():
+    raw, table = fleet.generate(800, seed=2, anomalies=0.05)
+    # Como sources.combine: cada fila lleva el libro del que viene
+    raw['Fuente'] = 'inventario.xlsx'
+    return inventory.classify(raw.set_axis(inventory.row_hashes(raw).index), table)
+
+
+def _reference(df, selections, term):
+    """Mismo filtro recorriendo el DataFrame"""
+    keep = np.ones(len(df), dtype=bool)
+    for col, values in selections.items():
+        keep &= df[col].astype(str).isin([str(v) for v in values]).to_numpy()
+    if term:
+        hit = np.zeros(len(df), dtype=bool)
+        for col in filters.SEARCH_COLUMNS:
+            text = inventory.ip_text(df[col]) if col in inventory.IP_COLUMNS else df[col].astype('string')
+            hit |= text.fillna('').str.lower().str.contains(term.lower(), regex=False).to_numpy(dtype=bool)
+        keep &= hit
+    return np.flatnonzero(keep)
+
+
+def test_query_matches_dataframe_scan(inventory_df):
+    index = filters.FilterIndex(inventory_df)
+    rng = np.random.default_rng(0)
+    terms = ['', '1', '10.', 'rep', str(inventory_df['ID'].iloc[5]), 'no-existe']
+    for _ in range(40):
+        selections = {}
+        for col in ('Sistema_Logico', 'Cerro', 'Rol'):
+            options = index.options(col)
+            if rng.random() < 0.6:
+                selections[col] = list(rng.choice(options, size=rng.integers(1, len(options) + 1), replace=False))
+        term = terms[rng.integers(len(terms))]
+        rows = index.query(selections, term)
+        assert np.array_equal(rows, _reference(inventory_df, selections, term)), (selections, term)
+
+
+def test_all_options_selected_keeps_every_row(inventory_df):
+    index = filters.FilterIndex(inventory_df)
+    selections = {col: index.options(col) for col in ('Sistema_Logico', 'Cerro', 'Rol')}
+    assert len(index.query(selections)) == len(inventory_df)
@@ -0,0 +1,71 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+import fleet
+import history
+import inventory
+
+
+@pytest.fixture(scope="module")
+def base():
+    raw, table = fleet.generate(120, seed=4)
+    return raw, table
+
+
+def _version(raw, table):
+    hashes = inventory.row_hashes(raw)
+    return inventory.classify(raw.set_axis(hashes.index), table), hashes
+
+
+def test_same_instant_versions_keep_recording_order(base, tmp_path):
+    raw, table = base
+    store = history.HistoryStore(tmp_path)
+    changed = raw.copy()
+    changed.loc[0, 'Alias'] = 'Renombrado'
+    # Hashes elegidos para que el orden alfabético contradiga el de registro
+    for version, frame in (('ffff', raw), ('0000', changed), ('8888', raw)):
+        assert store.record(version, *_version(frame, table))
+    assert store.versions()['version'].tolist() == ['ffff', '0000', '8888']
+
+
+def test_revert_adds_entry_and_reload_does_not(base, tmp_path):
+    raw, table = base
+    store = history.HistoryStore(tmp_path)
+    changed = raw.drop(index=[3])
+    assert store.record('a', *_version(raw, table))
+    assert store.record('b', *_version(changed, table))
+    assert store.record('a', *_version(raw, table))
+    assert not store.record('a', *_version(raw, table))
+    assert store.versions()['version'].tolist() == ['a', 'b', 'a']
+    # La vuelta no escribe filas: todas estaban guardadas
+    assert len(list(store.rows_dir.glob('*.parquet'))) == 1
+
+
+def test_legacy_names_are_read_first(base, tmp_path):
+    raw, table = base
+    store = history.HistoryStore(tmp_path)
+    store.record('nuevo', *_version(raw, table))
+    current = store._manifest_path('nuevo')
+    shutil.copyfile(current, store.versions_dir / '20991231T235959Z-viejo.parquet')
+    versions = store.versions()
+    assert versions['version'].tolist() == ['viejo', 'nuevo']
+    assert versions['fecha'].iloc[0].year == 2099
+
+
+def test_diff_reports_fields_and_rows(base, tmp_path):
+    raw, table = base
+    store = history.HistoryStore(tmp_path)
+    changed = raw.drop(index=[5]).copy()
+    changed.loc[0, 'Alias'] = 'Renombrado'
+    added = raw.iloc[[7]].assign(ID=99999, Alias='Nuevo')
+    changed = pd.concat([changed, added], ignore_index=True)
+    store.record('a', *_version(raw, table))
+    store.record('b', *_version(changed, table))
+
+    diff = store.diff('a', 'b')
+    assert set(diff.loc[diff['Cambio'] == history.ADDED, 'ID']) == {99999}
+    assert set(diff.loc[diff['Cambio'] == history.REMOVED, 'ID']) == {raw.loc[5, 'ID']}
+    renamed = diff[diff['Campo'] == 'Alias']
+    assert renamed[['Antes', 'Después']].values.tolist() == [[str(raw.loc[0, 'Alias']), 'Renombrado']]
@@ -0,0 +1,60 @@
+import numpy as np
+
+import service
+
+
+def test_view_keeps_only_row_positions(data_service):
+    snap = data_service.current()
+    system = snap.index.options('Sistema_Logico')[0]
+    view = data_service.view(snap, {'Sistema_Logico': [system]})
+
+    assert view.rows.dtype == np.int32
+    assert not hasattr(view, '_df')
+    assert (view.df['Sistema_Logico'] == system).all()
+    assert view.visible.sum() == view.size
+
+
+def test_view_lru_is_bounded_by_bytes(data_service):
+    snap = data_service.current()
+    systems = snap.index.options('Sistema_Logico')[:4]
+    views = [data_service.view(snap, {'Sistema_Logico': [s]}) for s in systems]
+
+    # Cabe justo la suma de las dos últimas: las anteriores salen por antigüedad
+    data_service.max_view_bytes = views[-1].nbytes + views[-2].nbytes
+    data_service.view(snap, {'Sistema_Logico': [systems[-1]]})
+    assert list(data_service._views) == [views[-2].key, views[-1].key]
+
+    # Los resultados memoizados cuentan en el tamaño de la vista
+    before = views[-1].nbytes
+    views[-1].page('Sistema_Logico', systems[-1])
+    assert views[-1].nbytes > before
+    data_service.view(snap, {'Sistema_Logico': [systems[-1]]})
+    assert list(data_service._views) == [views[-1].key]
+
+
+def test_view_page_matches_partition(data_service):
+    snap = data_service.current()
+    site = snap.index.options('Cerro')[0]
+    view = data_service.view(snap)
+    page = view.page('Cerro', site, size=1000)
+    assert sorted(page.rows['ID']) == sorted(snap.partition('Cerro', site, view.visible)['ID'])
+    assert page.pinned == min(int((page.rows['Rol'] == 'Master').sum()), service.paging.MAX_PINNED)
+
+
+def test_topology_ignores_diff_from_skipped_versions(data_service, monkeypatch):
+    snap = data_service.current()
+    data_service.topology(snap)
+    calls = []
+    real = service.topology.Topology
+
+    def spy(df, previous=None, diff=None):
+        calls.append(diff)
+        return real(df, previous, diff)
+    monkeypatch.setattr(service.topology, 'Topology', spy)
+
+    # Snapshot cuyo diff es contra una versión que nunca tuvo topología
+    later = service.Snapshot('v3', snap.systems_version, snap.df, snap.hashes, snap.system_table,
+                             snap.partitions, service.inventory.diff_inventories(snap.hashes, snap.hashes),
+                             previous_key=('v2', snap.systems_version))
+    data_service.topology(later)
+    assert calls == [None]
@@ -0,0 +1,24 @@
+import telemetry
+
+
+def test_slots_of_removed_ids_are_recycled():
+    store = telemetry.TelemetryStore(raw_capacity=8, minute_capacity=4, hour_capacity=2, max_repeaters=2)
+    store.accept('v1', [1, 2])
+    store.add_many([(1, -80.0, 1, 60.0), (2, -90.0, 1, 60.0), (1, -81.0, 1, 130.0)])
+
+    # El 1 sale del inventario: su fila queda libre y vacía para el 3
+    store.accept('v2', [2, 3])
+    store.add(3, -70.0, ts=200.0)
+    assert store.stats()['repeaters'] == 2
+    assert store.series(1).empty
+    assert store.series(3)['RSSI'].tolist() == [-70.0]
+    assert store.series(3, 'minute')['RSSI'].tolist() == [-70.0]
+    assert set(store.latest()['ID']) == {2, 3}
+    assert store.stats()['rejected'] == 0
+
+
+def test_invalid_lines_are_counted_as_rejected():
+    store = telemetry.TelemetryStore(max_repeaters=4)
+    samples = telemetry._parse_text(store, "1,-80\nbasura\n\n2\n3,-70,0")
+    assert [s[0] for s in samples] == [1, 3]
+    assert store.stats()['rejected'] == 2
@@ -0,0 +1,87 @@
+import networkx as nx
+import pandas as pd
+
+import fleet
+import inventory
+import topology
+
+
+def _inventory(rows):
+    columns = ['ID', 'Alias', 'Cerro', 'Sistema_Logico', 'Rol', 'IP Ethernet', 'IP Master']
+    df = pd.DataFrame(rows, columns=columns)
+    return df.set_axis([f"k{rid}" for rid in df['ID']])
+
+
+def _brute_force(graph):
+    """Referencia: quitar cada candidato y contar los sobrevivientes sin Master"""
+    found = {}
+    for system in {d['Sistema'] for _, d in graph.nodes(data=True) if d['kind'] == 'repetidor'}:
+        members = topology._repeaters(graph, Sistema=system)
+        links = nx.Graph()
+        links.add_nodes_from(members)
+        links.add_edges_from((a, b) for a, b, kind in graph.subgraph(members).edges(data='kind')
+                             if kind == topology.LINK)
+        candidates = [('Master', graph.nodes[n]['ID'], [n]) for n in members if graph.nodes[n]['Rol'] == 'Master']
+        for site in {graph.nodes[n]['Cerro'] for n in members}:
+            candidates.append(('Cerro', site, [n for n in members if graph.nodes[n]['Cerro'] == site]))
+        for kind, name, failed in candidates:
+            survivors = links.subgraph(set(members) - set(failed))
+            reachable = set()
+            for component in nx.connected_components(survivors):
+                if any(graph.nodes[n]['Rol'] == 'Master' for n in component):
+                    reachable |= component
+            if len(survivors) - len(reachable):
+                found[(system, kind, name)] = (len(failed), len(survivors) - len(reachable))
+    return found
+
+
+def test_spof_star_per_system():
+    df = _inventory([
+        (1, 'M1', 'Norte', 'A', 'Master', '10.0.0.1', None),
+        (2, 'P1', 'Norte', 'A', 'Peer', '10.0.0.2', '10.0.0.1'),
+        (3, 'P2', 'Sur', 'A', 'Peer', '10.0.0.3', '10.0.0.1'),
+        (4, 'M2', 'Sur', 'A', 'Master', '10.0.0.4', None),
+        (5, 'P3', 'Sur', 'A', 'Peer', '10.0.0.5', '10.0.0.4'),
+        # Sin Master: aislado ante cualquier caída que no lo incluya
+        (6, 'P4', 'Norte', 'A', 'Peer', '10.0.0.6', None),
+        # Enlazado a un Master de otro sistema: en B no tiene Master, pero no hay qué perder
+        (7, 'P5', 'Sur', 'B', 'Peer', '10.0.0.7', '10.0.0.1'),
+    ])
+    spof = topology.single_points_of_failure(topology.build_graph(df))
+    table = {(r['Sistema'], r['Punto de falla']): (r['Caídos'], r['Aislados'])
+             for r in spof.to_dict('records')}
+    assert table == {
+        ('A', '👑 M1 (ID 1)'): (1, 3),
+        ('A', '👑 M2 (ID 4)'): (1, 2),
+        ('A', '🏔️ Norte'): (3, 1),
+        ('A', '🏔️ Sur'): (3, 1),
+    }
+
+
+def test_spof_matches_brute_force():
+    raw, table = fleet.generate(600, seed=3, anomalies=0.05)
+    df = inventory.classify(raw.set_axis(inventory.row_hashes(raw).index), table)
+    graph = topology.build_graph(df)
+    spof = topology.single_points_of_failure(graph)
+    fast = {(r['Sistema'], r['Tipo'], r['Punto de falla']): (r['Caídos'], r['Aislados'])
+            for r in spof.to_dict('records')}
+    expected = {}
+    for (system, kind, name), counts in _brute_force(graph).items():
+        label = next(f"👑 {d['Alias']} (ID {d['ID']})" for _, d in graph.nodes(data=True)
+                     if d.get('ID') == name) if kind == 'Master' else f"🏔️ {name}"
+        expected[(system, kind, label)] = counts
+    assert expected and fast == expected
+
+
+def test_changed_nodes_include_relinked_peers():
+    before = _inventory([
+        (1, 'M1', 'Norte', 'A', 'Master', '10.0.0.1', None),
+        (2, 'M2', 'Sur', 'A', 'Master', '10.0.0.2', None),
+        (3, 'P1', 'Norte', 'A', 'Peer', '10.0.0.3', '10.0.0.1'),
+        (4, 'P2', 'Sur', 'A', 'Peer', '10.0.0.4', '10.0.0.2'),
+    ])
+    after = before.copy()
+    after.loc['k3', 'IP Master'] = '10.0.0.2'
+    changed = topology.changed_nodes(topology.build_graph(after), topology.build_graph(before))
+    # El Peer cambió de Master; ambos Masters cambiaron de vecinos
+    assert set(changed) == {'k1', 'k2', 'k3'}
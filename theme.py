@@ -0,0 +1,95 @@
+"""Tema visual: hojas de estilo estáticas y tarjetas HTML precompiladas.
+
+Los temas claro y oscuro viven en static/ (base.css + theme-<tema>.css) y se
+sirven como archivos estáticos de Streamlit (server.enableStaticServing en
+.streamlit/config.toml). Cada rerun solo emite un <link> con la URL
+versionada por el hash del archivo: el navegador descarga el CSS una vez y
+lo vuelve a pedir solo cuando cambia. Sin servidor de estáticos se inyecta
+el contenido en línea, leído una sola vez por proceso.
+
+No hay fuentes externas: la tipografía es Inter si está instalada y, si no,
+la del sistema; el primer render no espera a ninguna descarga.
+
+Las tarjetas usan clases de base.css y plantillas fijas; solo se escapan e
+insertan los valores, y cada combinación se memoiza.
+"""
+import hashlib
+from functools import lru_cache
+from html import escape
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+# URL pública de static/ (enableStaticServing)
+STATIC_URL = "app/static"
+
+BASE_CSS = "base.css"
+THEME_CSS = {False: "theme-light.css", True: "theme-dark.css"}
+
+
+@lru_cache(maxsize=None)
+def _asset(name):
+    """(URL versionada, contenido) de un archivo de static/"""
+    content = (STATIC_DIR / name).read_text(encoding="utf-8")
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+    return f"{STATIC_URL}/{name}?v={digest}", content
+
+
+@lru_cache(maxsize=None)
+def stylesheet(dark_mode=False, static_serving=True):
+    """HTML que carga el tema: <link> a los estáticos o, sin ellos, <style> en línea"""
+    names = [BASE_CSS, THEME_CSS[bool(dark_mode)]]
+    if static_serving:
+        return "".join(f'<link rel="stylesheet" href="{_asset(name)[0]}">' for name in names)
+    return "<style>\n" + "\n".join(_asset(name)[1] for name in names) + "</style>"
+
+
+# --- TARJETAS ---
+LOGO = "<div class='zl-logo'><span>📡</span></div>"
+
+_STAT = ("<div class='zl-stat zl-stat--{tone}'><div class='zl-stat__label'>{label}</div>"
+         "<div class='zl-stat__value'>{value}</div><div class='zl-stat__caption'>{caption}</div></div>")
+_NOTE = "<div class='zl-note'><strong>{title}</strong> {body}</div>"
+_LOCATION = "<div class='zl-location'><strong>{label}</strong> <code>{value}</code></div>"
+_TOTAL = ("<div class='zl-total'><div class='zl-total__value'>{value}</div>"
+          "<div class='zl-total__caption'>{caption}</div></div>")
+_BADGE = "<div class='zl-badge{modifier}'><strong>{text}</strong></div>"
+_LEGEND = "<div class='zl-legend zl-legend--{kind}'><strong>{text}</strong></div>"
+_FOOTER = ("<div class='zl-footer'><strong>Minera Zaldívar</strong> • Monitor de Infraestructura IPSC"
+           " • 2026<br><small>Última actualización: {stamp}</small></div>")
+
+
+@lru_cache(maxsize=256)
+def stat_card(tone, label, value, caption):
+    """Tarjeta de estadística; `tone` es slate, amber o blue"""
+    return _STAT.format(tone=tone, label=escape(label), value=escape(str(value)), caption=escape(caption))
+
+
+@lru_cache(maxsize=64)
+def note(title, body_html):
+    """Aviso destacado; `body_html` es HTML fijo del código, no datos"""
+    return _NOTE.format(title=escape(title), body=body_html)
+
+
+@lru_cache(maxsize=256)
+def location(label, value):
+    return _LOCATION.format(label=escape(label), value=escape(str(value)))
+
+
+@lru_cache(maxsize=256)
+def total_card(value, caption):
+    return _TOTAL.format(value=escape(str(value)), caption=escape(caption))
+
+
+@lru_cache(maxsize=256)
+def badge(text, ok=False):
+    return _BADGE.format(modifier=' zl-badge--ok' if ok else '', text=escape(text))
+
+
+@lru_cache(maxsize=8)
+def legend(kind, text):
+    """Leyenda de la matriz; `kind` es master, peer o empty"""
+    return _LEGEND.format(kind=kind, text=escape(text))
+
+
+def footer(stamp):
+    return _FOOTER.format(stamp=escape(stamp))
@@ -0,0 +1,295 @@
+"""Topología de repetidores como grafo (networkx).
+
+Nodos: un repetidor por fila del inventario (su llave de fila) y un nodo por
+cerro. Aristas: 'enlace' de cada Peer a su Master (IP Master -> IP Ethernet
+del Master) y 'sitio' de cada repetidor a su cerro.
+
+El grafo y sus posiciones se calculan una vez por versión del inventario.
+Hasta SPRING_MAX_NODES nodos se usa spring_layout; en flotas más grandes,
+cada cerro con sus repetidores alrededor (site_layout, O(N)). Al cambiar la
+versión se parte de las posiciones anteriores: los nodos nuevos o
+modificados se ubican junto a sus vecinos y solo se relaja su entorno, con
+los vecinos fijos, en vez de recalcular el layout completo.
+"""
+from collections import Counter
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import charts
+import inventory
+
+LINK = 'enlace'
+SITE = 'sitio'
+
+# Iteraciones de spring_layout: cálculo completo y ajuste incremental
+LAYOUT_ITERATIONS = 50
+INCREMENTAL_ITERATIONS = 15
+# Nodos hasta los que se usa spring_layout (denso, O(N²), sin scipy); sobre eso, site_layout
+SPRING_MAX_NODES = 500
+LAYOUT_SEED = 7
+
+ROLE_SYMBOLS = {'Master': 'diamond', 'Peer': 'circle'}
+SITE_COLOR = '#94a3b8'
+LINK_COLOR = '#3b82f6'
+
+
+def site_node(cerro):
+    return f"cerro:{cerro}"
+
+
+# --- GRAFO ---
+def build_graph(df):
+    """Grafo no dirigido de enlaces Peer–Master y pertenencia a cerros"""
+    graph = nx.Graph()
+    keys = df.index.to_numpy()
+    cerros = df['Cerro'].astype(str).to_numpy()
+    attrs = zip(df['ID'].to_numpy(), df['Alias'].astype(str).to_numpy(), cerros,
+                df['Sistema_Logico'].astype(str).to_numpy(), df['Rol'].astype(str).to_numpy())
+    graph.add_nodes_from(
+        (key, {'kind': 'repetidor', 'ID': int(rid), 'Alias': alias, 'Cerro': cerro,
+               'Sistema': system, 'Rol': rol})
+        for key, (rid, alias, cerro, system, rol) in zip(keys, attrs)
+    )
+    graph.add_nodes_from((site_node(c), {'kind': 'cerro', 'Cerro': c}) for c in dict.fromkeys(cerros))
+    graph.add_edges_from(((key, site_node(c)) for key, c in zip(keys, cerros)), kind=SITE)
+
+    # IP Master de cada Peer -> llave del Master con esa IP Ethernet
+    is_master = (df['Rol'] == 'Master').to_numpy()
+    eth = inventory.ip_text(df['IP Ethernet']).to_numpy(dtype=object)
+    masters = pd.Series(keys[is_master], index=eth[is_master])
+    masters = masters[masters.index.notna() & ~masters.index.duplicated()]
+    targets = masters.reindex(inventory.ip_text(df['IP Master']).to_numpy(dtype=object)).to_numpy()
+    linked = ~is_master & pd.notna(targets)
+    graph.add_edges_from(zip(keys[linked], targets[linked]), kind=LINK)
+    return graph
+
+
+def _repeaters(graph, **match):
+    return [n for n, data in graph.nodes(data=True)
+            if data['kind'] == 'repetidor' and all(data[k] == v for k, v in match.items())]
+
+
+def _links(graph, node):
+    return [nb for nb in graph[node] if graph.edges[node, nb]['kind'] == LINK]
+
+
+def _frame(graph, nodes, columns=('Sistema', 'ID', 'Alias', 'Cerro')):
+    return pd.DataFrame([{col: graph.nodes[n][col] for col in columns} for n in nodes],
+                        columns=list(columns))
+
+
+# --- CONSULTAS ---
+def orphaned_peers(graph):
+    """Peers sin enlace a un Master del inventario"""
+    orphans = [n for n in _repeaters(graph, Rol='Peer') if not _links(graph, n)]
+    return _frame(graph, orphans).sort_values(['Sistema', 'ID'], ignore_index=True)
+
+
+def master_fan_out(graph):
+    """Peers enlazados a cada Master"""
+    masters = _repeaters(graph, Rol='Master')
+    table = _frame(graph, masters)
+    table['Peers'] = [len(_links(graph, n)) for n in masters]
+    return table.sort_values(['Sistema', 'Peers'], ascending=[True, False], ignore_index=True)
+
+
+def single_points_of_failure(graph):
+    """Por sistema, Masters y cerros cuya caída deja Peers sobrevivientes sin Master.
+
+    Dentro de un sistema los enlaces son estrellas (cada Peer apunta a un solo
+    Master), así que no hace falta simular cada caída: al caer un Master
+    quedan aislados sus Peers, y al caer un cerro, los Peers de otros cerros
+    cuyo Master estaba en él. A ambos se suman los repetidores que ya no
+    tenían Master en su sistema. Un solo recorrido del grafo.
+    """
+    nodes = graph.nodes
+    members = {}
+    for n, data in nodes(data=True):
+        if data['kind'] == 'repetidor':
+            members.setdefault(data['Sistema'], []).append(n)
+    # Master de cada Peer, solo si es del mismo sistema
+    owner = {}
+    for a, b, kind in graph.edges(data='kind'):
+        if kind == LINK:
+            master, peer = (a, b) if nodes[a]['Rol'] == 'Master' else (b, a)
+            if nodes[master]['Sistema'] == nodes[peer]['Sistema']:
+                owner[peer] = master
+
+    rows = []
+    for system in sorted(members):
+        peers = [n for n in members[system] if nodes[n]['Rol'] != 'Master']
+        sites = Counter(nodes[n]['Cerro'] for n in members[system])
+        orphans = Counter(nodes[n]['Cerro'] for n in peers if n not in owner)
+        alone = sum(orphans.values())
+        served = Counter(owner[n] for n in peers if n in owner)
+        cut = Counter(nodes[owner[n]]['Cerro'] for n in peers
+                      if n in owner and nodes[owner[n]]['Cerro'] != nodes[n]['Cerro'])
+
+        for n in members[system]:
+            isolated = alone + served[n]
+            if nodes[n]['Rol'] == 'Master' and isolated:
+                rows.append({'Sistema': system, 'Punto de falla': f"👑 {nodes[n]['Alias']} (ID {nodes[n]['ID']})",
+                             'Tipo': 'Master', 'Caídos': 1, 'Aislados': isolated})
+        for site in sorted(sites):
+            isolated = alone - orphans[site] + cut[site]
+            if isolated:
+                rows.append({'Sistema': system, 'Punto de falla': f"🏔️ {site}", 'Tipo': 'Cerro',
+                             'Caídos': sites[site], 'Aislados': isolated})
+    return pd.DataFrame(rows, columns=['Sistema', 'Punto de falla', 'Tipo', 'Caídos', 'Aislados'])
+
+
+# --- POSICIONES ---
+def _spiral(n, center=(0.0, 0.0), radius=1.0):
+    """n puntos repartidos de forma pareja en un disco (espiral de Fermat)"""
+    i = np.arange(n) + 0.5
+    r = radius * np.sqrt(i / n)
+    theta = i * np.pi * (3 - np.sqrt(5))
+    return np.column_stack([center[0] + r * np.cos(theta), center[1] + r * np.sin(theta)])
+
+
+def site_layout(graph):
+    """Sin spring_layout: cerros en espiral y sus repetidores alrededor de cada uno.
+
+    O(N) y sin scipy (networkx la necesita para spring_layout desde 500 nodos).
+    """
+    sites = [n for n, data in graph.nodes(data=True) if data['kind'] == 'cerro']
+    pos = {}
+    # Radio de cada cerro según su cantidad de repetidores, sin que se traslapen
+    spacing = 1 / max(1, np.sqrt(len(sites)))
+    for site, center in zip(sites, _spiral(len(sites))):
+        members = sorted(nb for nb in graph[site])
+        pos[site] = center
+        ring = _spiral(len(members), center, 0.45 * spacing) if members else []
+        pos.update(zip(members, ring))
+    for n in graph:
+        # Repetidores sin cerro (no debería ocurrir)
+        pos.setdefault(n, np.zeros(2))
+    return pos
+
+
+def full_layout(graph):
+    if len(graph) <= SPRING_MAX_NODES:
+        return nx.spring_layout(graph, iterations=LAYOUT_ITERATIONS, seed=LAYOUT_SEED)
+    return site_layout(graph)
+
+
+def layout(graph, previous=None, changed=()):
+    """Posiciones de los nodos; incremental si hay posiciones de la versión anterior.
+
+    En el modo incremental los nodos nuevos o modificados se ubican junto al
+    centroide de sus vecinos y solo se relaja el subgrafo de esos nodos y sus
+    vecinos (fijos), con INCREMENTAL_ITERATIONS iteraciones: el costo depende
+    del cambio, no del tamaño del grafo.
+    """
+    if not previous:
+        return full_layout(graph)
+
+    moving = [n for n in graph if n not in previous]
+    moving += [n for n in changed if n in graph and n in previous]
+    pos = {n: previous[n] for n in graph if n in previous}
+    rng = np.random.default_rng(LAYOUT_SEED)
+    for n in moving:
+        # Los de la versión anterior pueden haber cambiado de cerro o Master
+        placed = [pos[nb] for nb in graph[n] if nb in pos and nb not in moving]
+        center = np.mean(placed, axis=0) if placed else np.zeros(2)
+        pos[n] = center + rng.normal(scale=0.02, size=2)
+    if not moving:
+        return pos
+
+    local = set(moving) | {nb for n in moving for nb in graph[n]}
+    if len(local) > SPRING_MAX_NODES:
+        return pos
+    sub = graph.subgraph(local)
+    anchors = [n for n in sub if n not in set(moving)]
+    relaxed = nx.spring_layout(sub, pos={n: pos[n] for n in sub}, fixed=anchors or None,
+                               iterations=INCREMENTAL_ITERATIONS, seed=LAYOUT_SEED)
+    pos.update((n, relaxed[n]) for n in moving)
+    return pos
+
+
+def changed_nodes(graph, previous):
+    """Nodos de ambos grafos cuyos atributos o vecinos cambiaron"""
+    return [n for n in graph if n in previous
+            and (graph.nodes[n] != previous.nodes[n] or graph[n].keys() != previous[n].keys())]
+
+
+class Topology:
+    """Grafo, posiciones y consultas de una versión del inventario.
+
+    `diff` es el cambio de filas respecto de `previous`; solo vale si
+    `previous` es la versión inmediatamente anterior. Sin él se comparan los
+    nodos de ambos grafos.
+    """
+
+    def __init__(self, df, previous=None, diff=None):
+        self.graph = build_graph(df)
+        if diff is not None:
+            changed = diff.added.append(diff.modified)
+        elif previous is not None:
+            changed = changed_nodes(self.graph, previous.graph)
+        else:
+            changed = ()
+        self.positions = layout(self.graph, previous.positions if previous else None, changed)
+        self.orphans = orphaned_peers(self.graph)
+        self.fan_out = master_fan_out(self.graph)
+        self.spof = single_points_of_failure(self.graph)
+
+
+# --- VISTA ---
+def _edge_trace(pos, edges, color, width, dash=None, trace=go.Scatter):
+    xs, ys = [], []
+    for a, b in edges:
+        xs += [pos[a][0], pos[b][0], None]
+        ys += [pos[a][1], pos[b][1], None]
+    return trace(x=xs, y=ys, mode='lines', hoverinfo='skip', showlegend=False,
+                      line=dict(color=color, width=width, dash=dash))
+
+
+def network_figure(topology, visible=None, height=600):
+    """Vista plotly de la red; `visible` restringe a esas llaves de fila (filtros)"""
+    graph, pos = topology.graph, topology.positions
+    repeaters = [n for n in _repeaters(graph) if visible is None or n in visible]
+    sites = sorted({site_node(graph.nodes[n]['Cerro']) for n in repeaters})
+    shown = set(repeaters) | set(sites)
+    # Muchos repetidores: trazas WebGL
+    trace = charts.scatter_trace(len(repeaters))
+
+    fig = go.Figure()
+    edges = [(a, b, kind) for a, b, kind in graph.subgraph(shown).edges(data='kind')]
+    fig.add_trace(_edge_trace(pos, [(a, b) for a, b, k in edges if k == SITE], SITE_COLOR, 0.6, 'dot', trace))
+    fig.add_trace(_edge_trace(pos, [(a, b) for a, b, k in edges if k == LINK], LINK_COLOR, 1.5, trace=trace))
+
+    fig.add_trace(go.Scatter(
+        x=[pos[n][0] for n in sites], y=[pos[n][1] for n in sites],
+        mode='markers+text', name='Cerros', text=[graph.nodes[n]['Cerro'] for n in sites],
+        textposition='top center', hoverinfo='text',
+        marker=dict(symbol='square', size=14, color=SITE_COLOR),
+    ))
+
+    for system in sorted({graph.nodes[n]['Sistema'] for n in repeaters}):
+        nodes = [n for n in repeaters if graph.nodes[n]['Sistema'] == system]
+        data = [graph.nodes[n] for n in nodes]
+        fig.add_trace(trace(
+            x=[pos[n][0] for n in nodes], y=[pos[n][1] for n in nodes],
+            mode='markers', name=system,
+            marker=dict(symbol=[ROLE_SYMBOLS.get(d['Rol'], 'circle') for d in data],
+                        size=[16 if d['Rol'] == 'Master' else 10 for d in data],
+                        line=dict(width=1, color='white')),
+            hovertext=[f"<b>{d['Alias']}</b><br>ID {d['ID']} · {d['Rol']}<br>{d['Cerro']}" for d in data],
+            hoverinfo='text',
+        ))
+
+    fig.update_layout(
+        height=height,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Inter', size=12),
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False, scaleanchor='x'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02),
+        margin=dict(l=10, r=10, t=40, b=10),
+    )
+    return fig